@@ -2,6 +2,7 @@ import yaml
 from rich import print as rprint
 
 from assignments.plot import PlotSpec
+from assignments.procedural import add_procedural_objects
 from nemo.geometry import ParticleFlags
 from nemo.sim import Model, ModelBuilder
 from nemo.solvers import ExplicitEulerSolver, MidpointSolver, SolverBase, SymplecticEulerSolver
@@ -26,6 +27,9 @@ def load_scene(config: str) -> tuple[Model, SolverBase, PlotSpec | None]:
             flags = 0 if p.get("fixed") else ParticleFlags.ACTIVE.value
             builder.add_particle(pos, vel, p.get("mass"), radius=radius, drag=None, flags=flags)
 
+    # cloths, ropes and lattices generated from a few parameters
+    add_procedural_objects(builder, config_data)
+
     if "springs" in config_data:
         # load springs
         for s in config_data["springs"]:
@@ -53,12 +57,7 @@ def load_scene(config: str) -> tuple[Model, SolverBase, PlotSpec | None]:
 
     if "plot" in config_data:
         plot = PlotSpec(config_data["plot"])
-        if plot.particle_id >= model.particle_count:
-            raise RuntimeError(f"Particle ID{plot.particle_id} is out of range")
-        if plot.dof < 0 or plot.dof > 2:
-            raise RuntimeError(f"DoF{plot.dof} is out of range, must be 0, 1, or 2")
-        if plot.y_range_min >= plot.y_range_max:
-            raise RuntimeError(f"Y_range [{plot.y_range_min}, {plot.y_range_max}] is not valid")
+        plot.validate(model)
         return model, solver, plot
     else:
         return model, solver, None
@@ -1,17 +1,39 @@
+import numpy as np
 import yaml
 from rich import print as rprint
 
 from assignments.plot import PlotSpec
+from assignments.procedural import add_procedural_objects
+from nemo import solvers
 from nemo.geometry import ParticleFlags
 from nemo.sim import Model, ModelBuilder
-from nemo.solvers import (
-    ExplicitEulerSolver,
-    ImplicitEulerSolver,
-    LinearizedImplicitSolver,
-    MidpointSolver,
-    SolverBase,
-    SymplecticEulerSolver,
-)
+from nemo.solvers import SolverBase
+from nemo.solvers.stability import estimate_stable_timestep, is_conditionally_stable
+
+
+def check_timestep(model: Model, solver: SolverBase, auto: bool = False, safety: float = 0.9) -> None:
+    """
+    Compare the timestep of an explicit solver with its estimated stable timestep (see
+    :func:`nemo.solvers.stability.estimate_stable_timestep`) and warn if it is larger. With `auto`,
+    set the timestep of the solver to the stable timestep scaled by `safety` instead.
+    """
+    if not is_conditionally_stable(type(solver)):
+        if auto:
+            raise RuntimeError(
+                f"`timestep: auto` requires an explicit solver, {type(solver).__name__} is stable for any timestep"
+            )
+        return
+    stable_dt = estimate_stable_timestep(model, type(solver))
+    if auto:
+        if not np.isfinite(stable_dt):
+            raise RuntimeError("`timestep: auto` can't choose a timestep for a scene without stiffness or damping")
+        solver.dt = safety * stable_dt
+        rprint(f"  timestep {solver.dt:.3g} (estimated stable timestep {stable_dt:.3g})")
+    elif solver.dt > stable_dt:
+        rprint(
+            f"[bold yellow]Warning: the timestep {solver.dt:g} exceeds the estimated stable timestep {stable_dt:.3g} "
+            f"of {type(solver).__name__}, the simulation may blow up (`timestep: auto` picks a stable timestep)"
+        )
 
 
 def load_scene(config: str) -> tuple[Model, SolverBase, PlotSpec | None]:
@@ -40,6 +62,9 @@ def load_scene(config: str) -> tuple[Model, SolverBase, PlotSpec | None]:
             flags = 0 if p.get("fixed") else ParticleFlags.ACTIVE.value
             builder.add_particle(pos, vel, p.get("mass"), radius=radius, drag=drag, flags=flags)
 
+    # cloths, ropes and lattices generated from a few parameters
+    add_procedural_objects(builder, config_data)
+
     if builder.particle_count == 0:
         raise RuntimeError("No particles are added. Can't run simulation")
 
@@ -59,33 +84,89 @@ def load_scene(config: str) -> tuple[Model, SolverBase, PlotSpec | None]:
                 raise RuntimeError(f"particle_ids must be two index numbers, not {ps}")
             builder.add_gravitational(ps[0], ps[1], g["G"])
 
-    model = builder.finalize()
+    if "contacts" in config_data:
+        # penalty contacts against the ground plane and between particles
+        cconfig = config_data["contacts"]
+        if "ground" in cconfig:
+            g = cconfig["ground"]
+            builder.add_ground_plane(g["stiffness"], g.get("damping", 0.0), g.get("height", 0.0))
+        if "particle" in cconfig:
+            builder.particle_ke = cconfig["particle"]["stiffness"]
+            builder.particle_kd = cconfig["particle"].get("damping", 0.0)
+        if "self_collision" in cconfig:
+            builder.self_collision_thickness = cconfig["self_collision"]["thickness"]
+
+    if "sleeping" in config_data:
+        # let resting particle islands fall asleep
+        sl = config_data["sleeping"]
+        builder.enable_sleeping(sl["velocity_threshold"], sl["force_threshold"], sl.get("window", 30))
+
+    # optionally reorder particles for memory locality (particle IDs in this file stay valid),
+    # and optionally simulate in single precision (`precision: float32`)
+    model = builder.finalize(reorder=sconfig.get("reorder"), dtype=sconfig.get("precision", "float64"))
     rprint("[bold green]Loading scene ...")
     rprint(f"  {model.particle_count} particles are added")
     rprint(f"  {model.spring_count} springs are added")
     rprint(f"  {model.gravitational_count} gravitational pairs are added")
 
+    # `timestep: auto` picks the largest stable timestep of an explicit solver (see check_timestep)
+    timestep = sconfig["timestep"]
+    auto_timestep = isinstance(timestep, str) and timestep.lower() == "auto"
+    if auto_timestep:
+        timestep = 0.0
+    # only the module of the chosen solver is imported (see nemo.solvers)
     if sconfig["type"].lower() == "explicit_euler":
-        solver = ExplicitEulerSolver(model, sconfig["timestep"])
+        solver = solvers.ExplicitEulerSolver(model, timestep)
     elif sconfig["type"].lower() == "symplectic_euler":
-        solver = SymplecticEulerSolver(model, sconfig["timestep"])
+        solver = solvers.SymplecticEulerSolver(model, timestep)
     elif sconfig["type"].lower() == "midpoint":
-        solver = MidpointSolver(model, sconfig["timestep"])
+        solver = solvers.MidpointSolver(model, timestep)
+    elif sconfig["type"].lower() == "rk4":
+        solver = solvers.RK4Solver(model, timestep)
+    elif sconfig["type"].lower() == "velocity_verlet":
+        solver = solvers.VelocityVerletSolver(model, timestep)
+    elif sconfig["type"].lower() == "multirate":
+        solver = solvers.MultirateSolver(
+            model,
+            timestep,
+            substeps=sconfig.get("substeps"),
+            stiffness_threshold=sconfig.get("stiffness_threshold"),
+            safety=sconfig.get("safety", 0.5),
+        )
     elif sconfig["type"].lower() == "linearized_implicit":
-        solver = LinearizedImplicitSolver(model, sconfig["timestep"])
+        solver = solvers.LinearizedImplicitSolver(model, timestep, sconfig.get("linear_solver", "auto"))
     elif sconfig["type"].lower() == "implicit_euler":
-        solver = ImplicitEulerSolver(model, sconfig["timestep"])
+        solver = solvers.ImplicitEulerSolver(
+            model,
+            timestep,
+            sconfig.get("linear_solver", "auto"),
+            predictor=sconfig.get("predictor", "velocity"),
+        )
+    elif sconfig["type"].lower() == "exponential":
+        solver = solvers.ExponentialSolver(
+            model,
+            timestep,
+            jacobian=sconfig.get("jacobian", "auto"),
+            krylov_dim=sconfig.get("krylov_dim", 30),
+            tol=sconfig.get("tol", 1e-8),
+        )
+    elif sconfig["type"].lower() == "projective_dynamics":
+        solver = solvers.ProjectiveDynamicsSolver(model, timestep, sconfig.get("iterations", 10))
+    elif sconfig["type"].lower() == "xpbd":
+        solver = solvers.XPBDSolver(
+            model,
+            timestep,
+            substeps=sconfig.get("substeps", 10),
+            iterations=sconfig.get("iterations", 1),
+            method=sconfig.get("method", "gauss_seidel"),
+        )
     else:
         raise RuntimeError(f"Unknown solver type: [{sconfig['type']}]")
+    check_timestep(model, solver, auto_timestep, sconfig.get("timestep_safety", 0.9))
 
     if "plot" in config_data:
         plot = PlotSpec(config_data["plot"])
-        if plot.particle_id >= model.particle_count:
-            raise RuntimeError(f"Particle ID{plot.particle_id} is out of range")
-        if plot.dof < 0 or plot.dof > 2:
-            raise RuntimeError(f"DoF{plot.dof} is out of range, must be 0, 1, or 2")
-        if plot.y_range_min >= plot.y_range_max:
-            raise RuntimeError(f"Y_range [{plot.y_range_min}, {plot.y_range_max}] is not valid")
+        plot.validate(model)
         return model, solver, plot
     else:
         return model, solver, None
@@ -1,7 +1,244 @@
+import numpy as np
+
+from nemo.core.types import nparray
+from nemo.sim import DIAGNOSTICS, Model, State, eval_diagnostics
+from nemo.solvers import SolverBase
+
+# Quantities of a particle: they need a particle_id and a dof
+PARTICLE_QUANTITIES = ("position", "velocity")
+# Quantities derived from the diagnostics
+DERIVED_QUANTITIES = ("potential_energy",)
+# Quantities of the simulation loop
+LOOP_QUANTITIES = ("step_time",)
+
+
+class SeriesSpec:
+    """One plotted series: a quantity sampled once per rendered frame.
+
+    The quantity is one of
+
+    - ``position`` or ``velocity``: a coordinate (``dof``) of a particle (``particle_id``);
+    - one of the diagnostics of :data:`nemo.sim.DIAGNOSTICS` (e.g., ``total_energy``), or
+      ``potential_energy`` (the total minus the kinetic energy);
+    - ``step_time``: the wall time of a solver step in milliseconds (averaged over the frame);
+    - ``solver.<attribute>``: a numeric attribute of the solver, e.g., ``solver.iterations`` of the
+      implicit Euler solver or ``solver.krylov_iterations`` of the exponential solver.
+    """
+
+    def __init__(self, config: dict):
+        self.quantity = config["quantity"]
+        self.particle_id = config.get("particle_id")
+        self.dof = config.get("dof")
+        default_label = self.quantity
+        if self.quantity in PARTICLE_QUANTITIES:
+            default_label = f"{self.quantity} {self.dof} (particle {self.particle_id})"
+        self.label = config.get("label", default_label)
+
+    def validate(self, model: Model) -> None:
+        q = self.quantity
+        if q in PARTICLE_QUANTITIES:
+            if self.particle_id is None or self.dof is None:
+                raise RuntimeError(f"A {q} series needs a particle_id and a dof")
+            if self.particle_id < 0 or self.particle_id >= model.particle_count:
+                raise RuntimeError(f"Particle ID{self.particle_id} is out of range")
+            if self.dof < 0 or self.dof > 2:
+                raise RuntimeError(f"DoF{self.dof} is out of range, must be 0, 1, or 2")
+        elif q not in DIAGNOSTICS + DERIVED_QUANTITIES + LOOP_QUANTITIES and not q.startswith("solver."):
+            raise RuntimeError(f"Unknown plot quantity: [{q}]")
+
+
+class PanelSpec:
+    """One plot panel: a few series sharing the time axis and a y axis."""
+
+    def __init__(self, config: dict):
+        self.title = config.get("title", "Plot")
+        self.series = [SeriesSpec(s) for s in config["series"]]
+        self.y_range_min = self.y_range_max = None
+        """Y-axis range, or None to fit the data."""
+        if "y_range" in config:
+            self.y_range_min, self.y_range_max = config["y_range"]
+
+    def validate(self, model: Model) -> None:
+        if self.y_range_min is not None and self.y_range_min >= self.y_range_max:
+            raise RuntimeError(f"Y_range [{self.y_range_min}, {self.y_range_max}] is not valid")
+        for s in self.series:
+            s.validate(model)
+
+
 class PlotSpec:
+    """The `plot` section of a scene: a list of panels, e.g.,
+
+    .. code-block:: yaml
+
+        plot:
+          history: 2000     # number of samples (frames) kept, optional
+          max_points: 400   # number of points drawn per series, optional
+          panels:
+            - title: Particle 1
+              y_range: [1.0, 2.8]  # optional, fitted to the data otherwise
+              series:
+                - {quantity: position, particle_id: 1, dof: 2}
+                - {quantity: velocity, particle_id: 1, dof: 2}
+            - title: Energy
+              series:
+                - {quantity: kinetic_energy}
+                - {quantity: total_energy}
+
+    The single-series form ``{particle_id, dof, y_range}`` plots a position as before.
+    """
+
     def __init__(self, config: dict):
-        self.particle_id = config["particle_id"]
-        self.dof = config["dof"]
-        v = config["y_range"]
-        self.y_range_min = v[0]
-        self.y_range_max = v[1]
+        if "panels" in config:
+            panels = config["panels"]
+        else:
+            # a single position series
+            panels = [
+                {
+                    "title": "Vertical Position",
+                    "y_range": config["y_range"],
+                    "series": [{"quantity": "position", "particle_id": config["particle_id"], "dof": config["dof"]}],
+                }
+            ]
+        self.panels = [PanelSpec(p) for p in panels]
+        self.history = int(config.get("history", 1000))
+        """Number of samples kept per series."""
+        self.max_points = int(config.get("max_points", 500))
+        """Maximal number of points drawn per series (longer histories are decimated)."""
+
+    @staticmethod
+    def energy() -> "PlotSpec":
+        """A panel of the kinetic, potential and total energies."""
+        quantities = ("kinetic_energy", "potential_energy", "total_energy")
+        return PlotSpec({"panels": [{"title": "Energy", "series": [{"quantity": q} for q in quantities]}]})
+
+    @property
+    def series(self) -> list[SeriesSpec]:
+        """All the series of all the panels."""
+        return [s for p in self.panels for s in p.series]
+
+    def validate(self, model: Model) -> None:
+        if self.history < 2 or self.max_points < 2:
+            raise RuntimeError(f"History ({self.history}) and max_points ({self.max_points}) must be at least 2")
+        for p in self.panels:
+            p.validate(model)
+
+
+def decimate(x: nparray, y: nparray, max_points: int) -> tuple[nparray, nparray]:
+    """
+    Reduce a series to at most `max_points` points for drawing.
+
+    The samples are split into max_points/2 buckets of consecutive samples, and the minimum and the
+    maximum of every bucket are kept (in their order), so that peaks and oscillations stay visible
+    (min-max decimation). The oldest samples that don't fill a bucket are dropped. The cost of
+    drawing is then bounded for any length of the history.
+
+    Args:
+        x: nparray, shape (n,): the (increasing) times
+        y: nparray, shape (n,): the values
+        max_points: the maximal number of points
+
+    Returns:
+        tuple[nparray, nparray]: the decimated times and values, contiguous arrays of shape (m,), m <= max_points
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.ascontiguousarray(x), np.ascontiguousarray(y)
+    size = -(-n // (max_points // 2))
+    m = (n // size) * size
+    xs = x[n - m :].reshape(-1, size)
+    ys = y[n - m :].reshape(-1, size)
+    lo, hi = ys.argmin(axis=1), ys.argmax(axis=1)
+    picked = (np.arange(len(ys))[:, None], np.stack([np.minimum(lo, hi), np.maximum(lo, hi)], axis=1))
+    return xs[picked].reshape(-1), ys[picked].reshape(-1)
+
+
+class PlotData:
+    """The histories of the series of a :class:`PlotSpec`, sampled once per rendered frame.
+
+    The samples of all the series are stored in preallocated arrays, which keep the last
+    :attr:`PlotSpec.history` samples (the arrays are twice as long, and the samples are shifted to
+    their beginning when they are full, i.e., once every `history` samples). All the series are
+    sampled at once: the particle coordinates with a single gather, and the diagnostics with a
+    single :func:`nemo.sim.eval_diagnostics` call if any series needs them.
+    """
+
+    def __init__(self, spec: PlotSpec, model: Model):
+        self.spec = spec
+        self.model = model
+        series = spec.series
+        self.count = 0
+        """Number of samples in the buffers (at most twice the history)."""
+        self._times = np.zeros(2 * spec.history)
+        self._values = np.zeros((2 * spec.history, len(series)))
+
+        def columns(quantities) -> nparray:
+            return np.array([k for k, s in enumerate(series) if s.quantity in quantities], dtype=np.int64)
+
+        # the plotted particle IDs refer to the scene file, which may differ from the model's particle order
+        self._position = columns(("position",))
+        self._velocity = columns(("velocity",))
+        self._position_index = self._particle_coords([series[k] for k in self._position])
+        self._velocity_index = self._particle_coords([series[k] for k in self._velocity])
+        names = DIAGNOSTICS + DERIVED_QUANTITIES
+        self._diagnostics = columns(names)
+        self._diagnostics_index = np.array([names.index(series[k].quantity) for k in self._diagnostics], dtype=np.int64)
+        self._step_time = columns(LOOP_QUANTITIES)
+        self._solver = [
+            (k, s.quantity.removeprefix("solver.")) for k, s in enumerate(series) if s.quantity.startswith("solver.")
+        ]
+        self._diagnostics_buffer = np.zeros(len(names))
+
+    def _particle_coords(self, series: list[SeriesSpec]) -> tuple[nparray, nparray]:
+        particles = [self.model.particle_index(s.particle_id) for s in series]
+        return np.array(particles, dtype=np.int64), np.array([s.dof for s in series], dtype=np.int64)
+
+    def sample(self, ts: float, state: State, solver: SolverBase, step_time: float = 0.0) -> None:
+        """
+        Append a sample of all the series.
+
+        Args:
+            ts: the simulated time
+            state: the current state
+            solver: the solver (for the solver attributes)
+            step_time: the wall time of a solver step in seconds
+        """
+        if self.count == len(self._times):
+            h = self.spec.history
+            self._times[:h] = self._times[self.count - h :]
+            self._values[:h] = self._values[self.count - h :]
+            self.count = h
+        k = self.count
+        self._times[k] = ts
+        row = self._values[k]
+        row[self._position] = state.particle_q[self._position_index]
+        row[self._velocity] = state.particle_qd[self._velocity_index]
+        if len(self._diagnostics) > 0:
+            d = self._diagnostics_buffer
+            eval_diagnostics(self.model, state, out=d[: len(DIAGNOSTICS)])
+            d[len(DIAGNOSTICS)] = d[DIAGNOSTICS.index("total_energy")] - d[DIAGNOSTICS.index("kinetic_energy")]
+            row[self._diagnostics] = d[self._diagnostics_index]
+        row[self._step_time] = 1e3 * step_time
+        for column, attribute in self._solver:
+            row[column] = float(getattr(solver, attribute, np.nan))
+        self.count += 1
+
+    @property
+    def times(self) -> nparray:
+        """Times of the kept samples, shape (sample_count,)."""
+        return self._times[max(self.count - self.spec.history, 0) : self.count]
+
+    def panel(self, index: int) -> list[tuple[str, nparray, nparray]]:
+        """
+        The decimated series of a panel (see :func:`decimate`), ready to be drawn.
+
+        Returns:
+            list[tuple[str, nparray, nparray]]: the label, the times and the values of every series
+        """
+        start = max(self.count - self.spec.history, 0)
+        times, values = self._times[start : self.count], self._values[start : self.count]
+        first = sum(len(p.series) for p in self.spec.panels[:index])
+        lines = []
+        for k, s in enumerate(self.spec.panels[index].series, start=first):
+            xs, ys = decimate(times, values[:, k], self.spec.max_points)
+            lines.append((s.label, xs, ys))
+        return lines
@@ -0,0 +1,88 @@
+import numpy as np
+
+from nemo.sim import ModelBuilder
+
+
+def _add_cloth(builder: ModelBuilder, c: dict) -> None:
+    builder.add_cloth_grid(
+        pos=c.get("pos", (0.0, 0.0, 0.0)),
+        rows=c["rows"],
+        cols=c["cols"],
+        spacing=c["spacing"],
+        mass=c["mass"],
+        ke=c["stiffness"],
+        kd=c.get("damping", 0.0),
+        cross_ke=c.get("cross_stiffness"),
+        cross_kd=c.get("cross_damping"),
+        shear_ke=c.get("shear_stiffness", 0.0),
+        shear_kd=c.get("shear_damping", 0.0),
+        bend_ke=c.get("bend_stiffness", 0.0),
+        bend_kd=c.get("bend_damping", 0.0),
+        vel=c.get("vel", (0.0, 0.0, 0.0)),
+        radius=c.get("radius"),
+        drag=c.get("drag"),
+        axes=tuple(c.get("axes", (0, 1))),
+        fixed_rows=c.get("fixed_rows"),
+        fixed_cols=c.get("fixed_cols"),
+    )
+
+
+def _add_rope(builder: ModelBuilder, c: dict) -> None:
+    builder.add_rope(
+        start=c["start"],
+        end=c["end"],
+        count=c["count"],
+        mass=c["mass"],
+        ke=c["stiffness"],
+        kd=c.get("damping", 0.0),
+        bend_ke=c.get("bend_stiffness", 0.0),
+        bend_kd=c.get("bend_damping", 0.0),
+        radius=c.get("radius"),
+        drag=c.get("drag"),
+        fixed=c.get("fixed"),
+    )
+
+
+def _add_lattice(builder: ModelBuilder, c: dict) -> None:
+    builder.add_lattice(
+        pos=c.get("pos", (0.0, 0.0, 0.0)),
+        dims=c["dims"],
+        spacing=c["spacing"],
+        mass=c["mass"],
+        ke=c["stiffness"],
+        kd=c.get("damping", 0.0),
+        shear_ke=c.get("shear_stiffness", 0.0),
+        shear_kd=c.get("shear_damping", 0.0),
+        bend_ke=c.get("bend_stiffness", 0.0),
+        bend_kd=c.get("bend_damping", 0.0),
+        vel=c.get("vel", (0.0, 0.0, 0.0)),
+        radius=c.get("radius"),
+        drag=c.get("drag"),
+    )
+
+
+def add_procedural_objects(builder: ModelBuilder, config_data: dict) -> None:
+    """
+    Add the procedurally generated objects of a scene (`cloth`, `rope` and `lattice` sections).
+
+    Each section is either a single object or a list of objects. The objects are added in the
+    order in which they appear in the scene file, after the explicitly listed particles, so
+    their particle IDs follow the IDs of the latter.
+
+    An object with a `repeat: {count: K, offset: [dx, dy, dz]}` entry is added K times, where
+    the k-th copy is translated by k times the offset.
+    """
+    adders = {"cloth": _add_cloth, "rope": _add_rope, "lattice": _add_lattice}
+    for section, value in config_data.items():
+        if section not in adders:
+            continue
+        for c in value if isinstance(value, list) else [value]:
+            if "repeat" not in c:
+                adders[section](builder, c)
+                continue
+            # build the object once and add its copies in bulk
+            instance = ModelBuilder()
+            adders[section](instance, c)
+            count = c["repeat"]["count"]
+            offset = np.asarray(c["repeat"]["offset"], dtype=np.float64)
+            builder.add_builder(instance, pos=np.arange(count)[:, None] * offset)
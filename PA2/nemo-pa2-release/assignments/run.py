@@ -1,41 +1,100 @@
 import importlib
+import time
 from collections.abc import Callable
 from typing import Annotated
 
 import numpy as np
-import polyscope as ps
-import polyscope.imgui as psim
-import polyscope.implot as psplot
 import typer
 from rich import print as rprint
+from rich.table import Table
 
 import nemo
 from nemo.core import Axis, header
 from nemo.geometry import ParticleFlags
-from nemo.sim import Model, State
+from nemo.sim import DIAGNOSTICS, DiagnosticsRecorder, Model, SelfCollision, Sleeping, State
 from nemo.solvers import SolverBase
 
-from .plot import PlotSpec
+from .plot import PlotData, PlotSpec
 
 app = typer.Typer(add_completion=False)
 FPS = 60
 
 
-class Runner:
-    def __init__(self, model: Model, solver: SolverBase, callback: Callable | None = None):
+def _viewer():
+    """
+    Import the viewer modules: polyscope and its imgui and implot bindings.
+
+    They take most of the startup time, so they are only imported when a viewer is launched,
+    and commands without a viewer (e.g., `headless`) start without them.
+    """
+    return (
+        importlib.import_module("polyscope"),
+        importlib.import_module("polyscope.imgui"),
+        importlib.import_module("polyscope.implot"),
+    )
+
+
+class Simulation:
+    """The simulation loop without a viewer: the solver step followed by self-collisions and sleeping."""
+
+    def __init__(self, model: Model, solver: SolverBase, diagnostics: DiagnosticsRecorder | None = None):
         """
         Args:
-            callback: Callable
+            diagnostics: an optional recorder of the energies and momenta, sampled after every step
         """
         self.model = model
         self.solver = solver
         self.state_0 = model.state()
         self.state_1 = model.state()
+        self.diagnostics = diagnostics
+        self.self_collision = None
+        if model.self_collision_thickness > 0:
+            self.self_collision = SelfCollision(model, model.self_collision_thickness)
+        self.sleeping = None
+        if model.sleep_window > 0:
+            self.sleeping = Sleeping(
+                model, model.sleep_velocity_threshold, model.sleep_force_threshold, model.sleep_window
+            )
+        if diagnostics is not None:
+            diagnostics.record(solver.ts, self.state_0)
+
+    def step(self):
+        """Advance the simulation by one timestep; the new state is `state_0`."""
+        self.state_0.clear_forces()
+        self.solver.step(self.state_0, self.state_1)
+        if self.self_collision is not None:
+            self.self_collision.apply(self.state_0, self.state_1, self.solver.dt)
+        if self.sleeping is not None:
+            self.sleeping.update(self.state_0, self.state_1, self.solver.dt)
+        # update particle positions: swap the roles of the two states (the solvers write in
+        # place and take their temporary states from the model's pool, so nothing is allocated)
+        self.state_0, self.state_1 = self.state_1, self.state_0
+        if self.diagnostics is not None:
+            self.diagnostics.record(self.solver.ts, self.state_0)
+
+
+class Runner(Simulation):
+    def __init__(
+        self,
+        model: Model,
+        solver: SolverBase,
+        callback: Callable | None = None,
+        diagnostics: DiagnosticsRecorder | None = None,
+    ):
+        """
+        Args:
+            callback: Callable
+            diagnostics: an optional recorder of the energies and momenta (see :class:`Simulation`)
+        """
+        super().__init__(model, solver, diagnostics)
         self.running = False
         self.screenshot = False
         self.callback = callback
+        self.step_time = 0.0
+        """Wall time of a step in seconds, averaged over the steps of the last rendered frame."""
 
         # Set up viewer
+        ps, _, _ = _viewer()
         ps.set_program_name(f"Nemo {nemo.__version__}")
         ps.set_build_default_gui_panels(False)
         ps.set_give_focus_on_show(True)
@@ -61,7 +120,7 @@ class Runner:
                 color = (1.0, 0.0, 0.0)
             self.particle_views.append(
                 ps.register_point_cloud(
-                    f"partile-{ii:06d}",
+                    f"partile-{model.particle_permutation[ii]:06d}",
                     self.state_1.particle_q[ii : ii + 1, :],
                     radius=self.model.particle_radius[ii],
                     color=color,
@@ -86,6 +145,7 @@ class Runner:
         rprint("[bold green]---------------------------------------------------------------------------")
         print("Press [space] to toggle start/pause of the simulation")
 
+        ps, _, _ = _viewer()
         ts = 0.0
         dt_render = 1.0 / FPS
         while not ps.window_requests_close():
@@ -99,11 +159,13 @@ class Runner:
                 # wouldn't slow down the displayed animation). No matter what timestep size
                 # you choose (as long as it's not too small or too large), the viewer displays
                 # the simulated progress in realtime.
+                steps = 0
+                start = time.perf_counter()
                 while self.solver.ts < ts:
-                    self.state_0.clear_forces()
-                    self.solver.step(self.state_0, self.state_1)
-                    # update particle positions
-                    self.state_0, self.state_1 = self.state_1, self.state_0
+                    self.step()
+                    steps += 1
+                if steps > 0:
+                    self.step_time = (time.perf_counter() - start) / steps
 
                 # update the viewer states for rendering
                 for ii in range(self.model.particle_count):
@@ -121,20 +183,38 @@ class Runner:
 # ------------------------------------------------------------------------------------------------
 
 
+def _draw_panel(title: str, lines: list, y_range: tuple[float, float] | None = None):
+    """Draw a plot panel of (label, times, values) lines; the y axis is fitted to the data without a range."""
+    _, _, psplot = _viewer()
+    if psplot.BeginPlot(title):
+        psplot.SetupAxes("time", "", 0, psplot.ImPlotAxisFlags_AutoFit if y_range is None else 0)
+        xs = [x for _, x, _ in lines if len(x) > 0]
+        if xs:
+            x_min, x_max = min(x[0] for x in xs), max(x[-1] for x in xs)
+            psplot.SetupAxisLimits(psplot.ImAxis_X1, x_min, x_max, psplot.ImPlotCond_Always)
+        if y_range is not None:
+            psplot.SetupAxisLimits(psplot.ImAxis_Y1, y_range[0], y_range[1], psplot.ImPlotCond_Always)
+        for label, x, y in lines:
+            psplot.PlotLine(label, x, y)
+        psplot.EndPlot()
+
+
 def launch_pa_1_2(model: Model, solver: SolverBase, plspec: PlotSpec | None = None):
-    data_x = []
-    data_z = []
+    ps, psim, _ = _viewer()
+    # the series are sampled once per rendered frame into preallocated arrays (see PlotData)
+    plot_data = PlotData(plspec, model) if plspec is not None else None
+    energy_data = PlotData(PlotSpec.energy(), model)
 
     def data_accum_callback(ts: float, state: State):
-        data_x.append(ts)
-        data_z.append(state.particle_q[plspec.particle_id, plspec.dof])
-        if len(data_x) > 1000:
-            data_x.pop(0)
-            data_z.pop(0)
+        if plot_data is not None:
+            plot_data.sample(ts, state, solver, runner.step_time)
+        if show_energy:
+            energy_data.sample(ts, state, solver, runner.step_time)
 
-    runner = Runner(model, solver, callback=data_accum_callback if plspec is not None else None)
+    runner = Runner(model, solver, callback=data_accum_callback)
 
     show_ground = True
+    show_energy = False
 
     def callback():
         # ps.build_structure_gui()
@@ -159,18 +239,15 @@ def launch_pa_1_2(model: Model, solver: SolverBase, plspec: PlotSpec | None = No
             else:
                 ps.set_ground_plane_mode("none")
 
-        if plspec is not None:
-            plot_len = len(data_x)
-            if plot_len > 5:
-                if psplot.BeginPlot("Vertical Position", flags=psplot.ImPlotAxisFlags_AutoFit):
-                    psplot.SetupAxisLimits(psplot.ImAxis_X1, data_x[0], data_x[-1], psplot.ImPlotCond_Always)
-                    psplot.SetupAxisLimits(
-                        psplot.ImAxis_Y1, plspec.y_range_min, plspec.y_range_max, psplot.ImPlotCond_Always
-                    )
-                    xs = np.asarray(data_x, dtype=np.float64)[:plot_len]
-                    ys = np.asarray(data_z, dtype=np.float64)[:plot_len]
-                    psplot.PlotLine("Vertical Pos.", xs, ys)
-                    psplot.EndPlot()
+        if plot_data is not None and len(plot_data.times) > 5:
+            for k, panel in enumerate(plspec.panels):
+                y_range = (panel.y_range_min, panel.y_range_max) if panel.y_range_min is not None else None
+                _draw_panel(panel.title, plot_data.panel(k), y_range)
+
+        nonlocal show_energy
+        _, show_energy = psim.Checkbox("Show Energy", show_energy)
+        if show_energy and len(energy_data.times) > 5:
+            _draw_panel("Energy", energy_data.panel(0))
 
     ps.set_user_callback(callback)
     rprint("[bold green]Launch simulation ...")
@@ -195,5 +272,39 @@ def pa2(config: Annotated[str, typer.Argument(help="Scene configuration file")])
     launch_pa_1_2(model, solver, plspec)
 
 
+@app.command("headless", help="Run a simulation without the viewer and record its energies and momenta")
+def headless(
+    assignment: Annotated[str, typer.Argument(help="Assignment of the scene (pa1 or pa2)")],
+    config: Annotated[str, typer.Argument(help="Scene configuration file")],
+    duration: Annotated[float, typer.Option(help="Simulated time in seconds")] = 5.0,
+    output: Annotated[str | None, typer.Option(help="CSV file of the diagnostics over time")] = None,
+    every: Annotated[int, typer.Option(help="Record the diagnostics every N steps")] = 1,
+):
+    module = importlib.import_module(f".{assignment}", package=__package__)
+    model, solver, _ = module.load_scene(config)
+    diagnostics = DiagnosticsRecorder(model, path=output, every=every)
+    simulation = Simulation(model, solver, diagnostics)
+    rprint(f"[bold green]Simulate {duration}s ...")
+    steps = 0
+    start = time.perf_counter()
+    while solver.ts < duration:
+        simulation.step()
+        steps += 1
+    elapsed = time.perf_counter() - start
+    diagnostics.close()
+
+    energy = diagnostics.series("total_energy")
+    table = Table("", "initial", "final", "max |change|")
+    for name in DIAGNOSTICS:
+        v = diagnostics.series(name)
+        table.add_row(name, f"{v[0]:.6g}", f"{v[-1]:.6g}", f"{np.abs(v - v[0]).max():.3e}")
+    rprint(table)
+    drift = np.abs(energy - energy[0]).max() / max(abs(energy[0]), 1e-12)
+    rprint(f"{steps} steps in {elapsed:.2f}s ({1e3 * elapsed / max(steps, 1):.3f} ms/step)")
+    rprint(f"Relative drift of the total energy: {drift:.3e}")
+    if output is not None:
+        rprint(f"Diagnostics written to {output}")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,80 @@
+"""Measure the startup time of the package and of the command line.
+
+Run with (from the repository root):
+
+    python benchmarks/import_time.py --repeat 5 --budget 1.0
+
+Every import runs in a fresh interpreter (so nothing is cached in `sys.modules`), and the report
+lists the median wall time over the repetitions, without the startup time of a bare interpreter.
+The viewer (polyscope) is only imported when a viewer command runs, so a headless command must
+start without it and within the budget; the script exits with an error otherwise.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from rich import print as rprint
+from rich.table import Table
+
+app = typer.Typer(add_completion=False)
+ROOT = Path(__file__).resolve().parent.parent
+
+# (label, code run by the interpreter)
+TARGETS = [
+    ("import nemo", "import nemo"),
+    ("import nemo.solvers", "import nemo.solvers"),
+    ("one solver", "from nemo.solvers import ImplicitEulerSolver"),
+    ("all solvers", "from nemo.solvers import *"),
+    ("import assignments.pa2", "import assignments.pa2"),
+    ("import assignments.run", "import assignments.run"),
+]
+# the code printing whether the viewer was imported
+_VIEWER_CHECK = "; import sys; print('polyscope' in sys.modules)"
+
+
+def _run(args: list[str]) -> tuple[float, str]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def _median_time(args: list[str], repeat: int) -> tuple[float, str]:
+    _run(args)  # warm up the file system caches
+    runs = [_run(args) for _ in range(repeat)]
+    return statistics.median(t for t, _ in runs), runs[-1][1]
+
+
+@app.command(help="Benchmark the import time of the package and the startup time of the command line")
+def main(
+    repeat: Annotated[int, typer.Option(help="Number of measurements per target")] = 5,
+    budget: Annotated[float, typer.Option(help="Maximal startup time of a headless command in seconds")] = 1.0,
+):
+    baseline, _ = _median_time(["-c", "pass"], repeat)
+    rprint(f"[bold green]Interpreter startup: {1e3 * baseline:.1f} ms (subtracted below)")
+
+    table = Table("target", "time (ms)", "viewer imported")
+    for label, code in TARGETS:
+        t, out = _median_time(["-c", code + _VIEWER_CHECK], repeat)
+        table.add_row(label, f"{1e3 * (t - baseline):.1f}", out.strip())
+    # a headless command without a simulation: parsing the command line and loading the modules
+    cli, _ = _median_time(["-m", "assignments.run", "headless", "--help"], repeat)
+    table.add_row("headless --help (total)", f"{1e3 * cli:.1f}", "")
+    rprint(table)
+
+    _, out = _run(["-c", "import assignments.run" + _VIEWER_CHECK])
+    if out.strip() != "False":
+        rprint("[bold red]The viewer is imported by the headless command")
+        raise typer.Exit(1)
+    if cli > budget:
+        rprint(f"[bold red]The headless command starts in {cli:.2f}s, more than the budget of {budget:.2f}s")
+        raise typer.Exit(1)
+    rprint(f"[bold green]The headless command starts in {cli:.2f}s (budget {budget:.2f}s)")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,100 @@
+"""Compare the speed and the accuracy of float32 and float64 simulations of a hanging cloth.
+
+Run with (from the repository root):
+
+    python benchmarks/precision.py --size 200 --steps 100
+
+For each explicit solver, the cloth is simulated in both precisions from the same initial state.
+The report lists the time per step, the memory of one state, and the deviation of the float32
+particle positions from the float64 ones after the last step.
+"""
+
+import time
+from typing import Annotated
+
+import numpy as np
+import typer
+from rich import print as rprint
+from rich.table import Table
+
+from nemo.sim import Model, ModelBuilder
+from nemo.sim.forces import eval_all_forces
+from nemo.solvers import ExplicitEulerSolver, MidpointSolver
+
+app = typer.Typer(add_completion=False)
+
+
+def build_cloth(size: int, dtype) -> Model:
+    builder = ModelBuilder()
+    builder.add_cloth_grid(
+        (0.0, 0.0, 2.0),
+        size,
+        size,
+        1.0 / size,
+        mass=1.0 / size**2,
+        ke=50.0,
+        kd=0.01,
+        shear_ke=10.0,
+        shear_kd=0.01,
+        fixed_rows=(0,),
+    )
+    return builder.finalize(dtype=dtype)
+
+
+def _time(fn, repeat: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def _simulate(solver, steps: int) -> tuple[np.ndarray, float]:
+    s0, s1 = solver.model.state(), solver.model.state()
+    start = time.perf_counter()
+    for _ in range(steps):
+        s0.clear_forces()
+        solver.step(s0, s1)
+        s0, s1 = s1, s0
+    return s0.particle_q, (time.perf_counter() - start) / steps
+
+
+@app.command(help="Benchmark float32 against float64 simulations of a hanging cloth")
+def main(
+    size: Annotated[int, typer.Option(help="Number of particles per side of the cloth")] = 200,
+    steps: Annotated[int, typer.Option(help="Number of simulated steps")] = 100,
+    dt: Annotated[float, typer.Option(help="Timestep size")] = 1e-4,
+):
+    models = {dtype: build_cloth(size, dtype) for dtype in (np.float64, np.float32)}
+    m64 = models[np.float64]
+    rprint(f"[bold green]Cloth of {m64.particle_count} particles and {m64.spring_count} springs, {steps} steps")
+
+    table = Table("", "float64", "float32", "speedup")
+    # force evaluation alone: bounded by the memory traffic of the particle and spring arrays
+    states = {dtype: model.state() for dtype, model in models.items()}
+    t = {dtype: _time(lambda d=dtype: eval_all_forces(models[d], states[d]), steps) for dtype in models}
+    speedup = t[np.float64] / t[np.float32]
+    table.add_row("forces (ms)", f"{1e3 * t[np.float64]:.2f}", f"{1e3 * t[np.float32]:.2f}", f"{speedup:.2f}x")
+    state_bytes = {dtype: s.buffer.nbytes for dtype, s in states.items()}
+    table.add_row("state (MB)", f"{state_bytes[np.float64] / 2**20:.1f}", f"{state_bytes[np.float32] / 2**20:.1f}", "")
+
+    # the cloth has a side length of one, so the deviations are relative to its size
+    errors = Table("solver", "max |Δq|", "rms |Δq|")
+    for solver_type in (ExplicitEulerSolver, MidpointSolver):
+        q, t = {}, {}
+        for dtype, model in models.items():
+            q[dtype], t[dtype] = _simulate(solver_type(model, dt), steps)
+        table.add_row(
+            f"{solver_type.__name__} step (ms)",
+            f"{1e3 * t[np.float64]:.2f}",
+            f"{1e3 * t[np.float32]:.2f}",
+            f"{t[np.float64] / t[np.float32]:.2f}x",
+        )
+        dq = np.linalg.norm(q[np.float32] - q[np.float64], axis=1)
+        errors.add_row(solver_type.__name__, f"{dq.max():.3e}", f"{np.sqrt(np.mean(dq**2)):.3e}")
+    rprint(table)
+    rprint(errors)
+
+
+if __name__ == "__main__":
+    app()
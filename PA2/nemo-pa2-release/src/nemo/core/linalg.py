@@ -0,0 +1,672 @@
+from collections.abc import Callable
+
+import numpy as np
+
+from .types import nparray
+
+
+def block_tridiagonal_solve(D: nparray, L: nparray, U: nparray, b: nparray) -> nparray:
+    """
+    Solve a block tridiagonal linear system by (vectorized) block cyclic reduction.
+
+    The system consists of n block rows, where the i-th row reads
+    ``L[i] @ x[i-1] + D[i] @ x[i] + U[i] @ x[i+1] = b[i]`` (``L[0]`` and ``U[n-1]`` are ignored).
+    See :class:`BlockTridiagonalFactorization`, which keeps the reduction to solve for several
+    right-hand sides.
+
+    Args:
+        D: nparray, shape (n, m, m): the diagonal blocks
+        L: nparray, shape (n, m, m): the sub-diagonal blocks
+        U: nparray, shape (n, m, m): the super-diagonal blocks
+        b: nparray, shape (n, m): the right-hand side
+
+    Returns:
+        nparray, shape (n, m): the solution
+    """
+    return BlockTridiagonalFactorization(D, L, U).solve(b)
+
+
+class BlockTridiagonalFactorization:
+    """A block cyclic reduction of a block tridiagonal matrix, computed once and reused for many right-hand sides.
+
+    The matrix consists of n block rows, where the i-th row reads
+    ``L[i] @ x[i-1] + D[i] @ x[i] + U[i] @ x[i+1]`` (``L[0]`` and ``U[n-1]`` are ignored).
+    Every reduction level eliminates the odd block rows at once with batched NumPy operations,
+    so the factorization costs O(n m^3) and a solve O(n m^2) for blocks of size m, both in
+    O(log n) vectorized passes. No pivoting is performed across blocks, which is stable for block
+    diagonally dominant or symmetric positive definite systems like the ones of implicit integrators
+    (mass matrix plus small stiffness terms).
+
+    Small matrices (up to :attr:`DENSE_SIZE` rows) are inverted instead: a single dense product
+    is faster than the reduction passes then.
+    """
+
+    DENSE_SIZE = 512
+    """Maximal number of rows of the matrices that are inverted densely."""
+
+    def __init__(self, D: nparray, L: nparray, U: nparray):
+        """
+        Args:
+            D: nparray, shape (n, m, m): the diagonal blocks
+            L: nparray, shape (n, m, m): the sub-diagonal blocks
+            U: nparray, shape (n, m, m): the super-diagonal blocks
+        """
+        n, m = D.shape[:2]
+        self.n = n
+        """Number of block rows."""
+        self.m = m
+        """Size of the blocks."""
+        self._dense_inv = None
+        if n * m <= self.DENSE_SIZE:
+            A = np.zeros((n, m, n, m))
+            rows = np.arange(n)
+            A[rows, :, rows, :] = D
+            A[rows[1:], :, rows[:-1], :] = L[1:]
+            A[rows[:-1], :, rows[1:], :] = U[:-1]
+            self._dense_inv = np.linalg.inv(A.reshape(n * m, n * m))
+            return
+        # per reduction level: (row count, inverse odd diagonals, odd neighbors of the even rows,
+        # L_e D_o^-1, U_e D_o^-1, odd sub-diagonals, odd super-diagonals)
+        self._levels = []
+        while n > 1:
+            L = L.copy()
+            U = U.copy()
+            L[0] = 0.0
+            U[-1] = 0.0
+            if n % 2 == 1:
+                # pad with a decoupled identity row, so that every even row has two odd neighbors
+                zero = np.zeros((1, m, m))
+                D = np.concatenate([D, np.eye(m)[None]])
+                L = np.concatenate([L, zero])
+                U = np.concatenate([U, zero])
+            Do_inv = np.linalg.inv(D[1::2])
+            # the odd neighbors (e-1, e+1) of the even rows e; for e = 0, the wrapped neighbor is multiplied by L[0] = 0
+            prev = np.roll(np.arange(len(Do_inv)), 1)
+            Le_Dinv = L[0::2] @ Do_inv[prev]
+            Ue_Dinv = U[0::2] @ Do_inv
+            Lo, Uo = L[1::2], U[1::2]
+            self._levels.append((n, Do_inv, prev, Le_Dinv, Ue_Dinv, Lo, Uo))
+            D = D[0::2] - Le_Dinv @ Uo[prev] - Ue_Dinv @ Lo
+            L = -Le_Dinv @ Lo[prev]
+            U = -Ue_Dinv @ Uo
+            n = len(D)
+        self._root_inv = np.linalg.inv(D[0])
+
+    def solve(self, b: nparray) -> nparray:
+        """
+        Solve the system for one or several right-hand sides.
+
+        Args:
+            b: nparray, shape (n, m) or (n, m, k): the right-hand side(s)
+
+        Returns:
+            nparray of the shape of `b`: the solution(s)
+        """
+        b = np.asarray(b, dtype=np.float64)
+        if self._dense_inv is not None:
+            return (self._dense_inv @ b.reshape(self.n * self.m, -1)).reshape(b.shape)
+        single = b.ndim == 2
+        if single:
+            b = b[..., None]
+        m, k = self.m, b.shape[2]
+        odd_rhs = []
+        for n, _, prev, Le_Dinv, Ue_Dinv, _, _ in self._levels:
+            if n % 2 == 1:
+                b = np.concatenate([b, np.zeros((1, m, k))])
+            bo = b[1::2]
+            odd_rhs.append(bo)
+            b = b[0::2] - Le_Dinv @ bo[prev] - Ue_Dinv @ bo
+        x = (self._root_inv @ b[0])[None]
+
+        # back substitution of the odd rows
+        for (n, Do_inv, _, _, _, Lo, Uo), bo in zip(reversed(self._levels), reversed(odd_rhs), strict=True):
+            no = len(Do_inv)
+            x_next = np.concatenate([x[1:], np.zeros((1, m, k))])[:no]
+            xo = Do_inv @ (bo - Lo @ x[:no] - Uo @ x_next)
+            xe = x
+            x = np.empty((len(xe) + no, m, k))
+            x[0::2] = xe
+            x[1::2] = xo
+            x = x[:n]
+        return x[..., 0] if single else x
+
+
+def banded_to_block_tridiagonal(
+    rows: nparray, cols: nparray, values: nparray, size: int, block_size: int
+) -> tuple[nparray, nparray, nparray]:
+    """
+    Regroup a (scalar) banded matrix given by its entries into a block tridiagonal matrix.
+
+    The rows are grouped into blocks of `block_size` rows, so the matrix must have a bandwidth of
+    at most `block_size`. The last block is padded with decoupled identity rows.
+
+    Args:
+        rows: nparray, shape (k,), int: the rows of the entries
+        cols: nparray, shape (k,), int: the columns of the entries
+        values: nparray, shape (k,): the values of the entries (repeated entries are summed up)
+        size: the number of rows (and columns) of the matrix
+        block_size: the size of the blocks
+
+    Returns:
+        tuple[nparray, nparray, nparray]: the diagonal, sub-diagonal and super-diagonal blocks (D, L, U),
+        each of shape (ceil(size / block_size), block_size, block_size)
+    """
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    if len(rows) and np.abs(rows - cols).max() > block_size:
+        raise RuntimeError(f"Entry is outside of the band (bandwidth = {block_size})")
+    m = block_size
+    nb = -(-size // m)
+    S = np.zeros((nb, 3, m, m))
+    np.add.at(S, (rows // m, cols // m - rows // m + 1, rows % m, cols % m), values)
+    pad = np.arange(size, nb * m)
+    S[pad // m, 1, pad % m, pad % m] = 1.0
+    return S[:, 1], S[:, 0], S[:, 2]
+
+
+class BlockBandedMatrix:
+    """A square matrix of 3x3 blocks with a limited block bandwidth.
+
+    Block (i, j) can be non-zero only if ``|i - j| <= bandwidth``. The blocks are stored in
+    :attr:`data` of shape (n, 2 * bandwidth + 1, 3, 3), where ``data[i, k]`` is the block
+    (i, i + k - bandwidth). This is the structure of the implicit system matrices of chains,
+    ropes, and (after a bandwidth-reducing reordering) cloth, with one block per particle.
+    """
+
+    def __init__(self, n: int, bandwidth: int):
+        """
+        Create a zero matrix.
+
+        Args:
+            n: the number of block rows (and columns)
+            bandwidth: the block bandwidth
+        """
+        self.n = n
+        """Number of block rows (and columns)."""
+        self.bandwidth = max(int(bandwidth), 0)
+        """Block bandwidth."""
+        self.data = np.zeros((n, 2 * self.bandwidth + 1, 3, 3))
+        """The blocks in the band, shape (n, 2 * bandwidth + 1, 3, 3)."""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (3 * self.n, 3 * self.n)
+
+    def copy(self) -> "BlockBandedMatrix":
+        A = BlockBandedMatrix(self.n, self.bandwidth)
+        A.data[:] = self.data
+        return A
+
+    def add_blocks(self, rows: nparray, cols: nparray, blocks: nparray) -> None:
+        """
+        Accumulate 3x3 blocks into the matrix (repeated (row, col) entries are summed up).
+
+        Args:
+            rows: nparray, shape (k,), int: the block rows
+            cols: nparray, shape (k,), int: the block columns
+            blocks: nparray, shape (k, 3, 3): the blocks
+        """
+        offsets = np.asarray(cols) - np.asarray(rows) + self.bandwidth
+        if len(offsets) and (offsets.min() < 0 or offsets.max() > 2 * self.bandwidth):
+            raise RuntimeError(f"Block is outside of the band (bandwidth = {self.bandwidth})")
+        np.add.at(self.data, (rows, offsets), blocks)
+
+    def add_diagonal(self, values: nparray) -> None:
+        """
+        Add values to the (scalar) diagonal of the matrix.
+
+        Args:
+            values: nparray, shape (3n,): the values to add
+        """
+        values = np.asarray(values).reshape(self.n, 3)
+        d = np.arange(3)
+        self.data[:, self.bandwidth, d, d] += values
+
+    def fix_blocks(self, idx: nparray) -> None:
+        """
+        Zero out the block rows and columns of the given indices and set their diagonal blocks to identity.
+
+        This is used to pin degrees of freedom, e.g., of fixed particles.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        bw = self.bandwidth
+        self.data[idx] = 0.0
+        for k in range(2 * bw + 1):
+            rows = idx - (k - bw)
+            valid = (rows >= 0) & (rows < self.n)
+            self.data[rows[valid], k] = 0.0
+        self.data[idx, bw] = np.eye(3)
+
+    def to_dense(self) -> nparray:
+        A = np.zeros(self.shape)
+        A4 = A.reshape(self.n, 3, self.n, 3)
+        for k in range(2 * self.bandwidth + 1):
+            rows = np.arange(max(0, self.bandwidth - k), min(self.n, self.n + self.bandwidth - k))
+            A4[rows, :, rows + k - self.bandwidth, :] = self.data[rows, k]
+        return A
+
+    def matvec(self, x: nparray) -> nparray:
+        """Compute the matrix-vector product A @ x for x of shape (3n,)."""
+        x = np.asarray(x).reshape(self.n, 3)
+        bw = self.bandwidth
+        xp = np.concatenate([np.zeros((bw, 3)), x, np.zeros((bw, 3))])
+        # windows[i, k] = x[i + k - bw]
+        windows = np.lib.stride_tricks.sliding_window_view(xp, (2 * bw + 1, 3))[:, 0]
+        return np.einsum("ikab,ikb->ia", self.data, windows).reshape(-1)
+
+    def solve(self, b: nparray) -> nparray:
+        """
+        Solve A x = b in O(n * bandwidth^2) operations.
+
+        The matrix is regrouped into a block tridiagonal matrix with super-blocks of
+        3 * bandwidth rows, which is solved by :func:`block_tridiagonal_solve`.
+
+        Args:
+            b: nparray, shape (3n,): the right-hand side
+
+        Returns:
+            nparray, shape (3n,): the solution
+        """
+        n, bw = self.n, max(self.bandwidth, 1)
+        nb = -(-n // bw)  # number of super-blocks
+        npad = nb * bw
+        # super-block s covers blocks [s * bw, (s + 1) * bw); S[s, t] is the coupling with super-block s + t - 1
+        S = np.zeros((nb, 3, bw, bw, 3, 3))
+        i = np.repeat(np.arange(n), 2 * self.bandwidth + 1)
+        k = np.tile(np.arange(2 * self.bandwidth + 1), n)
+        j = i + k - self.bandwidth
+        valid = (j >= 0) & (j < n)
+        i, j, k = i[valid], j[valid], k[valid]
+        S[i // bw, j // bw - i // bw + 1, i % bw, j % bw] = self.data[i, k]
+        # padding blocks are decoupled identity rows
+        pad = np.arange(n, npad)
+        S[pad // bw, 1, pad % bw, pad % bw] = np.eye(3)
+        S = S.transpose(0, 1, 2, 4, 3, 5).reshape(nb, 3, 3 * bw, 3 * bw)
+        rhs = np.zeros(3 * npad)
+        rhs[: 3 * n] = b
+        x = block_tridiagonal_solve(S[:, 1], S[:, 0], S[:, 2], rhs.reshape(nb, 3 * bw))
+        return x.reshape(-1)[: 3 * n]
+
+
+def _ragged_arange(counts: nparray) -> tuple[nparray, nparray]:
+    """For ranges of the given lengths, return the range of each element and its position within the range."""
+    counts = np.asarray(counts, dtype=np.int64)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, np.arange(int(counts.sum())) - starts[owner]
+
+
+class BlockDiagonalMatrix:
+    """A square matrix of 3x3 blocks whose block rows are partitioned into independent groups.
+
+    Block (i, j) can be non-zero only if the block rows i and j belong to the same group, e.g.,
+    the particles of one connected component of a model. After grouping the rows, the matrix is
+    block diagonal with one dense (3 * n_g, 3 * n_g) block per group of n_g rows; these blocks are
+    stored one after another in the flat array :attr:`data`. Solving costs the sum of O(n_g³) over
+    the groups, instead of O(n³) for the whole matrix.
+    """
+
+    def __init__(self, group: nparray, pinned: nparray | None = None):
+        """
+        Create a zero matrix.
+
+        Args:
+            group: nparray, shape (n,), int: the group (in [0, group_count)) of each block row
+            pinned: optionally, the block rows that will be pinned by :meth:`fix_blocks`. Blocks
+                coupling a pinned row (or column) to another group are dropped, since they are zeroed anyway.
+        """
+        group = np.asarray(group, dtype=np.int64)
+        self.n = len(group)
+        """Number of block rows (and columns)."""
+        self.pinned = np.zeros(self.n, dtype=bool)
+        """Whether each block row will be pinned, shape (n,)."""
+        if pinned is not None:
+            self.pinned[pinned] = True
+        self.group = group
+        """Group of each block row, shape (n,)."""
+        self.order = np.argsort(group, kind="stable")
+        """Block rows sorted by group, shape (n,)."""
+        sizes = np.bincount(group) if self.n else np.zeros(0, dtype=np.int64)
+        self.sizes = sizes
+        """Number of block rows of each group."""
+        starts = np.cumsum(sizes) - sizes
+        self.local = np.empty(self.n, dtype=np.int64)
+        """Index of each block row within its group."""
+        self.local[self.order] = np.arange(self.n) - starts[group[self.order]]
+        dense = (3 * sizes) ** 2
+        self.offsets = np.cumsum(dense) - dense
+        """Offset of the dense block of each group in :attr:`data`."""
+        self.data = np.zeros(int(dense.sum()))
+        """The dense blocks of all groups, flattened."""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (3 * self.n, 3 * self.n)
+
+    def copy(self) -> "BlockDiagonalMatrix":
+        A = BlockDiagonalMatrix.__new__(BlockDiagonalMatrix)
+        A.__dict__.update(self.__dict__)
+        A.data = self.data.copy()
+        return A
+
+    def _flat_index(self, rows: nparray, cols: nparray) -> nparray:
+        """Flat indices in :attr:`data` of the 3x3 blocks (rows, cols), shape (k, 3, 3)."""
+        g = self.group[rows]
+        m = 3 * self.sizes[g]
+        r = 3 * self.local[rows][:, None] + np.arange(3)
+        c = 3 * self.local[cols][:, None] + np.arange(3)
+        return (self.offsets[g][:, None] + r * m[:, None])[:, :, None] + c[:, None, :]
+
+    def add_blocks(self, rows: nparray, cols: nparray, blocks: nparray) -> None:
+        """
+        Accumulate 3x3 blocks into the matrix (repeated (row, col) entries are summed up).
+
+        Args:
+            rows: nparray, shape (k,), int: the block rows
+            cols: nparray, shape (k,), int: the block columns
+            blocks: nparray, shape (k, 3, 3): the blocks
+        """
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+        inside = self.group[rows] == self.group[cols]
+        if not np.all(inside):
+            if not np.all(inside | self.pinned[rows] | self.pinned[cols]):
+                raise RuntimeError("Block couples two different groups")
+            rows, cols, blocks = rows[inside], cols[inside], blocks[inside]
+        np.add.at(self.data, self._flat_index(rows, cols), blocks)
+
+    def add_diagonal(self, values: nparray) -> None:
+        """
+        Add values to the (scalar) diagonal of the matrix.
+
+        Args:
+            values: nparray, shape (3n,): the values to add
+        """
+        values = np.asarray(values).reshape(self.n, 3)
+        idx = self._flat_index(np.arange(self.n), np.arange(self.n))
+        d = np.arange(3)
+        self.data[idx[:, d, d]] += values
+
+    def fix_blocks(self, idx: nparray) -> None:
+        """
+        Zero out the block rows and columns of the given indices and set their diagonal blocks to identity.
+
+        This is used to pin degrees of freedom, e.g., of fixed particles.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(idx) == 0:
+            return
+        g = self.group[idx]
+        m = 3 * self.sizes[g]
+        # the 3 rows and 3 columns of each fixed block row, each of length m
+        owner, k = _ragged_arange(np.repeat(m, 3))
+        fixed_row = 3 * self.local[idx] + np.arange(3)[:, None]
+        fixed_row = fixed_row.T.reshape(-1)[owner]
+        off, mm = np.repeat(self.offsets[g], 3)[owner], np.repeat(m, 3)[owner]
+        self.data[off + fixed_row * mm + k] = 0.0
+        self.data[off + k * mm + fixed_row] = 0.0
+        diag = self._flat_index(idx, idx)
+        self.data[diag] = np.eye(3)
+
+    def _group_dofs(self, groups: nparray) -> nparray:
+        """The degrees of freedom of groups of equal size s, shape (len(groups), 3 * s)."""
+        starts = np.cumsum(self.sizes) - self.sizes
+        rows = self.order[starts[groups][:, None] + np.arange(self.sizes[groups[0]])]
+        return (3 * rows[:, :, None] + np.arange(3)).reshape(len(groups), -1)
+
+    def _group_blocks(self, groups: nparray) -> nparray:
+        """The dense blocks of groups of equal size s, shape (len(groups), 3 * s, 3 * s)."""
+        m = 3 * self.sizes[groups[0]]
+        return self.data[self.offsets[groups][:, None] + np.arange(m * m)].reshape(len(groups), m, m)
+
+    def _size_classes(self) -> list[nparray]:
+        """The non-empty groups, batched by their sizes."""
+        groups = np.nonzero(self.sizes)[0]
+        sizes = self.sizes[groups]
+        return [groups[sizes == s] for s in np.unique(sizes)]
+
+    def to_dense(self) -> nparray:
+        A = np.zeros(self.shape)
+        for groups in self._size_classes():
+            dofs = self._group_dofs(groups)
+            A[dofs[:, :, None], dofs[:, None, :]] = self._group_blocks(groups)
+        return A
+
+    def matvec(self, x: nparray) -> nparray:
+        """Compute the matrix-vector product A @ x for x of shape (3n,)."""
+        x = np.asarray(x)
+        y = np.zeros(3 * self.n)
+        for groups in self._size_classes():
+            dofs = self._group_dofs(groups)
+            y[dofs] = (self._group_blocks(groups) @ x[dofs][..., None])[..., 0]
+        return y
+
+    def solve(self, b: nparray, parallel: Callable[[Callable[[slice], None], int], None] | None = None) -> nparray:
+        """
+        Solve A x = b group by group, batching the groups of equal sizes.
+
+        Args:
+            b: nparray, shape (3n,): the right-hand side
+            parallel: optionally, a function ``parallel(fn, count)`` that calls ``fn`` on slices covering
+                ``range(count)`` (e.g., in multiple threads); the groups of each size are split into these slices
+
+        Returns:
+            nparray, shape (3n,): the solution
+        """
+        b = np.asarray(b)
+        x = np.zeros(3 * self.n)
+        for groups in self._size_classes():
+            dofs = self._group_dofs(groups)
+            blocks = self._group_blocks(groups)
+            rhs = b[dofs]
+
+            def solve_batch(chunk: slice, dofs=dofs, blocks=blocks, rhs=rhs):
+                x[dofs[chunk]] = np.linalg.solve(blocks[chunk], rhs[chunk][..., None])[..., 0]
+
+            if parallel is None:
+                solve_batch(slice(None))
+            else:
+                parallel(solve_batch, len(groups))
+        return x
+
+
+def gmres(
+    matvec: Callable[[nparray], nparray],
+    b: nparray,
+    x0: nparray | None = None,
+    tol: float = 1e-6,
+    restart: int = 50,
+    maxiter: int = 200,
+) -> tuple[nparray, int]:
+    """
+    Solve A x = b by restarted GMRES, where A is only given by its products with vectors.
+
+    The iterations stop when the residual ‖b - A x‖ drops below ``tol * ‖b‖``, or after
+    ``maxiter`` products. The Krylov basis is orthogonalized by classical Gram-Schmidt with one
+    reorthogonalization (two matrix products per iteration instead of a loop over the basis).
+
+    Args:
+        matvec: the product x -> A @ x for x of shape (n,)
+        b: nparray, shape (n,): the right-hand side
+        x0: nparray, shape (n,): the initial guess (zero by default)
+        tol: the relative tolerance of the residual
+        restart: the number of iterations between restarts (the size of the Krylov basis)
+        maxiter: the maximal number of iterations
+
+    Returns:
+        tuple[nparray, int]: the solution, shape (n,), and the number of iterations
+    """
+    x = np.zeros_like(b, dtype=np.float64) if x0 is None else np.array(x0, dtype=np.float64)
+    bnorm = np.linalg.norm(b)
+    if bnorm == 0:
+        return np.zeros_like(x), 0
+    iterations = 0
+    while iterations < maxiter:
+        r = b - matvec(x)
+        beta = np.linalg.norm(r)
+        if beta <= tol * bnorm:
+            break
+        m = min(restart, maxiter - iterations)
+        V = np.zeros((m + 1, len(b)))
+        H = np.zeros((m + 1, m))
+        cs, sn = np.zeros(m), np.zeros(m)
+        g = np.zeros(m + 1)
+        g[0] = beta
+        V[0] = r / beta
+        converged = False
+        for k in range(m):
+            w = matvec(V[k])
+            iterations += 1
+            h = V[: k + 1] @ w
+            w -= h @ V[: k + 1]
+            h2 = V[: k + 1] @ w
+            w -= h2 @ V[: k + 1]
+            H[: k + 1, k] = h + h2
+            H[k + 1, k] = np.linalg.norm(w)
+            # apply the previous Givens rotations to the new column, then eliminate H[k + 1, k]
+            for i in range(k):
+                H[i, k], H[i + 1, k] = cs[i] * H[i, k] + sn[i] * H[i + 1, k], cs[i] * H[i + 1, k] - sn[i] * H[i, k]
+            if H[k + 1, k] > 0:
+                V[k + 1] = w / H[k + 1, k]
+            denom = np.hypot(H[k, k], H[k + 1, k])
+            cs[k], sn[k] = (H[k, k] / denom, H[k + 1, k] / denom) if denom > 0 else (1.0, 0.0)
+            H[k, k], H[k + 1, k] = denom, 0.0
+            g[k + 1] = -sn[k] * g[k]
+            g[k] *= cs[k]
+            # the residual of the least-squares problem is the residual of the linear system
+            converged = abs(g[k + 1]) <= tol * bnorm or sn[k] == 0
+            if converged:
+                break
+        y = np.linalg.solve(H[: k + 1, : k + 1], g[: k + 1])
+        x += y @ V[: k + 1]
+        if converged:
+            break
+    return x, iterations
+
+
+def conjugate_gradient(
+    matvec: Callable[[nparray], nparray],
+    b: nparray,
+    x0: nparray | None = None,
+    tol: float = 1e-6,
+    maxiter: int = 200,
+) -> tuple[nparray, int]:
+    """
+    Solve A x = b by the conjugate gradient method, where the symmetric positive definite matrix
+    A is only given by its products with vectors.
+
+    The iterations stop when the residual ‖b - A x‖ drops below ``tol * ‖b‖``, or after
+    ``maxiter`` iterations. A search direction p with p·Ap ≤ 0 shows that A isn't positive definite,
+    in which case the method would diverge: it raises an error instead.
+
+    Args:
+        matvec: the product x -> A @ x for x of shape (n,)
+        b: nparray, shape (n,): the right-hand side
+        x0: nparray, shape (n,): the initial guess (zero by default)
+        tol: the relative tolerance of the residual
+        maxiter: the maximal number of iterations
+
+    Returns:
+        tuple[nparray, int]: the solution, shape (n,), and the number of iterations
+
+    Raises:
+        RuntimeError: if A isn't positive definite along a search direction
+    """
+    x = np.zeros_like(b, dtype=np.float64) if x0 is None else np.array(x0, dtype=np.float64)
+    bnorm = np.linalg.norm(b)
+    if bnorm == 0:
+        return np.zeros_like(x), 0
+    r = b - matvec(x) if x0 is not None else np.array(b, dtype=np.float64)
+    p = r.copy()
+    rr = r @ r
+    iterations = 0
+    while iterations < maxiter and np.sqrt(rr) > tol * bnorm:
+        Ap = matvec(p)
+        iterations += 1
+        pAp = p @ Ap
+        if not pAp > 0:
+            raise RuntimeError(f"Conjugate gradients broke down after {iterations} iterations (p·Ap = {pAp:g})")
+        alpha = rr / pAp
+        x += alpha * p
+        r -= alpha * Ap
+        rr, rr_old = r @ r, rr
+        p *= rr / rr_old
+        p += r
+    return x, iterations
+
+
+def expm(A: nparray) -> nparray:
+    """
+    The matrix exponential of a (small) square matrix, by scaling and squaring with a [6/6] Padé approximant.
+
+    The matrix is scaled by 2^-s such that its 1-norm is at most 1/2, where the Padé approximant
+    is accurate to machine precision, and the result is squared s times.
+
+    Args:
+        A: nparray, shape (n, n): the matrix
+
+    Returns:
+        nparray, shape (n, n): exp(A)
+    """
+    A = np.asarray(A, dtype=np.float64)
+    norm = np.linalg.norm(A, 1)
+    s = max(0, int(np.ceil(np.log2(norm / 0.5)))) if norm > 0 else 0
+    A = A / 2.0**s
+    # coefficients of the [6/6] Padé approximant: c_k = c_(k-1)·(p - k + 1) / (k·(2p - k + 1))
+    p = 6
+    c = [1.0]
+    for k in range(1, p + 1):
+        c.append(c[-1] * (p - k + 1) / (k * (2 * p - k + 1)))
+    power = np.eye(len(A))
+    N = c[0] * power
+    D = c[0] * power
+    for k in range(1, p + 1):
+        power = power @ A
+        N += c[k] * power
+        D += (-1) ** k * c[k] * power
+    X = np.linalg.solve(D, N)
+    for _ in range(s):
+        X = X @ X
+    return X
+
+
+def expm_multiply(
+    matvec: Callable[[nparray], nparray], b: nparray, tol: float = 1e-8, maxiter: int = 30
+) -> tuple[nparray, float]:
+    """
+    Approximate exp(A)·b in the Krylov subspace of A and b, where A is only given by its products with vectors.
+
+    The Arnoldi process builds an orthonormal basis V of the Krylov subspace and the projection H of A
+    on it, and exp(A)·b ≈ ‖b‖·V·exp(H)·e₁, where exp(H) is computed by :func:`expm`. The subspace
+    grows until the a-posteriori error estimate ‖b‖·h_(m+1,m)·|e_mᵀ·exp(H)·e₁| drops below
+    ``tol * ‖exp(A)·b‖``, or up to ``maxiter`` vectors. The number of products needed grows with
+    the norm of A, so it is small for short times (or slow dynamics).
+
+    Args:
+        matvec: the product x -> A @ x for x of shape (n,)
+        b: nparray, shape (n,): the vector
+        tol: the relative tolerance
+        maxiter: the maximal dimension of the Krylov subspace
+
+    Returns:
+        tuple[nparray, float]: exp(A)·b, shape (n,), and the estimate of its (absolute) error
+    """
+    beta = np.linalg.norm(b)
+    if beta == 0:
+        return np.zeros_like(b, dtype=np.float64), 0.0
+    V = np.zeros((maxiter + 1, len(b)))
+    H = np.zeros((maxiter + 1, maxiter))
+    V[0] = b / beta
+    for k in range(maxiter):
+        w = matvec(V[k])
+        h = V[: k + 1] @ w
+        w -= h @ V[: k + 1]
+        h2 = V[: k + 1] @ w
+        w -= h2 @ V[: k + 1]
+        H[: k + 1, k] = h + h2
+        H[k + 1, k] = np.linalg.norm(w)
+        E = expm(H[: k + 1, : k + 1])[:, 0]
+        error = beta * H[k + 1, k] * abs(E[k])
+        x = beta * (E @ V[: k + 1])
+        if error <= tol * np.linalg.norm(x) or H[k + 1, k] <= 1e-14 * beta:
+            break
+        V[k + 1] = w / H[k + 1, k]
+    return x, error
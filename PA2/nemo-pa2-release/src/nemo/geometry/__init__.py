@@ -1,3 +1,5 @@
+from .bvh import BVH, morton_codes
+from .hash_grid import HashGrid
 from .types import ParticleFlags
 
-__all__ = ["ParticleFlags"]
+__all__ = ["BVH", "HashGrid", "ParticleFlags", "morton_codes"]
@@ -0,0 +1,124 @@
+import numpy as np
+
+from ..core.types import nparray
+
+
+def _expand_bits(v: nparray) -> nparray:
+    """Spread the lower 10 bits of v so that there are two zero bits between any two bits."""
+    v = v.astype(np.uint32)
+    v = (v * np.uint32(0x00010001)) & np.uint32(0xFF0000FF)
+    v = (v * np.uint32(0x00000101)) & np.uint32(0x0F00F00F)
+    v = (v * np.uint32(0x00000011)) & np.uint32(0xC30C30C3)
+    v = (v * np.uint32(0x00000005)) & np.uint32(0x49249249)
+    return v
+
+
+def morton_codes(points: nparray) -> nparray:
+    """
+    Compute 30-bit Morton codes (Z-order curve indices) of the given points.
+
+    The points are quantized on a 1024^3 grid spanning their bounding box.
+
+    Args:
+        points: nparray, shape (point_count, 3)
+
+    Returns:
+        nparray, shape (point_count,), uint32: the Morton code of each point
+    """
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    lo = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lo, 1e-12)
+    g = np.clip(((points - lo) / extent * 1023.0).astype(np.int64), 0, 1023)
+    return (_expand_bits(g[:, 0]) << np.uint32(2)) | (_expand_bits(g[:, 1]) << np.uint32(1)) | _expand_bits(g[:, 2])
+
+
+class BVH:
+    """A bounding volume hierarchy of axis-aligned bounding boxes (AABBs).
+
+    The hierarchy is a complete binary tree whose leaves are the primitives sorted along a
+    Morton curve at construction time. The tree topology is then kept fixed, and only the
+    node bounds are updated by :meth:`refit` (e.g., at every timestep as the primitives move).
+    Both the refit and the queries process one tree level at a time with whole-array NumPy
+    operations: the refit costs O(primitive_count), and the query costs O(log(primitive_count))
+    vectorized passes whose size is proportional to the number of overlapping node pairs.
+    """
+
+    def __init__(self, lower: nparray, upper: nparray):
+        """
+        Build the hierarchy from the bounds of the primitives.
+
+        Args:
+            lower: nparray, shape (primitive_count, 3): the lower corners of the primitive bounds
+            upper: nparray, shape (primitive_count, 3): the upper corners of the primitive bounds
+        """
+        n = len(lower)
+        self.primitive_count = n
+        """Number of primitives in the hierarchy."""
+        self.depth = max(int(np.ceil(np.log2(max(n, 1)))), 0)
+        """Number of levels below the root; the leaves are at level :attr:`depth`."""
+        leaf_count = 1 << self.depth
+        order = np.argsort(morton_codes(0.5 * (lower + upper)), kind="stable")
+        self.leaf_primitive = np.full(leaf_count, -1, dtype=np.int64)
+        """Primitive index of each leaf (-1 for padding leaves), shape [2**depth], int."""
+        self.leaf_primitive[:n] = order
+        self.node_lower: list[nparray] = []
+        """Lower corners of the node bounds, one array of shape (2**level, 3) per level."""
+        self.node_upper: list[nparray] = []
+        """Upper corners of the node bounds, one array of shape (2**level, 3) per level."""
+        self.refit(lower, upper)
+
+    def refit(self, lower: nparray, upper: nparray) -> None:
+        """
+        Update the node bounds from the new primitive bounds, keeping the tree topology.
+
+        Args:
+            lower: nparray, shape (primitive_count, 3): the lower corners of the primitive bounds
+            upper: nparray, shape (primitive_count, 3): the upper corners of the primitive bounds
+        """
+        if len(lower) != self.primitive_count:
+            raise RuntimeError(f"Expected bounds of {self.primitive_count} primitives, got {len(lower)}")
+        valid = self.leaf_primitive >= 0
+        lo = np.full((len(self.leaf_primitive), 3), np.inf)
+        hi = np.full((len(self.leaf_primitive), 3), -np.inf)
+        lo[valid] = lower[self.leaf_primitive[valid]]
+        hi[valid] = upper[self.leaf_primitive[valid]]
+        self.node_lower = [lo]
+        self.node_upper = [hi]
+        for _ in range(self.depth):
+            lo = np.minimum(lo[0::2], lo[1::2])
+            hi = np.maximum(hi[0::2], hi[1::2])
+            self.node_lower.append(lo)
+            self.node_upper.append(hi)
+        self.node_lower.reverse()
+        self.node_upper.reverse()
+
+    def query_self_pairs(self) -> tuple[nparray, nparray]:
+        """
+        Find all pairs of distinct primitives with overlapping bounds.
+
+        Returns:
+            tuple[nparray, nparray]: the primitive indices (a, b) of the overlapping pairs,
+            each unordered pair is reported once.
+        """
+        a = np.zeros(1, dtype=np.int64)
+        b = np.zeros(1, dtype=np.int64)
+        for level in range(1, self.depth + 1):
+            same = a == b
+            # children of a node paired with itself: (l, l), (l, r), (r, r)
+            sa, sb = a[same], b[same]
+            ca = [2 * sa, 2 * sa, 2 * sa + 1]
+            cb = [2 * sb, 2 * sb + 1, 2 * sb + 1]
+            # children of two different nodes: all four combinations
+            da, db = a[~same], b[~same]
+            for i in (0, 1):
+                for j in (0, 1):
+                    ca.append(2 * da + i)
+                    cb.append(2 * db + j)
+            a = np.concatenate(ca)
+            b = np.concatenate(cb)
+            lo, hi = self.node_lower[level], self.node_upper[level]
+            overlap = np.all((lo[a] <= hi[b]) & (lo[b] <= hi[a]), axis=1)
+            a, b = a[overlap], b[overlap]
+        keep = a != b
+        return self.leaf_primitive[a[keep]], self.leaf_primitive[b[keep]]
@@ -0,0 +1,124 @@
+import numpy as np
+
+from ..core.types import nparray
+
+# neighbor cell offsets of a half shell (the cell itself + 13 "forward" neighbors),
+# so that every pair of neighboring cells is visited exactly once
+_HALF_SHELL = np.array(
+    [(0, 0, 0)] + [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) > (0, 0, 0)],
+    dtype=np.int64,
+)
+
+# large primes used to hash cell coordinates when the grid is too large to be indexed linearly
+_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+
+class HashGrid:
+    """A uniform grid for finding pairs of nearby points.
+
+    The grid is rebuilt from scratch in :meth:`build`, unless the points didn't change since the last
+    build: the forces, the force jacobians and the diagnostics of a state then share one grid and
+    one set of candidate pairs (the check costs O(N), much less than a rebuild). All points
+    are binned into cubic cells of size ``cell_size``; the cell keys are sorted so that the
+    points in a cell occupy a contiguous range of :attr:`sorted_index`, and the ranges of
+    neighboring cells are found by binary search. Everything is done with whole-array NumPy
+    operations, so the cost is O(N log N) in the number of points plus O(P) in the number of
+    candidate pairs.
+    """
+
+    def __init__(self, cell_size: float = 1.0):
+        self.cell_size = cell_size
+        """Edge length of the grid cells."""
+        self.sorted_keys: nparray | None = None
+        """Cell keys of all points in ascending order, shape [point_count], int64."""
+        self.sorted_index: nparray | None = None
+        """Point indices ordered by their cell keys, shape [point_count], int."""
+        self.cells: nparray | None = None
+        """Integer cell coordinates of all points, shape [point_count, 3], int64."""
+        self._dims: nparray | None = None
+        # the points of the last build, and its candidate pairs once queried
+        self._points: nparray | None = None
+        self._pairs: tuple[nparray, nparray] | None = None
+
+    def build(self, points: nparray, cell_size: float | None = None) -> None:
+        """
+        Bin the given points into the grid.
+
+        Args:
+            points: nparray, shape (point_count, 3): the point positions
+            cell_size: if not None, replaces :attr:`cell_size`
+        """
+        if cell_size is not None and cell_size != self.cell_size:
+            self.cell_size = cell_size
+            self._points = None
+        if self.cell_size <= 0:
+            raise RuntimeError(f"Grid cell size ({self.cell_size}) must be positive")
+        if self._points is not None and np.array_equal(points, self._points):
+            return
+        self._points = np.array(points)
+        self._pairs = None
+
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        if len(cells) > 0:
+            # shift the cells so that all (neighboring) cell coordinates are positive
+            cells -= cells.min(axis=0) - 1
+            dims = cells.max(axis=0) + 2
+            # fall back to hashing if the linear index doesn't fit into int64
+            self._dims = dims if float(np.prod(dims.astype(np.float64))) < 2.0**62 else None
+        self.cells = cells
+        keys = self._encode(cells)
+        self.sorted_index = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.sorted_index]
+
+    def query_pairs(self) -> tuple[nparray, nparray]:
+        """
+        Find all pairs of points lying in the same or in adjacent cells.
+
+        Each unordered pair is reported once. Points closer than :attr:`cell_size` to each
+        other are guaranteed to be reported; the caller is responsible for filtering the
+        candidates by their actual distances. The pairs are computed once per build.
+
+        Returns:
+            tuple[nparray, nparray]: the indices (i, j) of the candidate pairs (not to be modified)
+        """
+        if self.cells is None:
+            raise RuntimeError("HashGrid.build must be called before querying")
+        if self._pairs is None:
+            self._pairs = self._find_pairs()
+        return self._pairs
+
+    def _find_pairs(self) -> tuple[nparray, nparray]:
+        n = len(self.cells)
+        idx = np.arange(n)
+        pi, pj = [], []
+        for k, offset in enumerate(_HALF_SHELL):
+            keys = self._encode(self.cells + offset)
+            lo = np.searchsorted(self.sorted_keys, keys, side="left")
+            hi = np.searchsorted(self.sorted_keys, keys, side="right")
+            cnt = hi - lo
+            total = int(cnt.sum())
+            if total == 0:
+                continue
+            # expand the cell ranges [lo, hi) into pairs
+            i = np.repeat(idx, cnt)
+            first = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt)
+            j = self.sorted_index[first + np.arange(total)]
+            if self._dims is None:
+                # drop the points of other cells whose keys collide with the neighbor cell
+                keep = np.all(self.cells[j] == self.cells[i] + offset, axis=1)
+                i, j = i[keep], j[keep]
+            if k == 0:
+                # within the same cell keep each pair once
+                keep = i < j
+                i, j = i[keep], j[keep]
+            pi.append(i)
+            pj.append(j)
+        if not pi:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(pi), np.concatenate(pj)
+
+    def _encode(self, cells: nparray) -> nparray:
+        if self._dims is not None:
+            return (cells[:, 0] * self._dims[1] + cells[:, 1]) * self._dims[2] + cells[:, 2]
+        h = cells * _PRIMES
+        return h[:, 0] ^ h[:, 1] ^ h[:, 2]
@@ -9,3 +9,6 @@ class ParticleFlags(IntEnum):
 
     ACTIVE = 1 << 0
     """Indicates that the particle is active."""
+    SLEEPING = 1 << 1
+    """Indicates that the particle is asleep, i.e., temporarily inactive (its ACTIVE flag is cleared
+    until it is woken up, see :class:`nemo.sim.Sleeping`)."""
@@ -1,9 +1,25 @@
 from .builder import ModelBuilder
+from .checkpoint import load_checkpoint, model_hash, save_checkpoint
+from .diagnostics import DIAGNOSTICS, DiagnosticsRecorder, eval_diagnostics
 from .model import Model
-from .state import State
+from .parallel import get_num_threads, set_num_threads
+from .self_collision import SelfCollision
+from .sleeping import Sleeping
+from .state import State, StatePool
 
 __all__ = [
+    "DIAGNOSTICS",
+    "DiagnosticsRecorder",
     "Model",
     "ModelBuilder",
+    "SelfCollision",
+    "Sleeping",
     "State",
+    "StatePool",
+    "eval_diagnostics",
+    "get_num_threads",
+    "load_checkpoint",
+    "model_hash",
+    "save_checkpoint",
+    "set_num_threads",
 ]
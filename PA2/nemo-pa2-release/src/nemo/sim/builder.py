@@ -4,18 +4,63 @@ from ..core.types import (
     Axis,
     AxisType,
     Vec3,
+    nparray,
 )
-from ..geometry.types import ParticleFlags
+from ..geometry import HashGrid, ParticleFlags, morton_codes
+from .graph import color_edges, color_groups, connected_components, reverse_cuthill_mckee
 from .model import Model
 
 
+class _ArrayBuffer:
+    """An append-only sequence of rows of a fixed shape.
+
+    Single rows are collected in a Python list and bulk arrays are kept as chunks, so both
+    :meth:`append` and :meth:`extend` are cheap. :meth:`array` concatenates the rows into one array.
+    """
+
+    def __init__(self, shape: tuple[int, ...] = (), dtype=np.float64):
+        self.shape = shape
+        self.dtype = dtype
+        self._chunks: list[nparray] = []
+        self._chunk_rows = 0
+        self._rows = []
+
+    def __len__(self) -> int:
+        return self._chunk_rows + len(self._rows)
+
+    def append(self, row) -> None:
+        self._rows.append(row)
+
+    def extend(self, rows: nparray) -> None:
+        self._flush()
+        rows = np.asarray(rows, dtype=self.dtype).reshape((-1, *self.shape))
+        self._chunks.append(rows)
+        self._chunk_rows += len(rows)
+
+    def array(self) -> nparray:
+        """All the rows as a new array of shape (len(self), *shape)."""
+        self._flush()
+        if len(self._chunks) == 0:
+            return np.zeros((0, *self.shape), dtype=self.dtype)
+        # keep a single chunk, so that repeated calls don't concatenate again
+        self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0].copy()
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._chunks.append(np.array(self._rows, dtype=self.dtype).reshape((-1, *self.shape)))
+            self._chunk_rows += len(self._rows)
+            self._rows = []
+
+
 class ModelBuilder:
     """A helper class for building simulation models at runtime.
 
     Similar to many popular simulation engine (such as Newton, Drake, Mujoco),
     Use the ModelBuilder to construct a simulation scene. The ModelBuilder
-    represents the scene using standard Python data structures like lists,
-    which are convenient but unsuitable for efficient simulation.
+    collects the elements one by one (e.g., :meth:`add_particle`) or as NumPy arrays
+    (e.g., :meth:`add_particles`, :meth:`add_springs`), which is convenient but
+    unsuitable for efficient simulation.
     Call :meth:`finalize` to construct a simulation-ready Model.
     """
 
@@ -27,22 +72,35 @@ class ModelBuilder:
         self.gravity: float = gravity
 
         # particles
-        self.particle_q = []
-        self.particle_qd = []
-        self.particle_mass = []
-        self.particle_radius = []
-        self.particle_flags = []
-        self.particle_drag = []
-
-        # springs
-        self.spring_indices = []
-        self.spring_rest_length = []
-        self.spring_stiffness = []
-        self.spring_damping = []
+        self.particle_q = _ArrayBuffer((3,))
+        self.particle_qd = _ArrayBuffer((3,))
+        self.particle_mass = _ArrayBuffer()
+        self.particle_radius = _ArrayBuffer()
+        self.particle_flags = _ArrayBuffer(dtype=np.int32)
+        self.particle_drag = _ArrayBuffer()
+
+        # springs (a negative rest length is computed from the initial positions)
+        self.spring_indices = _ArrayBuffer((2,), dtype=np.int64)
+        self.spring_rest_length = _ArrayBuffer()
+        self.spring_stiffness = _ArrayBuffer()
+        self.spring_damping = _ArrayBuffer()
 
         # gravitational
-        self.gravitational_pairs = []
-        self.gravitational_constant = []
+        self.gravitational_pairs = _ArrayBuffer((2,), dtype=np.int64)
+        self.gravitational_constant = _ArrayBuffer()
+
+        # contacts (zero stiffness disables the corresponding contacts)
+        self.particle_ke = 0.0
+        self.particle_kd = 0.0
+        self.ground_ke = 0.0
+        self.ground_kd = 0.0
+        self.ground_height = 0.0
+        self.self_collision_thickness = 0.0
+
+        # sleeping of resting particle islands (a zero window disables sleeping)
+        self.sleep_window = 0
+        self.sleep_velocity_threshold = 0.0
+        self.sleep_force_threshold = 0.0
 
     @property
     def particle_count(self) -> int:
@@ -104,45 +162,51 @@ class ModelBuilder:
 
     def add_particles(
         self,
-        pos: list[Vec3],
-        vel: list[Vec3],
-        mass: list[float],
-        radius: list[float] | None = None,
-        drag: list[float] | None = None,
-        flags: list[int] | None = None,
+        pos: list[Vec3] | nparray,
+        vel: list[Vec3] | nparray,
+        mass: list[float] | nparray | float,
+        radius: list[float] | nparray | float | None = None,
+        drag: list[float] | nparray | float | None = None,
+        flags: list[int] | nparray | int | None = None,
     ) -> None:
         """Adds a group particles to the model.
 
         Args:
-            pos: The initial positions of the particle.
-            vel: The initial velocities of the particle.
-            mass: The mass of the particles.
+            pos: The initial positions of the particle, shape (N, 3).
+            vel: The initial velocities of the particle, shape (N, 3).
+            mass: The mass of the particles, shape (N,), or a single mass for all of them.
             radius: The radius of the particles used in collision handling. If None, the radius is set to the default
             value (:attr:`default_particle_radius`).
+            drag: The drag coefficients of the particles. If None, zero drag is used.
             flags: The flags that control the dynamical behavior of the particles, see PARTICLE_FLAG_* constants.
 
         Note:
             Set the mass equal to zero to create a 'kinematic' particle that is not subject to dynamics.
         """
         # check data
-        for p, v in zip(pos, vel, strict=True):
-            if (isinstance(p, list) and len(p) != 3) or (isinstance(p, np.ndarray) and p.shape != (3,)):
-                raise RuntimeError("pos must have a length of 3")
-            if (isinstance(v, list) and len(v) != 3) or (isinstance(v, np.ndarray) and v.shape != (3,)):
-                raise RuntimeError("vel must have a length of 3")
+        pos = np.asarray(pos, dtype=np.float64)
+        vel = np.asarray(vel, dtype=np.float64)
+        if pos.size == 0 and vel.size == 0:
+            return
+        if pos.ndim != 2 or pos.shape[1] != 3:
+            raise RuntimeError("pos must have a length of 3")
+        if vel.ndim != 2 or vel.shape[1] != 3:
+            raise RuntimeError("vel must have a length of 3")
+        n = len(pos)
+        if len(vel) != n:
+            raise RuntimeError(f"Number of velocities ({len(vel)}) doesn't match the number of positions ({n})")
+
+        mass = self._broadcast(mass, n, "mass")
+        radius = self._broadcast(self.default_particle_radius if radius is None else radius, n, "radius")
+        drag = self._broadcast(0.0 if drag is None else drag, n, "drag")
+        flags = self._broadcast(ParticleFlags.ACTIVE.value if flags is None else flags, n, "flags")
 
         self.particle_q.extend(pos)
         self.particle_qd.extend(vel)
         self.particle_mass.extend(mass)
-        if radius is None:
-            radius = [self.default_particle_radius] * len(pos)
-        if drag is None:
-            drag = [0.0] * len(pos)
-        if flags is None:
-            flags = [ParticleFlags.ACTIVE.value] * len(pos)
         self.particle_radius.extend(radius)
-        self.particle_flags.extend(flags)
         self.particle_drag.extend(drag)
+        self.particle_flags.extend(flags)
 
     def add_spring(self, i: int, j, ke: float, kd: float | None = None, rest_length: float | None = None):
         """Adds a spring between two particles in the system
@@ -161,8 +225,7 @@ class ModelBuilder:
             based on the distance between the particles in their initial
             configuration.
         """
-        self.spring_indices.append(i)
-        self.spring_indices.append(j)
+        self.spring_indices.append((i, j))
         self.spring_stiffness.append(ke)
         self.spring_damping.append(0.0 if kd is None else kd)
         if rest_length is not None:
@@ -172,6 +235,46 @@ class ModelBuilder:
         else:
             self.spring_rest_length.append(-1.0)
 
+    def add_springs(
+        self,
+        indices: list[tuple[int, int]] | nparray,
+        ke: list[float] | nparray | float,
+        kd: list[float] | nparray | float | None = None,
+        rest_length: list[float] | nparray | float | None = None,
+    ):
+        """Adds a group of springs to the model
+
+        Args:
+            indices: The indices of the particle pairs, shape (S, 2)
+            ke: The elastic stiffness of the springs, shape (S,), or a single value for all of them
+            kd: The damping stiffness of the springs
+            rest_length: The rest lengths of the springs
+
+        Note:
+            If kd is None, zero damping will be used.
+
+            If rest_length is None, the rest lengths are computed from the distances between
+            the particles in their initial configuration.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size == 0:
+            return
+        if indices.ndim != 2 or indices.shape[1] != 2:
+            raise RuntimeError("Spring indices must have a shape of (S, 2)")
+        n = len(indices)
+        ke = self._broadcast(ke, n, "ke")
+        kd = self._broadcast(0.0 if kd is None else kd, n, "kd")
+        if rest_length is None:
+            rest_length = self._broadcast(-1.0, n, "rest_length")
+        else:
+            rest_length = self._broadcast(rest_length, n, "rest_length")
+            if np.any(rest_length < 0):
+                raise RuntimeError(f"Spring rest-length ({rest_length.min()}) can't be negative")
+        self.spring_indices.extend(indices)
+        self.spring_stiffness.extend(ke)
+        self.spring_damping.extend(kd)
+        self.spring_rest_length.extend(rest_length)
+
     def add_gravitational(self, i: int, j: int, G: float):
         """Adds a gravitational attraction force between two particles in the system
 
@@ -180,11 +283,391 @@ class ModelBuilder:
             j: The index of the second particle
             G: The gravitational constant
         """
-        self.gravitational_pairs.append(i)
-        self.gravitational_pairs.append(j)
+        self.gravitational_pairs.append((i, j))
         self.gravitational_constant.append(G)
 
-    def finalize(self) -> Model:
+    # instancing
+    def add_builder(
+        self, builder: "ModelBuilder", pos: Vec3 | nparray = (0.0, 0.0, 0.0), rot: nparray | None = None
+    ) -> int:
+        """Adds copies (instances) of the particles, springs and gravitational pairs of another builder.
+
+        The particles of each instance are transformed rigidly by ``x -> rot @ x + pos`` (velocities
+        are rotated), and the particle indices of its springs and gravitational pairs are offset.
+        Many instances are added at once by passing K translations and/or rotations; instance k
+        then starts at particle ``first + k * builder.particle_count``. All data is merged as arrays.
+
+        Contact settings (e.g., the ground plane) of `builder` are not copied.
+
+        Args:
+            builder: The builder to instantiate.
+            pos: The translation of the instances, shape (3,) or (K, 3).
+            rot: The rotation matrix of the instances, shape (3, 3) or (K, 3, 3). If None, no rotation is applied.
+
+        Returns:
+            The index of the first particle of the first instance.
+        """
+        return self._add_instances(
+            pos,
+            rot,
+            builder.particle_q.array(),
+            builder.particle_qd.array(),
+            builder.particle_mass.array(),
+            builder.particle_radius.array(),
+            builder.particle_drag.array(),
+            builder.particle_flags.array(),
+            builder.spring_indices.array(),
+            builder.spring_stiffness.array(),
+            builder.spring_damping.array(),
+            builder.spring_rest_length.array(),
+            builder.gravitational_pairs.array(),
+            builder.gravitational_constant.array(),
+        )
+
+    def add_model(self, model: Model, pos: Vec3 | nparray = (0.0, 0.0, 0.0), rot: nparray | None = None) -> int:
+        """Adds copies (instances) of the particles, springs and gravitational pairs of a finalized model.
+
+        The particles are taken in the order of the model (see :meth:`Model.particle_index` for models
+        with reordered particles). See :meth:`add_builder` for the transformation of the instances.
+
+        Args:
+            model: The model to instantiate.
+            pos: The translation of the instances, shape (3,) or (K, 3).
+            rot: The rotation matrix of the instances, shape (3, 3) or (K, 3, 3). If None, no rotation is applied.
+
+        Returns:
+            The index of the first particle of the first instance.
+        """
+        return self._add_instances(
+            pos,
+            rot,
+            model.particle_q,
+            model.particle_qd,
+            model.particle_mass,
+            model.particle_radius,
+            model.particle_drag,
+            model.particle_flags,
+            model.spring_indices,
+            model.spring_stiffness,
+            model.spring_damping,
+            model.spring_rest_length,
+            model.gravitational_pairs,
+            model.gravitational_constant,
+        )
+
+    def _add_instances(
+        self,
+        pos: Vec3 | nparray,
+        rot: nparray | None,
+        q: nparray,
+        qd: nparray,
+        mass: nparray,
+        radius: nparray,
+        drag: nparray,
+        flags: nparray,
+        spring_indices: nparray,
+        spring_stiffness: nparray,
+        spring_damping: nparray,
+        spring_rest_length: nparray,
+        gravitational_pairs: nparray,
+        gravitational_constant: nparray,
+    ) -> int:
+        pos = np.asarray(pos, dtype=np.float64)
+        if pos.shape[-1:] != (3,) or pos.ndim > 2:
+            raise RuntimeError(f"Instance translations must have a shape of (3,) or (K, 3), not {pos.shape}")
+        rot = np.eye(3) if rot is None else np.asarray(rot, dtype=np.float64)
+        if rot.shape[-2:] != (3, 3) or rot.ndim > 3:
+            raise RuntimeError(f"Instance rotations must have a shape of (3, 3) or (K, 3, 3), not {rot.shape}")
+        pos, rot = pos.reshape(-1, 3), rot.reshape(-1, 3, 3)
+        k = max(len(pos), len(rot))
+        if len(pos) not in (1, k) or len(rot) not in (1, k):
+            raise RuntimeError(f"Numbers of instance translations ({len(pos)}) and rotations ({len(rot)}) don't match")
+        pos, rot = np.broadcast_to(pos, (k, 3)), np.broadcast_to(rot, (k, 3, 3))
+
+        first = self.particle_count
+        n = len(q)
+        if n > 0:
+            self.particle_q.extend(np.einsum("kab,nb->kna", rot, q) + pos[:, None, :])
+            self.particle_qd.extend(np.einsum("kab,nb->kna", rot, qd))
+            self.particle_mass.extend(np.tile(mass, k))
+            self.particle_radius.extend(np.tile(radius, k))
+            self.particle_drag.extend(np.tile(drag, k))
+            self.particle_flags.extend(np.tile(flags, k))
+        # index offset of each instance
+        offsets = first + n * np.arange(k)[:, None, None]
+        if len(spring_indices) > 0:
+            self.spring_indices.extend(spring_indices[None].astype(np.int64) + offsets)
+            self.spring_stiffness.extend(np.tile(spring_stiffness, k))
+            self.spring_damping.extend(np.tile(spring_damping, k))
+            self.spring_rest_length.extend(np.tile(spring_rest_length, k))
+        if len(gravitational_pairs) > 0:
+            self.gravitational_pairs.extend(gravitational_pairs[None].astype(np.int64) + offsets)
+            self.gravitational_constant.extend(np.tile(gravitational_constant, k))
+        return first
+
+    # procedural objects
+    def add_rope(
+        self,
+        start: Vec3,
+        end: Vec3,
+        count: int,
+        mass: float,
+        ke: float,
+        kd: float = 0.0,
+        bend_ke: float = 0.0,
+        bend_kd: float = 0.0,
+        radius: float | None = None,
+        drag: float | None = None,
+        fixed: list[int] | None = None,
+    ) -> int:
+        """Adds a rope, i.e., a chain of particles evenly placed from `start` to `end`.
+
+        Consecutive particles are connected by springs. If `bend_ke` is positive, every
+        other particle is also connected by a bending spring.
+
+        Args:
+            start: The position of the first particle.
+            end: The position of the last particle.
+            count: The number of particles.
+            mass: The mass of each particle.
+            ke, kd: The stiffness and damping of the springs between consecutive particles.
+            bend_ke, bend_kd: The stiffness and damping of the bending springs.
+            radius: The radius of the particles. If None, the default radius is used.
+            drag: The drag coefficient of the particles.
+            fixed: The indices (within the rope, negative values count from the end) of the fixed particles.
+
+        Returns:
+            The index of the first particle of the rope.
+        """
+        if count < 2:
+            raise RuntimeError(f"A rope needs at least 2 particles, not {count}")
+        t = np.linspace(0.0, 1.0, count)[:, None]
+        pos = (1.0 - t) * np.asarray(start, dtype=np.float64) + t * np.asarray(end, dtype=np.float64)
+        idx = np.arange(count)
+        return self._add_grid(
+            pos, idx, [((1,), ke, kd), ((2,), bend_ke, bend_kd)], mass, radius, drag, self._fixed_mask(idx, fixed)
+        )
+
+    def add_cloth_grid(
+        self,
+        pos: Vec3,
+        rows: int,
+        cols: int,
+        spacing: float,
+        mass: float,
+        ke: float,
+        kd: float = 0.0,
+        cross_ke: float | None = None,
+        cross_kd: float | None = None,
+        shear_ke: float = 0.0,
+        shear_kd: float = 0.0,
+        bend_ke: float = 0.0,
+        bend_kd: float = 0.0,
+        vel: Vec3 = (0.0, 0.0, 0.0),
+        radius: float | None = None,
+        drag: float | None = None,
+        axes: tuple[int, int] = (0, 1),
+        fixed_rows: list[int] | None = None,
+        fixed_cols: list[int] | None = None,
+    ) -> int:
+        """Adds a rectangular grid of particles connected by springs, e.g., a cloth.
+
+        The particle (i, j) in row i and column j is placed at ``pos + spacing * (i * e0 + j * e1)``,
+        where e0 and e1 are the unit vectors of the given axes, and has the index ``first + i * cols + j``.
+        The grid is connected by
+
+        - structural springs between neighbors in a row (`ke`, `kd`) and in a column (`cross_ke`, `cross_kd`);
+        - shear springs along the diagonals of the grid cells, if `shear_ke` is positive;
+        - bending springs between every other particle of the rows and columns, if `bend_ke` is positive.
+
+        Args:
+            pos: The position of the particle (0, 0).
+            rows: The number of rows.
+            cols: The number of columns.
+            spacing: The distance between neighboring particles.
+            mass: The mass of each particle.
+            ke, kd: The stiffness and damping of the springs within the rows.
+            cross_ke, cross_kd: The stiffness and damping of the springs within the columns.
+                If None, `ke` and `kd` are used.
+            shear_ke, shear_kd: The stiffness and damping of the shear springs.
+            bend_ke, bend_kd: The stiffness and damping of the bending springs.
+            vel: The initial velocity of the particles.
+            radius: The radius of the particles. If None, the default radius is used.
+            drag: The drag coefficient of the particles.
+            axes: The axes along which the rows and the columns advance.
+            fixed_rows: The rows whose particles are fixed (negative values count from the end).
+            fixed_cols: The columns whose particles are fixed (negative values count from the end).
+
+        Returns:
+            The index of the first particle of the grid.
+        """
+        if rows < 1 or cols < 1:
+            raise RuntimeError(f"Invalid cloth grid size: {rows}x{cols}")
+        i, j = np.meshgrid(np.arange(rows), np.arange(cols), indexing="ij")
+        pts = np.zeros((rows * cols, 3))
+        pts[:, axes[0]] = spacing * i.reshape(-1)
+        pts[:, axes[1]] = spacing * j.reshape(-1)
+        pts += np.asarray(pos, dtype=np.float64)
+        idx = np.arange(rows * cols).reshape(rows, cols)
+        fixed = np.zeros((rows, cols), dtype=bool)
+        if fixed_rows:
+            fixed[fixed_rows, :] = True
+        if fixed_cols:
+            fixed[:, fixed_cols] = True
+        cross_ke = ke if cross_ke is None else cross_ke
+        cross_kd = kd if cross_kd is None else cross_kd
+        springs = [
+            ((0, 1), ke, kd),
+            ((1, 0), cross_ke, cross_kd),
+            ((1, 1), shear_ke, shear_kd),
+            ((1, -1), shear_ke, shear_kd),
+            ((0, 2), bend_ke, bend_kd),
+            ((2, 0), bend_ke, bend_kd),
+        ]
+        return self._add_grid(pts, idx, springs, mass, radius, drag, fixed, vel)
+
+    def add_lattice(
+        self,
+        pos: Vec3,
+        dims: tuple[int, int, int],
+        spacing: float,
+        mass: float,
+        ke: float,
+        kd: float = 0.0,
+        shear_ke: float = 0.0,
+        shear_kd: float = 0.0,
+        bend_ke: float = 0.0,
+        bend_kd: float = 0.0,
+        vel: Vec3 = (0.0, 0.0, 0.0),
+        radius: float | None = None,
+        drag: float | None = None,
+        fixed: np.ndarray | None = None,
+    ) -> int:
+        """Adds a 3D lattice of particles connected by springs, e.g., a soft block.
+
+        The particle (i, j, k) is placed at ``pos + spacing * (i, j, k)`` and has the index
+        ``first + (i * dims[1] + j) * dims[2] + k``. The lattice is connected by structural springs
+        between neighbors along the axes, shear springs along the face and body diagonals of the
+        cells (if `shear_ke` is positive), and bending springs between every other particle
+        along the axes (if `bend_ke` is positive).
+
+        Args:
+            pos: The position of the particle (0, 0, 0).
+            dims: The number of particles along each axis.
+            spacing: The distance between neighboring particles.
+            mass: The mass of each particle.
+            ke, kd: The stiffness and damping of the structural springs.
+            shear_ke, shear_kd: The stiffness and damping of the shear springs.
+            bend_ke, bend_kd: The stiffness and damping of the bending springs.
+            vel: The initial velocity of the particles.
+            radius: The radius of the particles. If None, the default radius is used.
+            drag: The drag coefficient of the particles.
+            fixed: Optionally, a boolean array of shape `dims` marking the fixed particles.
+
+        Returns:
+            The index of the first particle of the lattice.
+        """
+        dims = tuple(int(d) for d in dims)
+        if len(dims) != 3 or min(dims) < 1:
+            raise RuntimeError(f"Invalid lattice size: {dims}")
+        grid = np.stack(np.meshgrid(*(np.arange(d) for d in dims), indexing="ij"), axis=-1)
+        pts = spacing * grid.reshape(-1, 3) + np.asarray(pos, dtype=np.float64)
+        idx = np.arange(len(pts)).reshape(dims)
+        offsets = np.array([(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1)])
+        # one of each pair of opposite offsets: the first non-zero component is positive
+        first = offsets[np.arange(len(offsets)), np.argmax(offsets != 0, axis=1)]
+        offsets = offsets[first > 0]
+        axis_aligned = np.count_nonzero(offsets, axis=1) == 1
+        springs = [(tuple(o), ke, kd) for o in offsets[axis_aligned]]
+        springs += [(tuple(o), shear_ke, shear_kd) for o in offsets[~axis_aligned]]
+        springs += [(tuple(2 * o), bend_ke, bend_kd) for o in offsets[axis_aligned]]
+        if fixed is not None:
+            fixed = np.asarray(fixed, dtype=bool)
+            if fixed.shape != dims:
+                raise RuntimeError(f"fixed must have a shape of {dims}, not {fixed.shape}")
+        return self._add_grid(pts, idx, springs, mass, radius, drag, fixed, vel)
+
+    def _add_grid(
+        self,
+        pos: nparray,
+        idx: nparray,
+        springs: list[tuple[tuple[int, ...], float, float]],
+        mass: float,
+        radius: float | None,
+        drag: float | None,
+        fixed: nparray | None,
+        vel: Vec3 = (0.0, 0.0, 0.0),
+    ) -> int:
+        """Add the particles of a regular grid and the springs between the particles at the given grid offsets.
+
+        Args:
+            pos: nparray, shape (N, 3): the particle positions
+            idx: nparray, int: the (local) particle index of each grid node, shape of the grid
+            springs: (offset, ke, kd) for each spring type; types with zero stiffness are skipped
+            fixed: nparray, bool: the fixed grid nodes, shape of the grid (or None)
+        """
+        first = self.particle_count
+        flags = np.full(len(pos), ParticleFlags.ACTIVE.value, dtype=np.int32)
+        if fixed is not None:
+            flags[idx[fixed]] = 0
+        vel = np.broadcast_to(np.asarray(vel, dtype=np.float64), pos.shape)
+        self.add_particles(pos, vel, mass, radius=radius, drag=drag, flags=flags)
+        for offset, ke, kd in springs:
+            if ke <= 0 and kd <= 0:
+                continue
+            pairs = self._grid_pairs(idx, offset)
+            if len(pairs):
+                self.add_springs(first + pairs, ke, kd)
+        return first
+
+    @staticmethod
+    def _grid_pairs(idx: nparray, offset: tuple[int, ...]) -> nparray:
+        """The pairs (idx[g], idx[g + offset]) over all grid nodes g for which both nodes exist."""
+        src = tuple(slice(max(0, -o), max(0, n - max(0, o))) for o, n in zip(offset, idx.shape, strict=True))
+        dst = tuple(slice(max(0, o), max(0, n - max(0, -o))) for o, n in zip(offset, idx.shape, strict=True))
+        return np.stack([idx[src].reshape(-1), idx[dst].reshape(-1)], axis=1)
+
+    @staticmethod
+    def _fixed_mask(idx: nparray, fixed: list[int] | None) -> nparray | None:
+        if not fixed:
+            return None
+        mask = np.zeros(idx.shape, dtype=bool)
+        mask[fixed] = True
+        return mask
+
+    @staticmethod
+    def _broadcast(values, n: int, name: str) -> nparray:
+        """Broadcast per-element values (or a single value) to shape (n,)."""
+        values = np.asarray(values)
+        if values.ndim > 1 or (values.ndim == 1 and len(values) != n):
+            raise RuntimeError(f"{name} must be a single value or have a length of {n}")
+        return np.broadcast_to(values, (n,))
+
+    def enable_sleeping(self, velocity_threshold: float, force_threshold: float, window: int = 30):
+        """Lets islands of resting particles fall asleep (see :class:`nemo.sim.Sleeping`)
+
+        Args:
+            velocity_threshold: The maximal speed of the particles of a resting island
+            force_threshold: The maximal net force on the particles of a resting island
+            window: The number of consecutive resting steps after which an island falls asleep
+        """
+        self.sleep_velocity_threshold = velocity_threshold
+        self.sleep_force_threshold = force_threshold
+        self.sleep_window = window
+
+    def add_ground_plane(self, ke: float, kd: float = 0.0, height: float = 0.0):
+        """Adds a ground plane perpendicular to the up axis, against which particles collide
+
+        Args:
+            ke: The contact stiffness of the ground
+            kd: The contact damping of the ground
+            height: The height of the ground plane along the up axis
+        """
+        self.ground_ke = ke
+        self.ground_kd = kd
+        self.ground_height = height
+
+    def finalize(self, reorder: str | None = None, dtype=np.float64) -> Model:
         """
         Finalize the builder and create a concrete Model for simulation.
 
@@ -192,12 +675,27 @@ class ModelBuilder:
         returning a Model object ready for simulation. It should be called after all
         elements (particles, bodies, shapes, joints, etc.) have been added to the builder.
 
+        Args:
+            reorder: Optionally reorder the particles to improve memory locality:
+
+                - ``"rcm"``: reverse Cuthill-McKee ordering of the spring and gravitational graph,
+                  which minimizes the bandwidth of the implicit system matrices;
+                - ``"morton"``: order along a space-filling (Morton) curve of the initial positions.
+
+                The particle indices of the model then differ from the order in which the particles
+                were added; use :meth:`Model.particle_index` to map the latter to the former.
+            dtype: The floating-point precision of the model and its states, ``np.float64`` (default)
+                or ``np.float32`` (see :attr:`Model.dtype`).
+
         Returns:
             Model: A fully constructed Model object containing all simulation data.
 
         NOTES:
             - This method also perform necessary validation of simulation setup
         """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise RuntimeError(f"Unsupported precision: [{dtype}], must be float32 or float64")
         m = Model()
         m.gravity = np.array(self.up_axis.to_vector(), dtype=np.float64) * self.gravity
         m.up_axis = self.up_axis
@@ -206,49 +704,134 @@ class ModelBuilder:
         # particles
 
         m.particle_count = self.particle_count
-        m.particle_q = np.array(self.particle_q, dtype=np.float64)
-        m.particle_qd = np.array(self.particle_qd, dtype=np.float64)
+        m.particle_q = self.particle_q.array()
+        m.particle_qd = self.particle_qd.array()
+        m.particle_mass = self.particle_mass.array()
         # check all mass are positive
-        for c in self.particle_mass:
-            if c < 1e-8:
-                raise RuntimeError(f"Particle mass ({c}) is too small")
-        m.particle_mass = np.array(self.particle_mass, dtype=np.float64)
+        small = m.particle_mass < 1e-8
+        if np.any(small):
+            raise RuntimeError(f"Particle mass ({m.particle_mass[np.argmax(small)]}) is too small")
         m.particle_inv_mass = np.reciprocal(m.particle_mass)
-        m.particle_radius = np.array(self.particle_radius, dtype=np.float64)
-        m.particle_flags = np.array(self.particle_flags, dtype=np.int32)
-        m.particle_drag = np.array(self.particle_drag, dtype=np.float64)
+        m.particle_radius = self.particle_radius.array()
+        m.particle_flags = self.particle_flags.array()
+        m.particle_drag = self.particle_drag.array()
         # For fixed particles, ensure the velocity to be zero
-        for i in range(self.particle_count):
-            if m.particle_flags[i] & ParticleFlags.ACTIVE.value == 0:
-                m.particle_qd[i] = np.zeros(3)
+        m.particle_qd[m.particle_flags & ParticleFlags.ACTIVE.value == 0] = 0.0
 
         # ---------------------
         # springs
-        for i in self.spring_indices:
-            if i < 0 or i >= self.particle_count:
-                raise RuntimeError(f"Spring particle index ({i}) is out of range")
-        for ke, kd in zip(self.spring_stiffness, self.spring_damping, strict=True):
-            if ke < 0 or kd < 0:
-                raise RuntimeError(f"Failed to satisfy (stiffness >= 0) and (damping >= 0): ke={ke}, kd={kd}")
-        m.spring_indices = np.array(self.spring_indices, dtype=np.int32).reshape((-1, 2))
-        m.spring_stiffness = np.array(self.spring_stiffness, dtype=np.float64)
-        m.spring_damping = np.array(self.spring_damping, dtype=np.float64)
-        for i in range(self.spring_count):
-            r = self.spring_rest_length[i]
-            if r < 0.0:
-                r = np.linalg.norm(m.particle_q[m.spring_indices[i, 0]] - m.particle_q[m.spring_indices[i, 1]])
-            self.spring_rest_length[i] = r
-        m.spring_rest_length = np.array(self.spring_rest_length, dtype=np.float64)
+        spring_indices = self.spring_indices.array()
+        self._check_indices(spring_indices, "Spring")
+        m.spring_stiffness = self.spring_stiffness.array()
+        m.spring_damping = self.spring_damping.array()
+        invalid = (m.spring_stiffness < 0) | (m.spring_damping < 0)
+        if np.any(invalid):
+            k = np.argmax(invalid)
+            raise RuntimeError(
+                "Failed to satisfy (stiffness >= 0) and (damping >= 0): "
+                f"ke={m.spring_stiffness[k]}, kd={m.spring_damping[k]}"
+            )
+        m.spring_indices = spring_indices.astype(np.int32)
+        m.spring_rest_length = self.spring_rest_length.array()
+        auto = m.spring_rest_length < 0.0
+        d = m.particle_q[spring_indices[auto, 0]] - m.particle_q[spring_indices[auto, 1]]
+        m.spring_rest_length[auto] = np.linalg.norm(d, axis=1)
 
         # ---------------------
         # gravitational
-        for i in self.gravitational_pairs:
-            if i < 0 or i >= self.particle_count:
-                raise RuntimeError(f"Gravitational particle index ({i}) is out of range")
-        for G in self.gravitational_constant:
-            if G < 0:
-                raise RuntimeError(f"Gravitational constant ({G}) is negative")
-        m.gravitational_pairs = np.array(self.gravitational_pairs, dtype=np.int32).reshape((-1, 2))
-        m.gravitational_constant = np.array(self.gravitational_constant, dtype=np.float64)
+        gravitational_pairs = self.gravitational_pairs.array()
+        self._check_indices(gravitational_pairs, "Gravitational")
+        m.gravitational_constant = self.gravitational_constant.array()
+        if np.any(m.gravitational_constant < 0):
+            raise RuntimeError(f"Gravitational constant ({m.gravitational_constant.min()}) is negative")
+        m.gravitational_pairs = gravitational_pairs.astype(np.int32)
+
+        # ---------------------
+        # contacts
+        for ke, kd in ((self.particle_ke, self.particle_kd), (self.ground_ke, self.ground_kd)):
+            if ke < 0 or kd < 0:
+                raise RuntimeError(f"Failed to satisfy (contact ke >= 0) and (contact kd >= 0): ke={ke}, kd={kd}")
+        m.particle_ke = self.particle_ke
+        m.particle_kd = self.particle_kd
+        m.particle_max_radius = float(m.particle_radius.max()) if self.particle_count else 0.0
+        if m.particle_ke > 0 and m.particle_max_radius > 0:
+            m.particle_grid = HashGrid(cell_size=2.0 * m.particle_max_radius)
+        m.ground_ke = self.ground_ke
+        m.ground_kd = self.ground_kd
+        m.ground_height = self.ground_height
+        if self.self_collision_thickness < 0:
+            raise RuntimeError(f"Self-collision thickness ({self.self_collision_thickness}) can't be negative")
+        m.self_collision_thickness = self.self_collision_thickness
+
+        # ---------------------
+        # sleeping
+        if self.sleep_window < 0 or self.sleep_velocity_threshold < 0 or self.sleep_force_threshold < 0:
+            raise RuntimeError(
+                "Failed to satisfy (sleep window >= 0) and (sleep thresholds >= 0): "
+                f"window={self.sleep_window}, velocity={self.sleep_velocity_threshold}, "
+                f"force={self.sleep_force_threshold}"
+            )
+        m.sleep_window = self.sleep_window
+        m.sleep_velocity_threshold = self.sleep_velocity_threshold
+        m.sleep_force_threshold = self.sleep_force_threshold
+
+        # ---------------------
+        # particle ordering
+        m.particle_permutation = np.arange(m.particle_count)
+        m.particle_inverse_permutation = np.arange(m.particle_count)
+        if reorder is not None:
+            if reorder == "rcm":
+                edges = np.concatenate([m.spring_indices, m.gravitational_pairs])
+                perm = reverse_cuthill_mckee(edges, m.particle_count)
+            elif reorder == "morton":
+                perm = np.argsort(morton_codes(m.particle_q), kind="stable")
+            else:
+                raise RuntimeError(f"Unknown particle ordering: [{reorder}]")
+            self._permute_particles(m, perm)
+
+        # color the springs so that the springs of the same color touch disjoint particles
+        m.spring_colors = color_edges(m.spring_indices, m.particle_count)
+        m.spring_color_groups = color_groups(m.spring_colors)
+        m.update_active_springs()
+
+        # independent parts of the model, e.g., for solving implicit systems per component
+        movable = m.particle_flags & (ParticleFlags.ACTIVE.value | ParticleFlags.SLEEPING.value) != 0
+        edges = np.concatenate([m.spring_indices, m.gravitational_pairs])
+        edges = edges[movable[edges[:, 0]] & movable[edges[:, 1]]]
+        m.component_count, m.particle_component = connected_components(edges, m.particle_count)
+
+        # ---------------------
+        # precision: everything above (e.g., the rest lengths) is computed in float64
+        if dtype != np.float64:
+            m.dtype = dtype.type
+            for name in Model.FLOAT_ARRAYS:
+                setattr(m, name, getattr(m, name).astype(dtype))
 
         return m
+
+    def _check_indices(self, indices: nparray, name: str) -> None:
+        """Check that the particle indices of the springs (or gravitational pairs) are in range."""
+        invalid = (indices < 0) | (indices >= self.particle_count)
+        if np.any(invalid):
+            raise RuntimeError(f"{name} particle index ({indices.reshape(-1)[np.argmax(invalid)]}) is out of range")
+
+    @staticmethod
+    def _permute_particles(m: Model, perm: np.ndarray) -> None:
+        """Reorder the particles of the model, so that the new particle k is the old particle perm[k]."""
+        inv = np.empty_like(perm)
+        inv[perm] = np.arange(len(perm))
+        for name in (
+            "particle_q",
+            "particle_qd",
+            "particle_mass",
+            "particle_inv_mass",
+            "particle_radius",
+            "particle_flags",
+            "particle_drag",
+        ):
+            setattr(m, name, getattr(m, name)[perm])
+        m.spring_indices = inv[m.spring_indices].astype(np.int32)
+        m.gravitational_pairs = inv[m.gravitational_pairs].astype(np.int32)
+        m.particle_permutation = m.particle_permutation[perm]
+        m.particle_inverse_permutation = np.empty_like(m.particle_permutation)
+        m.particle_inverse_permutation[m.particle_permutation] = np.arange(len(perm))
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from ..geometry import ParticleFlags
+from .model import Model
+from .state import State
+
+if TYPE_CHECKING:
+    from ..solvers.solver import SolverBase
+
+CHECKPOINT_VERSION = 1
+"""Version of the checkpoint file layout."""
+
+# State arrays that are written to (and restored from) a checkpoint
+_STATE_ARRAYS = ("particle_q", "particle_qd", "particle_f")
+# Model arrays that define the identity of a simulated scene
+_MODEL_ARRAYS = (
+    "gravity",
+    "particle_mass",
+    "particle_radius",
+    "particle_flags",
+    "particle_drag",
+    "spring_indices",
+    "spring_rest_length",
+    "spring_stiffness",
+    "spring_damping",
+    "gravitational_pairs",
+    "gravitational_constant",
+)
+
+
+def model_hash(model: Model) -> str:
+    """
+    Compute a hash that identifies the simulated scene of the given model.
+
+    Only the data that stays unchanged throughout the simulation (masses, flags, springs, etc.)
+    is hashed; the initial particle positions and velocities are not, since a checkpoint
+    replaces them anyway. Sleeping particles (see :class:`Sleeping`) are hashed as active ones.
+
+    Args:
+        model: Model
+
+    Returns:
+        str: hex digest of the model data
+    """
+    h = hashlib.sha256()
+    h.update(np.int64(model.particle_count).tobytes())
+    h.update(np.int64(int(model.up_axis)).tobytes())
+    for name in _MODEL_ARRAYS:
+        a = getattr(model, name, None)
+        if name == "particle_flags" and a is not None:
+            sleeping = a & ParticleFlags.SLEEPING.value != 0
+            a = np.where(sleeping, (a | ParticleFlags.ACTIVE.value) & ~ParticleFlags.SLEEPING.value, a)
+        h.update(name.encode())
+        if a is not None:
+            a = np.ascontiguousarray(a)
+            h.update(str(a.dtype).encode())
+            h.update(str(a.shape).encode())
+            h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def save_checkpoint(path: str | os.PathLike, model: Model, state: State, solver: SolverBase) -> None:
+    """
+    Save the simulation state and the solver state into a checkpoint file.
+
+    The file is written atomically: the data first goes to a temporary file in the
+    same directory, which then replaces ``path`` in a single rename. An interrupted
+    write never leaves a truncated checkpoint behind.
+
+    Args:
+        path: the checkpoint file (numpy ``.npz`` format)
+        model: the simulated model
+        state: the current simulation state
+        solver: the solver advancing the simulation
+    """
+    path = Path(path)
+    data = {
+        "version": np.int64(CHECKPOINT_VERSION),
+        "model_hash": np.array(model_hash(model)),
+        "solver_type": np.array(type(solver).__name__),
+    }
+    for name in _STATE_ARRAYS:
+        a = getattr(state, name)
+        if a is not None:
+            data[f"state/{name}"] = a
+    for key, value in solver.checkpoint_data().items():
+        data[f"solver/{key}"] = np.asarray(value)
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_checkpoint(path: str | os.PathLike, model: Model, state: State, solver: SolverBase) -> None:
+    """
+    Restore the simulation state and the solver state from a checkpoint file.
+
+    The state arrays are copied into ``state`` in place, so that any references to them
+    (e.g., held by a viewer) remain valid.
+
+    Args:
+        path: the checkpoint file written by :func:`save_checkpoint`
+        model: the simulated model, which must be identical to the one used to write the checkpoint
+        state: the state to restore into
+        solver: the solver to restore into, which must be of the same type as the one used to
+                write the checkpoint
+
+    Raises:
+        RuntimeError: If the checkpoint doesn't match the model or the solver.
+    """
+    with np.load(path, allow_pickle=False) as f:
+        version = int(f["version"])
+        if version != CHECKPOINT_VERSION:
+            raise RuntimeError(f"Unsupported checkpoint version ({version})")
+        if str(f["model_hash"]) != model_hash(model):
+            raise RuntimeError(f"Checkpoint {path} was written for a different model")
+        solver_type = str(f["solver_type"])
+        if solver_type != type(solver).__name__:
+            raise RuntimeError(f"Checkpoint {path} was written by {solver_type}, not {type(solver).__name__}")
+
+        for name in _STATE_ARRAYS:
+            key = f"state/{name}"
+            if key in f:
+                np.copyto(getattr(state, name), f[key])
+        solver.restore_checkpoint_data({k[len("solver/") :]: f[k] for k in f.files if k.startswith("solver/")})
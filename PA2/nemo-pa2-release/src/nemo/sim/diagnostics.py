@@ -0,0 +1,234 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from ..core.types import nparray
+from ..geometry import ParticleFlags
+from .forces import find_ground_contacts, find_particle_contacts
+from .model import Model
+from .state import State
+
+DIAGNOSTICS = (
+    "kinetic_energy",
+    "spring_energy",
+    "gravity_energy",
+    "gravitational_energy",
+    "contact_energy",
+    "total_energy",
+    "momentum_x",
+    "momentum_y",
+    "momentum_z",
+    "angular_momentum_x",
+    "angular_momentum_y",
+    "angular_momentum_z",
+)
+"""Names of the quantities computed by :func:`eval_diagnostics`, in order."""
+
+
+def _simulated(model: Model) -> nparray:
+    """The particles moved by the solvers: the active and the sleeping ones (but not the fixed ones)."""
+    return model.particle_flags & (ParticleFlags.ACTIVE.value | ParticleFlags.SLEEPING.value) != 0
+
+
+def kinetic_energy(model: Model, state: State) -> float:
+    """
+    The kinetic energy Σ ½·mᵢ·‖q̇ᵢ‖² of the simulated (non-fixed) particles.
+    """
+    m = np.where(_simulated(model), model.particle_mass, 0.0)
+    return 0.5 * float(np.einsum("i,ij,ij->", m, state.particle_qd, state.particle_qd, dtype=np.float64))
+
+
+def spring_energy(model: Model, state: State) -> float:
+    """
+    The elastic energy Σ ½·kₛ·(‖qᵢ - qⱼ‖ - lₛ)² of the springs.
+    """
+    if model.spring_count == 0:
+        return 0.0
+    si = model.spring_indices
+    d = state.particle_q[si[:, 0]] - state.particle_q[si[:, 1]]
+    stretch = np.linalg.norm(d, axis=1) - model.spring_rest_length
+    return 0.5 * float(np.einsum("i,i,i->", model.spring_stiffness, stretch, stretch, dtype=np.float64))
+
+
+def gravity_energy(model: Model, state: State) -> float:
+    """
+    The potential energy -Σ mᵢ·g·qᵢ of the simulated particles in the gravity of the model.
+    """
+    m = np.where(_simulated(model), model.particle_mass, 0.0)
+    return -float(np.einsum("i,ij,j->", m, state.particle_q, model.gravity, dtype=np.float64))
+
+
+def gravitational_energy(model: Model, state: State) -> float:
+    """
+    The potential energy -Σ G·mᵢ·mⱼ / ‖qᵢ - qⱼ‖ of the gravitational pairs (coincident pairs are skipped).
+    """
+    if model.gravitational_count == 0:
+        return 0.0
+    gp = model.gravitational_pairs
+    i, j = gp[:, 0], gp[:, 1]
+    nrm = np.linalg.norm(state.particle_q[i] - state.particle_q[j], axis=1)
+    c = model.gravitational_constant * model.particle_mass[i] * model.particle_mass[j]
+    valid = nrm > 1e-10
+    return -float(np.sum(c[valid] / nrm[valid], dtype=np.float64))
+
+
+def contact_energy(model: Model, state: State) -> float:
+    """
+    The elastic energy ½·k·d² of the penalty contacts, for the penetration depths d of the particles
+    into the ground and the overlaps of particle pairs.
+    """
+    energy = 0.0
+    if model.ground_ke > 0 and model.particle_count > 0:
+        _, _, depth = find_ground_contacts(model, state)
+        energy += 0.5 * model.ground_ke * float(np.dot(depth, depth))
+    if model.particle_ke > 0:
+        i, j = find_particle_contacts(model, state)
+        overlap = model.particle_radius[i] + model.particle_radius[j]
+        overlap -= np.linalg.norm(state.particle_q[i] - state.particle_q[j], axis=1)
+        energy += 0.5 * model.particle_ke * float(np.dot(overlap, overlap))
+    return energy
+
+
+def linear_momentum(model: Model, state: State) -> nparray:
+    """
+    The linear momentum Σ mᵢ·q̇ᵢ of the simulated particles, shape (3,).
+    """
+    m = np.where(_simulated(model), model.particle_mass, 0.0)
+    return np.einsum("i,ij->j", m, state.particle_qd, dtype=np.float64)
+
+
+def angular_momentum(model: Model, state: State, origin: nparray | None = None) -> nparray:
+    """
+    The angular momentum Σ mᵢ·cross(qᵢ - o, q̇ᵢ) of the simulated particles about the origin o
+    (the world origin by default), shape (3,).
+    """
+    m = np.where(_simulated(model), model.particle_mass, 0.0)
+    r = state.particle_q if origin is None else state.particle_q - origin
+    return np.einsum("i,ij->j", m, np.cross(r, state.particle_qd), dtype=np.float64)
+
+
+def eval_diagnostics(model: Model, state: State, out: nparray | None = None) -> nparray:
+    """
+    Evaluate the energies and the momenta of the given state, in the order of :data:`DIAGNOSTICS`.
+
+    The total energy is the sum of the kinetic and the potential energies. It is conserved by
+    the exact motion of a model without damping, drag or fixed particles moving at a velocity,
+    so its drift over time measures the energy error of a solver (like the momenta without gravity,
+    fixed particles and ground contacts). All the quantities are whole-array reductions, which cost
+    less than one force evaluation.
+
+    Args:
+        model: the simulated model
+        state: the state
+        out: nparray, shape (len(DIAGNOSTICS),): an optional output array
+
+    Returns:
+        nparray, shape (len(DIAGNOSTICS),): the diagnostics (in float64)
+    """
+    if out is None:
+        out = np.zeros(len(DIAGNOSTICS))
+    out[0] = kinetic_energy(model, state)
+    out[1] = spring_energy(model, state)
+    out[2] = gravity_energy(model, state)
+    out[3] = gravitational_energy(model, state)
+    out[4] = contact_energy(model, state)
+    out[5] = out[0:5].sum()
+    out[6:9] = linear_momentum(model, state)
+    out[9:12] = angular_momentum(model, state)
+    return out
+
+
+class DiagnosticsRecorder:
+    """Records the diagnostics (see :func:`eval_diagnostics`) of a simulation over time.
+
+    The samples are kept in preallocated arrays (:attr:`times` and :attr:`values`), which grow by
+    doubling, or which keep only the last :attr:`window` samples (e.g., for a live plot). With a
+    path, every sample is also streamed as a row of a CSV file with the columns ``time`` and
+    :data:`DIAGNOSTICS` as soon as it is recorded, so the file is complete up to the last sample even
+    if the simulation is interrupted.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        path: str | os.PathLike | None = None,
+        every: int = 1,
+        window: int | None = None,
+    ):
+        """
+        Args:
+            model: the simulated model
+            path: an optional CSV file the samples are written to
+            every: record one sample every `every` calls of :meth:`record`
+            window: the number of most recent samples to keep in memory (all of them if None)
+        """
+        if every < 1:
+            raise RuntimeError(f"Sampling interval ({every}) must be positive")
+        if window is not None and window < 1:
+            raise RuntimeError(f"Window ({window}) must be positive")
+        self.model = model
+        self.every = every
+        """Number of calls of :meth:`record` per sample."""
+        self.window = window
+        """Number of most recent samples kept in memory, None for all of them."""
+        self.count = 0
+        """Number of samples in the buffers (at most twice the window)."""
+        self._calls = 0
+        capacity = 2 * window if window is not None else 1024
+        self._times = np.zeros(capacity)
+        self._values = np.zeros((capacity, len(DIAGNOSTICS)))
+        self._file = None
+        if path is not None:
+            # line buffered: every sample reaches the file when it is recorded
+            self._file = Path(path).open("w", buffering=1)
+            self._file.write(",".join(("time", *DIAGNOSTICS)) + "\n")
+
+    @property
+    def _start(self) -> int:
+        return 0 if self.window is None else max(self.count - self.window, 0)
+
+    @property
+    def times(self) -> nparray:
+        """Times of the samples in memory, shape (sample_count,)."""
+        return self._times[self._start : self.count]
+
+    @property
+    def values(self) -> nparray:
+        """Diagnostics of the samples in memory, shape (sample_count, len(DIAGNOSTICS))."""
+        return self._values[self._start : self.count]
+
+    def series(self, name: str) -> nparray:
+        """The samples in memory of one of the :data:`DIAGNOSTICS`, shape (sample_count,)."""
+        if name not in DIAGNOSTICS:
+            raise RuntimeError(f"Unknown diagnostic: [{name}]")
+        return self.values[:, DIAGNOSTICS.index(name)]
+
+    def record(self, ts: float, state: State) -> None:
+        """
+        Record the diagnostics of the state at the time ts (if this call is sampled, see :attr:`every`).
+        """
+        self._calls += 1
+        if (self._calls - 1) % self.every != 0:
+            return
+        if self.count == len(self._times):
+            if self.window is not None:
+                # drop the oldest samples: one copy every `window` samples
+                self._times[: self.window] = self._times[self.count - self.window : self.count]
+                self._values[: self.window] = self._values[self.count - self.window : self.count]
+                self.count = self.window
+            else:
+                self._times = np.concatenate([self._times, np.zeros_like(self._times)])
+                self._values = np.concatenate([self._values, np.zeros_like(self._values)])
+        k = self.count
+        self._times[k] = ts
+        eval_diagnostics(self.model, state, out=self._values[k])
+        self.count += 1
+        if self._file is not None:
+            self._file.write(",".join(repr(float(v)) for v in (ts, *self._values[k])) + "\n")
+
+    def close(self) -> None:
+        """Close the CSV file (if any)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
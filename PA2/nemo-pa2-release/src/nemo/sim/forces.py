@@ -1,37 +1,174 @@
 # from ..core.types import nparray
 import numpy as np
 
+from ..core.linalg import BlockBandedMatrix, BlockDiagonalMatrix
 from ..core.types import nparray
 from ..geometry import ParticleFlags
 from .model import Model
+from .parallel import get_num_threads, parallel_for
 from .state import State
 
-
-def eval_spring_forces(model: Model, state: State) -> None:
+# ---------------------------------------------------------------------------------------------
+# Vectorized helpers for forces acting along the line between two particles.
+# A force of this kind acts like a damped spring on each pair (i, j): given per-pair
+# stiffness ke, damping kd and rest length l0, the force on particle i is
+#   f = n * (ke * (l0 - l) - kd * dot(n, v_i - v_j)),  n = (q_i - q_j) / l,
+# and the force on particle j is -f.
+
+
+def _pair_normal_forces(
+    state: State, i: nparray, j: nparray, ke: nparray, kd: nparray, l0: nparray
+) -> tuple[nparray, nparray]:
+    """Per-pair directions n, shape (pair_count, 3), and signed magnitudes (positive for a push) of the forces."""
+    d = state.particle_q[i] - state.particle_q[j]
+    nrm = np.linalg.norm(d, axis=1)
+    valid = nrm > 1e-10
+    nhat = d / np.where(valid, nrm, 1.0)[:, None]
+    ndotdv = np.einsum("ij,ij->i", nhat, state.particle_qd[i] - state.particle_qd[j])
+    fn = ke * (l0 - nrm) - kd * ndotdv
+    fn[~valid] = 0.0
+    return nhat, fn
+
+
+def _pair_forces(
+    state: State, i: nparray, j: nparray, ke: nparray, kd: nparray, l0: nparray, push_only: bool = False
+) -> nparray:
+    """Per-pair forces acting on particles i, shape (pair_count, 3). With `push_only`, attractive forces are zeroed."""
+    nhat, fn = _pair_normal_forces(state, i, j, ke, kd, l0)
+    if push_only:
+        fn = np.maximum(fn, 0.0)
+    return nhat * fn[:, None]
+
+
+def _pair_jacobians(
+    state: State, i: nparray, j: nparray, ke: nparray, kd: nparray, l0: nparray
+) -> tuple[nparray, nparray]:
+    """Per-pair jacobians of the force on particle i w.r.t. q_i and qd_i, each of shape (pair_count, 3, 3)."""
+    d = state.particle_q[i] - state.particle_q[j]
+    nrm = np.linalg.norm(d, axis=1)
+    valid = nrm >= 1e-8
+    nrm = np.where(valid, nrm, 1.0)
+    nhat = d / nrm[:, None]
+    nnT = nhat[:, :, None] * nhat[:, None, :]
+    P = np.eye(3) - nnT
+    dv = state.particle_qd[i] - state.particle_qd[j]
+    ndotdv = np.einsum("ij,ij->i", nhat, dv)
+    Pdv = np.einsum("ijk,ik->ij", P, dv)
+    Kq = -ke[:, None, None] * (nnT + ((nrm - l0) / nrm)[:, None, None] * P)
+    Kq -= (kd / nrm)[:, None, None] * (ndotdv[:, None, None] * P + nhat[:, :, None] * Pdv[:, None, :])
+    Kv = -kd[:, None, None] * nnT
+    Kq[~valid] = 0.0
+    Kv[~valid] = 0.0
+    return Kq, Kv
+
+
+def _scatter_pair_forces(model: Model, state: State, i: nparray, j: nparray, f: nparray) -> None:
+    """Accumulate the per-pair forces f on i and -f on j into `state.particle_f`, skipping fixed particles.
+
+    The sums are accumulated in float64 (by `np.bincount`), also for float32 models, and then added to
+    `state.particle_f` in its precision. This is much faster than `np.add.at` for many pairs.
+    """
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    ai, aj = active[i], active[j]
+    idx = np.concatenate([i[ai], j[aj]])
+    f = np.concatenate([f[ai], -f[aj]])
+    for k in range(3):
+        state.particle_f[:, k] += np.bincount(idx, weights=f[:, k], minlength=model.particle_count)
+
+
+def _add_blocks(
+    A: nparray | BlockBandedMatrix | BlockDiagonalMatrix, rows: nparray, cols: nparray, blocks: nparray
+) -> None:
+    """Accumulate 3x3 blocks into a dense (3N, 3N) array, a BlockBandedMatrix or a BlockDiagonalMatrix."""
+    if isinstance(A, BlockBandedMatrix | BlockDiagonalMatrix):
+        A.add_blocks(rows, cols, blocks)
+        return
+    N = A.shape[0] // 3
+    # (N, N, 3, 3) view of A, where A4[a, b] is the 3x3 block of A at block row a and column b
+    A4 = A.view()
+    A4.shape = (N, 3, N, 3)
+    np.add.at(A4.transpose(0, 2, 1, 3), (rows, cols), blocks)
+
+
+def _scatter_pair_jacobians(
+    model: Model, A: nparray | BlockBandedMatrix | BlockDiagonalMatrix, i: nparray, j: nparray, K: nparray, scale: float
+) -> None:
+    """Accumulate the per-pair jacobian blocks K of the pair forces into A, skipping fixed particles."""
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    ai, aj = active[i], active[j]
+    K = scale * K
+    i_a, j_a, K_a = i[ai], j[ai], K[ai]
+    i_b, j_b, K_b = i[aj], j[aj], K[aj]
+    _add_blocks(
+        A,
+        np.concatenate([i_a, i_a, j_b, j_b]),
+        np.concatenate([i_a, j_a, i_b, j_b]),
+        np.concatenate([K_a, -K_a, -K_b, K_b]),
+    )
+
+
+def _active_springs(model: Model) -> nparray | slice:
+    """The springs attached to an active particle (see `model.spring_active`)."""
+    return slice(None) if model.spring_active is None else model.spring_active
+
+
+def _spring_params(model: Model, idx: nparray | slice) -> tuple[nparray, nparray, nparray, nparray, nparray]:
+    si = model.spring_indices[idx]
+    return (
+        si[:, 0],
+        si[:, 1],
+        model.spring_stiffness[idx],
+        model.spring_damping[idx],
+        model.spring_rest_length[idx],
+    )
+
+
+def eval_spring_forces(model: Model, state: State, springs: nparray | None = None) -> None:
     """
     Evaluate the spring forces of the given model, and store the forces
     in `state.particle_f`
+
+    Args:
+        model: Model
+        state: State
+        springs: nparray, int: the indices of the springs to evaluate (all the springs by default),
+                 e.g., for integrating subsets of the springs at different rates
+
+    NOTE: When multiple threads are enabled (see :func:`nemo.sim.parallel.set_num_threads`), the
+          springs are processed one color (see `model.spring_color_groups`) at a time. Springs of
+          the same color don't share particles, so the threads write their forces without conflicts.
+          Springs between inactive particles (see `model.spring_active`) are skipped.
     """
-    for s in range(model.spring_count):
-        i, j = model.spring_indices[s]
-
-        # relative dir of i w.r.t. j;  vec(j-->i)
-        dir = state.particle_q[i] - state.particle_q[j]
-        nrm = np.linalg.norm(dir)  # distance
-        if nrm > 1e-10:
-            # damping force: d * v
-            # relative vel of i w.r.t. j
-            dir /= nrm  # normalize the direction
-            f_s = dir * ((model.spring_rest_length[s] - nrm) * model.spring_stiffness[s])
-            if model.spring_damping[s] > 0:
-                f_d = dir * np.dot(state.particle_qd[i] - state.particle_qd[j], dir) * model.spring_damping[s]
-                f_tot = f_s - f_d
-            else:
-                f_tot = f_s
-            if model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0:
-                state.particle_f[i] += f_tot
-            if model.particle_flags[j] & ParticleFlags.ACTIVE.value != 0:
-                state.particle_f[j] -= f_tot
+    if model.spring_count == 0:
+        return
+    # mask of the evaluated springs, None for all the springs attached to an active particle
+    selected = None
+    if springs is not None or (model.spring_active is not None and get_num_threads() > 1):
+        selected = np.zeros(model.spring_count, dtype=bool)
+        selected[_active_springs(model)] = True
+        if springs is not None:
+            chosen = np.zeros(model.spring_count, dtype=bool)
+            chosen[springs] = True
+            selected &= chosen
+    if get_num_threads() > 1 and model.spring_color_groups is not None:
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+        groups = model.spring_color_groups
+        if selected is not None:
+            groups = [group[selected[group]] for group in groups]
+        for group in groups:
+
+            def accumulate(chunk: slice, group=group):
+                i, j, ke, kd, l0 = _spring_params(model, group[chunk])
+                f = _pair_forces(state, i, j, ke, kd, l0)
+                # no particle appears twice within a color: plain (buffered) fancy indexing is safe
+                ai, aj = active[i], active[j]
+                state.particle_f[i[ai]] += f[ai]
+                state.particle_f[j[aj]] -= f[aj]
+
+            parallel_for(accumulate, len(group))
+        return
+    i, j, ke, kd, l0 = _spring_params(model, _active_springs(model) if selected is None else np.nonzero(selected)[0])
+    _scatter_pair_forces(model, state, i, j, _pair_forces(state, i, j, ke, kd, l0))
 
 
 def eval_spring_force_pos_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -44,42 +181,15 @@ def eval_spring_force_pos_jacobians(model: Model, state: State, A: nparray, scal
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         s: float: the scalar to scale the Jacobian before adding to A
     """
-    for s in range(model.spring_count):
-        i, j = model.spring_indices[s]
-
-        dir = state.particle_q[i] - state.particle_q[j]
-        nrm = np.linalg.norm(dir)
-        if nrm < 1e-8:
-            continue
-
-        nhat = dir / nrm
-        nnT = np.outer(nhat, nhat)
-        ke = model.spring_stiffness[s]
-        l0 = model.spring_rest_length[s]
-
-        # elastic K: -k * (nnT + (l-l0)/l * (I - nnT))
-        K = -ke * (nnT + (nrm - l0) / nrm * (np.eye(3) - nnT))
-
-        # damping contribution to K
-        if model.spring_damping[s] > 0:
-            kd = model.spring_damping[s]
-            dv = state.particle_qd[i] - state.particle_qd[j]
-            ndotdv = np.dot(nhat, dv)
-            Pdv = (np.eye(3) - nnT) @ dv  # project dv onto plane perpendicular to nhat
-            K += -(kd / nrm) * (ndotdv * (np.eye(3) - nnT) + np.outer(nhat, Pdv))
-
-        i_active = model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0
-        j_active = model.particle_flags[j] & ParticleFlags.ACTIVE.value != 0
-
-        if i_active:
-            A[3*i:3*i+3, 3*i:3*i+3] += scale * K
-            A[3*i:3*i+3, 3*j:3*j+3] += scale * (-K)
-        if j_active:
-            A[3*j:3*j+3, 3*i:3*i+3] += scale * (-K)
-            A[3*j:3*j+3, 3*j:3*j+3] += scale * K
+    if model.spring_count == 0:
+        return
+    i, j, ke, kd, l0 = _spring_params(model, _active_springs(model))
+    Kq, _ = _pair_jacobians(state, i, j, ke, kd, l0)
+    _scatter_pair_jacobians(model, A, i, j, Kq, scale)
 
 
 def eval_spring_force_vel_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -92,33 +202,28 @@ def eval_spring_force_vel_jacobians(model: Model, state: State, A: nparray, scal
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         scale: float: the scalar to scale the Jacobian before adding to A
     """
-    for s in range(model.spring_count):
-        if model.spring_damping[s] <= 0:
-            continue
-
-        i, j = model.spring_indices[s]
-
-        dir = state.particle_q[i] - state.particle_q[j]
-        nrm = np.linalg.norm(dir)
-        if nrm < 1e-8:
-            continue
-
-        kd = model.spring_damping[s]
-        nhat = dir / nrm
-        B = kd * np.outer(nhat, nhat)
-
-        i_active = model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0
-        j_active = model.particle_flags[j] & ParticleFlags.ACTIVE.value != 0
-
-        if i_active:
-            A[3*i:3*i+3, 3*i:3*i+3] += scale * (-B)
-            A[3*i:3*i+3, 3*j:3*j+3] += scale * B
-        if j_active:
-            A[3*j:3*j+3, 3*i:3*i+3] += scale * B
-            A[3*j:3*j+3, 3*j:3*j+3] += scale * (-B)
+    damped = np.nonzero(model.spring_damping > 0)[0] if model.spring_count else []
+    if model.spring_active is not None:
+        damped = np.intersect1d(damped, model.spring_active, assume_unique=True)
+    if len(damped) == 0:
+        return
+    i, j, ke, kd, l0 = _spring_params(model, damped)
+    _, Kv = _pair_jacobians(state, i, j, ke, kd, l0)
+    _scatter_pair_jacobians(model, A, i, j, Kv, scale)
+
+
+def _gravitational_params(model: Model, state: State) -> tuple[nparray, nparray, nparray, nparray, nparray]:
+    """Return the pair indices, the (valid) directions j-->i, their lengths and the products G * m_i * m_j."""
+    gp = model.gravitational_pairs
+    i, j = gp[:, 0], gp[:, 1]
+    d = state.particle_q[i] - state.particle_q[j]  # vector from j to i
+    nrm = np.linalg.norm(d, axis=1)
+    c = model.gravitational_constant * model.particle_mass[i] * model.particle_mass[j]
+    return i, j, d, nrm, c
 
 
 def eval_gravitational_forces(model: Model, state: State) -> None:
@@ -130,16 +235,14 @@ def eval_gravitational_forces(model: Model, state: State) -> None:
     It only considers the gravitational force between two particles.
     The gravity of the model is considered separately.
     """
-    for g in range(model.gravitational_count):
-        i, j = model.gravitational_pairs[g]
-        dir = state.particle_q[i] - state.particle_q[j]  # vector from j to i
-        nrm = np.linalg.norm(dir)
-        if nrm > 1e-10:
-            f_g = dir * (model.gravitational_constant[g] * model.particle_mass[i] * model.particle_mass[j] / nrm**3)
-            if model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0:
-                state.particle_f[i] -= f_g
-            if model.particle_flags[j] & ParticleFlags.ACTIVE.value != 0:
-                state.particle_f[j] += f_g
+    if model.gravitational_count == 0:
+        return
+    i, j, d, nrm, c = _gravitational_params(model, state)
+    valid = nrm > 1e-10
+    # force on i (pulling i towards j)
+    f = -d * (c / np.where(valid, nrm, 1.0) ** 3)[:, None]
+    f[~valid] = 0.0
+    _scatter_pair_forces(model, state, i, j, f)
 
 
 def eval_gravitational_force_pos_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -152,33 +255,21 @@ def eval_gravitational_force_pos_jacobians(model: Model, state: State, A: nparra
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         scale: float: the scalar to scale the Jacobian before adding to A
     """
-    for g in range(model.gravitational_count):
-        i, j = model.gravitational_pairs[g]
-
-        dir = state.particle_q[i] - state.particle_q[j]
-        nrm = np.linalg.norm(dir)
-        if nrm < 1e-8:
-            continue
-
-        G = model.gravitational_constant[g]
-        nhat = dir / nrm
-        nnT = np.outer(nhat, nhat)
-
-        # K = -(G·m₀·m₁ / l³) · (I - 3·n̂n̂ᵀ)
-        K = -(G * model.particle_mass[i] * model.particle_mass[j] / nrm**3) * (np.eye(3) - 3 * nnT)
-
-        i_active = model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0
-        j_active = model.particle_flags[j] & ParticleFlags.ACTIVE.value != 0
-
-        if i_active:
-            A[3*i:3*i+3, 3*i:3*i+3] += scale * K
-            A[3*i:3*i+3, 3*j:3*j+3] += scale * (-K)
-        if j_active:
-            A[3*j:3*j+3, 3*i:3*i+3] += scale * (-K)
-            A[3*j:3*j+3, 3*j:3*j+3] += scale * K
+    if model.gravitational_count == 0:
+        return
+    i, j, d, nrm, c = _gravitational_params(model, state)
+    valid = nrm >= 1e-8
+    nrm = np.where(valid, nrm, 1.0)
+    nhat = d / nrm[:, None]
+    nnT = nhat[:, :, None] * nhat[:, None, :]
+    # K = -(G·m₀·m₁ / l³) · (I - 3·n̂n̂ᵀ)
+    K = -(c / nrm**3)[:, None, None] * (np.eye(3) - 3 * nnT)
+    K[~valid] = 0.0
+    _scatter_pair_jacobians(model, A, i, j, K, scale)
 
 
 def eval_drag_forces(model: Model, state: State) -> None:
@@ -186,10 +277,8 @@ def eval_drag_forces(model: Model, state: State) -> None:
     Evaluate the drag forces of the given model, and store the forces
     in `state.particle_f`
     """
-    for i in range(model.particle_count):
-        beta = model.particle_drag[i]
-        if beta > 0 and model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0:
-            state.particle_f[i] -= state.particle_qd[i] * beta
+    idx = np.nonzero((model.particle_drag > 0) & (model.particle_flags & ParticleFlags.ACTIVE.value != 0))[0]
+    state.particle_f[idx] -= state.particle_qd[idx] * model.particle_drag[idx, None]
 
 
 def eval_drag_force_vel_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -202,13 +291,188 @@ def eval_drag_force_vel_jacobians(model: Model, state: State, A: nparray, scale:
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         s: float: the scalar to scale the Jacobian before adding to A
     """
-    for i in range(model.particle_count):
-        beta = model.particle_drag[i]
-        if beta > 0 and model.particle_flags[i] & ParticleFlags.ACTIVE.value != 0:
-            A[i * 3 : (i + 1) * 3, i * 3 : (i + 1) * 3] -= np.eye(3) * (scale * beta)
+    idx = np.nonzero((model.particle_drag > 0) & (model.particle_flags & ParticleFlags.ACTIVE.value != 0))[0]
+    _add_blocks(A, idx, idx, -(scale * model.particle_drag[idx])[:, None, None] * np.eye(3))
+
+
+# ---------------------------------------------------------------------------------------------
+# contacts
+
+
+def find_particle_contacts(model: Model, state: State) -> tuple[nparray, nparray]:
+    """
+    Find the pairs of overlapping particles, i.e., pairs of particles whose distance is less
+    than the sum of their radii.
+
+    The spatial hash grid of the model (`model.particle_grid`) is rebuilt from the current
+    particle positions, if they changed since its last build (see :meth:`nemo.geometry.HashGrid.build`).
+    Pairs connected by a spring and pairs of two fixed particles are not considered to be in contact.
+
+    Returns:
+        tuple[nparray, nparray]: the particle indices (i, j) of the contact pairs
+    """
+    if model.particle_grid is None or model.particle_count < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    model.particle_grid.build(state.particle_q)
+    i, j = model.particle_grid.query_pairs()
+
+    # narrow phase
+    d = state.particle_q[i] - state.particle_q[j]
+    r = model.particle_radius[i] + model.particle_radius[j]
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    keep = (np.einsum("ij,ij->i", d, d) < r * r) & (active[i] | active[j])
+    i, j = i[keep], j[keep]
+
+    if model.spring_count > 0 and len(i) > 0:
+        N = model.particle_count
+        si = model.spring_indices.astype(np.int64)
+        spring_keys = np.minimum(si[:, 0], si[:, 1]) * N + np.maximum(si[:, 0], si[:, 1])
+        keep = ~np.isin(np.minimum(i, j) * N + np.maximum(i, j), spring_keys)
+        i, j = i[keep], j[keep]
+    return i, j
+
+
+def _particle_contact_params(model: Model, i: nparray, j: nparray) -> tuple[nparray, nparray, nparray]:
+    n = len(i)
+    ke = np.full(n, model.particle_ke)
+    kd = np.full(n, model.particle_kd)
+    return ke, kd, model.particle_radius[i] + model.particle_radius[j]
+
+
+def _pushing_particle_contacts(model: Model, state: State) -> tuple[nparray, nparray]:
+    """Return the particle indices (i, j) of the contact pairs whose normal force is not clamped to zero."""
+    i, j = find_particle_contacts(model, state)
+    _, fn = _pair_normal_forces(state, i, j, *_particle_contact_params(model, i, j))
+    return i[fn > 0], j[fn > 0]
+
+
+def eval_particle_contact_forces(model: Model, state: State) -> None:
+    """
+    Evaluate the penalty forces between overlapping particles, and store the forces
+    in `state.particle_f`
+
+    A contact between particle i and j acts as a damped spring with stiffness `model.particle_ke`,
+    damping `model.particle_kd` and a rest length equal to the sum of the two radii, which is
+    only active while the particles overlap. Like the ground contacts, it only pushes: the damping
+    never pulls separating particles back together.
+    """
+    i, j = find_particle_contacts(model, state)
+    if len(i) > 0:
+        f = _pair_forces(state, i, j, *_particle_contact_params(model, i, j), push_only=True)
+        _scatter_pair_forces(model, state, i, j, f)
+
+
+def eval_particle_contact_force_jacobians(
+    model: Model, state: State, A_pos: nparray | None, A_vel: nparray | None, scale_pos=1.0, scale_vel=1.0
+) -> None:
+    """
+    Evaluate the particle contact force jacobians with respect to the position and the velocity,
+    and accumulate them into the given arrays.
+
+    This is to compute A_pos = A_pos + scale_pos * (partial F / partial q), and
+    A_vel = A_vel + scale_vel * (partial F / partial dot[q]).
+
+    Args:
+        model: Model
+        state: State
+        A_pos: nparray, shape (particle_countx3, particle_countx3): output array for the position jacobians
+               (skipped if None)
+        A_vel: nparray, shape (particle_countx3, particle_countx3): output array for the velocity jacobians
+               (skipped if None)
+        scale_pos: float: the scalar to scale the position jacobian before adding to A_pos
+        scale_vel: float: the scalar to scale the velocity jacobian before adding to A_vel
+    """
+    # the clamped contacts exert no force, whatever the state
+    i, j = _pushing_particle_contacts(model, state)
+    if len(i) == 0:
+        return
+    Kq, Kv = _pair_jacobians(state, i, j, *_particle_contact_params(model, i, j))
+    if A_pos is not None:
+        _scatter_pair_jacobians(model, A_pos, i, j, Kq, scale_pos)
+    if A_vel is not None:
+        _scatter_pair_jacobians(model, A_vel, i, j, Kv, scale_vel)
+
+
+def find_ground_contacts(model: Model, state: State) -> tuple[nparray, nparray, nparray]:
+    """
+    Find the active particles penetrating the ground plane, i.e., particles whose distance to the
+    ground is less than their radius.
+
+    Returns:
+        tuple[nparray, nparray, nparray]: the up vector, the indices of the penetrating particles
+        and their penetration depths
+    """
+    up = np.array(model.up_axis.to_vector(), dtype=state.particle_q.dtype)
+    depth = model.particle_radius - (state.particle_q @ up - model.ground_height)
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    idx = np.nonzero((depth > 0) & active)[0]
+    return up, idx, depth[idx]
+
+
+def _pushing_ground_contacts(model: Model, state: State) -> tuple[nparray, nparray]:
+    """Return the up vector and the indices of the ground contacts whose normal force is not clamped to zero."""
+    up, idx, depth = find_ground_contacts(model, state)
+    fn = model.ground_ke * depth - model.ground_kd * (state.particle_qd[idx] @ up)
+    return up, idx[fn > 0]
+
+
+def eval_ground_contact_forces(model: Model, state: State) -> None:
+    """
+    Evaluate the penalty forces between the particles and the ground plane, and store the forces
+    in `state.particle_f`
+
+    A particle penetrating the ground by a depth d is pushed along the up axis with the force
+    `max(ground_ke * d - ground_kd * (v . up), 0)`: the damping never pulls a particle leaving
+    the ground back into it.
+    """
+    if model.ground_ke <= 0 or model.particle_count == 0:
+        return
+    up, idx, depth = find_ground_contacts(model, state)
+    fn = np.maximum(model.ground_ke * depth - model.ground_kd * (state.particle_qd[idx] @ up), 0.0)
+    state.particle_f[idx] += fn[:, None] * up
+
+
+def eval_ground_contact_force_pos_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
+    """
+    Evaluate the ground contact force jacobians with respect to the position,
+    and accumulate the jacobians into the given array A.
+
+    This is to compute A = A + scale * (partial F / partial q)
+    """
+    if model.ground_ke <= 0 or model.particle_count == 0:
+        return
+    # the clamped contacts exert no force, whatever the position
+    up, idx = _pushing_ground_contacts(model, state)
+    K = -(scale * model.ground_ke) * np.outer(up, up)
+    _add_blocks(A, idx, idx, np.broadcast_to(K, (len(idx), 3, 3)))
+
+
+def eval_ground_contact_force_vel_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
+    """
+    Evaluate the ground contact force jacobians with respect to the velocity,
+    and accumulate the jacobians into the given array A.
+
+    This is to compute A = A + scale * (partial F / partial dot[q])
+    """
+    if model.ground_ke <= 0 or model.ground_kd <= 0 or model.particle_count == 0:
+        return
+    up, idx = _pushing_ground_contacts(model, state)
+    B = -(scale * model.ground_kd) * np.outer(up, up)
+    _add_blocks(A, idx, idx, np.broadcast_to(B, (len(idx), 3, 3)))
+
+
+def eval_contact_forces(model: Model, state: State) -> None:
+    """
+    Evaluate all the contact forces (ground and particle-particle) of the given model,
+    and store the forces in `state.particle_f`
+    """
+    eval_ground_contact_forces(model, state)
+    if model.particle_ke > 0:
+        eval_particle_contact_forces(model, state)
 
 
 def eval_all_forces(model: Model, state: State) -> None:
@@ -222,6 +486,7 @@ def eval_all_forces(model: Model, state: State) -> None:
     eval_spring_forces(model, state)
     eval_gravitational_forces(model, state)
     eval_drag_forces(model, state)
+    eval_contact_forces(model, state)
 
 
 def eval_all_force_pos_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -234,11 +499,15 @@ def eval_all_force_pos_jacobians(model: Model, state: State, A: nparray, scale:
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         scale: float: the scalar to scale the Jacobian before adding to A
     """
     eval_spring_force_pos_jacobians(model, state, A, scale=scale)
     eval_gravitational_force_pos_jacobians(model, state, A, scale=scale)
+    eval_ground_contact_force_pos_jacobians(model, state, A, scale=scale)
+    if model.particle_ke > 0:
+        eval_particle_contact_force_jacobians(model, state, A, None, scale_pos=scale)
 
 
 def eval_all_force_vel_jacobians(model: Model, state: State, A: nparray, scale: float = 1.0) -> None:
@@ -251,8 +520,12 @@ def eval_all_force_vel_jacobians(model: Model, state: State, A: nparray, scale:
     Args:
         model: Model
         state: State
-        A: nparray, shape (particle_countx3, particle_countx3): output array for the jacobians
+        A: nparray, shape (particle_countx3, particle_countx3), BlockBandedMatrix or BlockDiagonalMatrix:
+           output array for the jacobians
         scale: float: the scalar to scale the Jacobian before adding to A
     """
     eval_spring_force_vel_jacobians(model, state, A, scale=scale)
     eval_drag_force_vel_jacobians(model, state, A, scale=scale)
+    eval_ground_contact_force_vel_jacobians(model, state, A, scale=scale)
+    if model.particle_ke > 0 and model.particle_kd > 0:
+        eval_particle_contact_force_jacobians(model, state, None, A, scale_vel=scale)
@@ -0,0 +1,208 @@
+import numpy as np
+
+from ..core.types import nparray
+
+
+def color_edges(edges: nparray, vertex_count: int, seed: int = 0) -> nparray:
+    """
+    Color the edges of a graph so that edges of the same color don't share a vertex.
+
+    Each color is built as a maximal matching of the not yet colored edges. A matching is
+    grown in rounds: in every round, each edge whose (random) priority is the smallest among
+    the remaining edges at both of its vertices joins the matching. All rounds are whole-array
+    NumPy operations. The number of colors is close to the maximal vertex degree for the
+    meshes and chains built by :class:`ModelBuilder`.
+
+    Args:
+        edges: nparray, shape (edge_count, 2), int: the vertex indices of the edges
+        vertex_count: the number of vertices
+        seed: seed of the random edge priorities
+
+    Returns:
+        nparray, shape (edge_count,), int32: the color of each edge
+    """
+    edge_count = len(edges)
+    colors = np.full(edge_count, -1, dtype=np.int32)
+    if edge_count == 0:
+        return colors
+    # 32-bit indices halve the memory traffic of the gathers and scatters below
+    edges = np.asarray(edges, dtype=np.int32)
+    priority = np.random.default_rng(seed).permutation(edge_count).astype(np.int32)
+    # self loops can't be colored consistently; give them a color of their own
+    loops = edges[:, 0] == edges[:, 1]
+    # the uncolored edges: their indices, vertices and priorities, compacted after each color
+    uncolored = np.nonzero(~loops)[0].astype(np.int32)
+    u_a, u_b, u_p = edges[uncolored, 0], edges[uncolored, 1], priority[uncolored]
+    # per-vertex work arrays, reset only at the touched vertices to avoid O(vertex_count) work per round
+    best = np.full(vertex_count, edge_count, dtype=np.int32)
+    used = np.zeros(vertex_count, dtype=bool)
+    color = 0
+    while len(uncolored) > 0:
+        cand, a, b, p = uncolored, u_a, u_b, u_p
+        while len(cand) > 0:
+            np.minimum.at(best, a, p)
+            np.minimum.at(best, b, p)
+            win = (best[a] == p) & (best[b] == p)
+            best[a] = edge_count
+            best[b] = edge_count
+            colors[cand[win]] = color
+            used[a[win]] = True
+            used[b[win]] = True
+            # edges touching a matched vertex can't join this color anymore
+            rest = ~(used[a] | used[b])
+            cand, a, b, p = cand[rest], a[rest], b[rest], p[rest]
+        used[u_a] = False
+        used[u_b] = False
+        rest = colors[uncolored] < 0
+        uncolored, u_a, u_b, u_p = uncolored[rest], u_a[rest], u_b[rest], u_p[rest]
+        color += 1
+    colors[loops] = color + np.arange(np.count_nonzero(loops), dtype=np.int32)
+    return colors
+
+
+def color_groups(colors: nparray) -> list[nparray]:
+    """
+    Group the element indices by their colors.
+
+    Args:
+        colors: nparray, shape (element_count,), int: the color of each element
+
+    Returns:
+        list[nparray]: the indices of the elements of each color, in ascending color order
+    """
+    if len(colors) == 0:
+        return []
+    order = np.argsort(colors, kind="stable")
+    bounds = np.searchsorted(colors[order], np.arange(colors.max() + 2))
+    return [order[bounds[c] : bounds[c + 1]] for c in range(len(bounds) - 1)]
+
+
+def adjacency(edges: nparray, vertex_count: int) -> tuple[nparray, nparray]:
+    """
+    Build the adjacency lists of an undirected graph in compressed sparse row (CSR) format.
+
+    Args:
+        edges: nparray, shape (edge_count, 2), int: the vertex indices of the edges
+        vertex_count: the number of vertices
+
+    Returns:
+        tuple[nparray, nparray]: (offsets, neighbors), where the neighbors of vertex v are
+        `neighbors[offsets[v] : offsets[v + 1]]`
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    src = np.concatenate([edges[:, 0], edges[:, 1]])
+    dst = np.concatenate([edges[:, 1], edges[:, 0]])
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    # drop duplicated edges
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst = src[keep], dst[keep]
+    offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=vertex_count), out=offsets[1:])
+    return offsets, dst
+
+
+def _bfs_levels(offsets: nparray, neighbors: nparray, degree: nparray, start: int, visited: nparray) -> list[nparray]:
+    """Breadth-first search from `start`, visiting the neighbors of each vertex in the order of increasing degree.
+
+    Marks the reached vertices in `visited` and returns the vertices of each BFS level in visiting order.
+    """
+    levels = [np.array([start], dtype=np.int64)]
+    visited[start] = True
+    frontier = levels[0]
+    while True:
+        cnt = offsets[frontier + 1] - offsets[frontier]
+        total = int(cnt.sum())
+        if total == 0:
+            break
+        first = np.repeat(offsets[frontier] - (np.cumsum(cnt) - cnt), cnt)
+        nbrs = neighbors[first + np.arange(total)]
+        parent = np.repeat(np.arange(len(frontier)), cnt)
+        fresh = ~visited[nbrs]
+        nbrs, parent = nbrs[fresh], parent[fresh]
+        if len(nbrs) == 0:
+            break
+        # order by parent position, then by degree; keep the first occurrence of each vertex
+        order = np.lexsort((degree[nbrs], parent))
+        nbrs = nbrs[order]
+        _, first_idx = np.unique(nbrs, return_index=True)
+        frontier = nbrs[np.sort(first_idx)]
+        visited[frontier] = True
+        levels.append(frontier)
+    return levels
+
+
+def reverse_cuthill_mckee(edges: nparray, vertex_count: int) -> nparray:
+    """
+    Compute the reverse Cuthill-McKee ordering of a graph, which reduces the bandwidth of
+    its adjacency matrix.
+
+    Each connected component is traversed breadth-first from a pseudo-peripheral vertex,
+    and the components are placed one after another. Each BFS level is processed with
+    whole-array NumPy operations.
+
+    Args:
+        edges: nparray, shape (edge_count, 2), int: the vertex indices of the edges
+        vertex_count: the number of vertices
+
+    Returns:
+        nparray, shape (vertex_count,), int: the permutation, i.e., the old index of each new vertex
+    """
+    offsets, neighbors = adjacency(edges, vertex_count)
+    degree = np.diff(offsets)
+    # isolated vertices form trivial components
+    visited = degree == 0
+    order = [np.nonzero(visited)[0]]
+    for start in np.argsort(degree, kind="stable")[np.count_nonzero(visited) :]:
+        if visited[start]:
+            continue
+        # find a pseudo-peripheral vertex: the minimal-degree vertex of the last BFS level
+        probe = visited.copy()
+        last = _bfs_levels(offsets, neighbors, degree, int(start), probe)[-1]
+        root = int(last[np.argmin(degree[last])])
+        order.extend(_bfs_levels(offsets, neighbors, degree, root, visited))
+    return np.concatenate(order)[::-1].copy()
+
+
+def bandwidth(edges: nparray) -> int:
+    """The bandwidth of the adjacency matrix of a graph, i.e., the maximal |i - j| over all edges (i, j)."""
+    edges = np.asarray(edges).reshape(-1, 2)
+    return int(np.abs(edges[:, 0].astype(np.int64) - edges[:, 1]).max()) if len(edges) else 0
+
+
+def connected_components(edges: nparray, vertex_count: int) -> tuple[int, nparray]:
+    """
+    Find the connected components of an undirected graph.
+
+    The components are found by vectorized hooking and pointer jumping: in every round, the root
+    of each edge's larger label is hooked onto the smaller label, and the labels are then
+    compressed until every vertex points to a root. The number of rounds grows with the logarithm
+    of the component sizes for the chains and meshes built by :class:`ModelBuilder`.
+
+    Args:
+        edges: nparray, shape (edge_count, 2), int: the vertex indices of the edges
+        vertex_count: the number of vertices
+
+    Returns:
+        tuple[int, nparray]: the number of components, and the component of each vertex
+        (shape (vertex_count,), int), numbered in the order of their smallest vertex
+    """
+    label = np.arange(vertex_count)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    while len(edges) > 0:
+        lu, lv = label[edges[:, 0]], label[edges[:, 1]]
+        diff = lu != lv
+        edges, lu, lv = edges[diff], lu[diff], lv[diff]
+        if len(edges) == 0:
+            break
+        # labels are roots here; hooking onto smaller labels can't create cycles
+        np.minimum.at(label, np.maximum(lu, lv), np.minimum(lu, lv))
+        while True:
+            jumped = label[label]
+            if np.array_equal(jumped, label):
+                break
+            label = jumped
+    roots, component = np.unique(label, return_inverse=True)
+    return len(roots), component
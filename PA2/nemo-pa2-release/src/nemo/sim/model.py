@@ -1,11 +1,33 @@
 import numpy as np
 
 from ..core.types import Axis, nparray
-from .state import State
+from ..geometry import HashGrid, ParticleFlags
+from .state import State, StatePool
 
 
 class Model:
+    FLOAT_ARRAYS = (
+        "gravity",
+        "particle_q",
+        "particle_qd",
+        "particle_mass",
+        "particle_inv_mass",
+        "particle_radius",
+        "particle_drag",
+        "spring_rest_length",
+        "spring_stiffness",
+        "spring_damping",
+        "gravitational_constant",
+    )
+    """Names of the floating-point arrays, which are stored in the precision :attr:`dtype`."""
+
     def __init__(self):
+        self.dtype = np.float64
+        """Floating-point type of the model arrays and of its states, np.float64 or np.float32.
+        Float32 halves the memory traffic of the force evaluation and of the explicit solvers,
+        which bounds the speed of large scenes. The implicit solvers still assemble and solve
+        their linear systems in float64."""
+
         self.gravity = np.zeros(3, dtype=np.float64)
         """gravitational constant, which could be along any direction."""
 
@@ -27,6 +49,12 @@ class Model:
         """Particle enabled state, shape [particle_count], int."""
         self.particle_drag: nparray | None = None
         """Particle drag coefficient, shape [particle_count], float."""
+        self.particle_permutation: nparray | None = None
+        """Original particle ID (the order in which the particle was added to the builder) of each particle,
+        shape [particle_count], int. This is the identity unless the particles were reordered by
+        :meth:`ModelBuilder.finalize`."""
+        self.particle_inverse_permutation: nparray | None = None
+        """Particle index of each original particle ID, shape [particle_count], int."""
 
         self.spring_indices: nparray | None = None
         """Particle spring indices, shape [spring_count, 2], int."""
@@ -36,12 +64,56 @@ class Model:
         """Particle spring stiffness, shape [spring_count], float."""
         self.spring_damping: nparray | None = None
         """Particle spring damping, shape [spring_count], float."""
+        self.spring_colors: nparray | None = None
+        """Spring colors, shape [spring_count], int. Springs of the same color don't share any particle."""
+        self.spring_color_groups: list[nparray] | None = None
+        """Indices of the springs of each color, a list of int arrays (one per color)."""
+        self.spring_active: nparray | None = None
+        """Indices of the springs attached to at least one active particle, or None if all springs are.
+        Springs between inactive (fixed or sleeping) particles don't affect the simulation and are
+        skipped by the force evaluation (see :meth:`update_active_springs`)."""
+
+        self.component_count = 0
+        """Number of connected components of the particles (see :attr:`particle_component`)."""
+        self.particle_component: nparray | None = None
+        """Connected component of each particle, shape [particle_count], int. Particles of different
+        components don't interact through springs or gravitational pairs. Fixed particles don't
+        connect components (they pass on no motion) and each form a component of their own."""
 
         self.gravitational_pairs: nparray | None = None
         """Gravitational pairs, shape [gravitational_count, 2], int."""
         self.gravitational_constant: nparray | None = None
         """Gravitational constant, shape [gravitational_count], float."""
 
+        self.particle_ke = 0.0
+        """Particle-particle contact stiffness. Zero disables particle-particle contacts."""
+        self.particle_kd = 0.0
+        """Particle-particle contact damping."""
+        self.particle_max_radius = 0.0
+        """Maximum particle radius, used to size the cells of :attr:`particle_grid`."""
+        self.particle_grid: HashGrid | None = None
+        """Spatial hash grid for finding particle-particle contacts; None if these contacts are disabled."""
+
+        self.ground_ke = 0.0
+        """Ground contact stiffness. Zero disables ground contacts."""
+        self.ground_kd = 0.0
+        """Ground contact damping."""
+        self.ground_height = 0.0
+        """Height of the ground plane along the up axis."""
+
+        self.self_collision_thickness = 0.0
+        """Minimal separation between spring segments. Zero disables self-collisions (see :class:`SelfCollision`)."""
+
+        self.sleep_window = 0
+        """Number of consecutive resting steps after which a particle island falls asleep.
+        Zero disables sleeping (see :class:`Sleeping`)."""
+        self.sleep_velocity_threshold = 0.0
+        """Maximal particle speed of a resting island."""
+        self.sleep_force_threshold = 0.0
+        """Maximal net force on a particle of a resting island."""
+
+        self._state_pool: StatePool | None = None
+
     @property
     def spring_count(self) -> int:
         """
@@ -49,6 +121,16 @@ class Model:
         """
         return 0 if self.spring_rest_length is None else len(self.spring_rest_length)
 
+    @property
+    def state_pool(self) -> StatePool:
+        """
+        The pool of reusable temporary states of this model (e.g., for the intermediate states of
+        the solvers), created on first use.
+        """
+        if self._state_pool is None:
+            self._state_pool = StatePool(self.particle_count, self.dtype)
+        return self._state_pool
+
     @property
     def gravitational_count(self) -> int:
         """
@@ -56,11 +138,40 @@ class Model:
         """
         return 0 if self.gravitational_constant is None else len(self.gravitational_constant)
 
+    def particle_index(self, particle_id):
+        """
+        Map original particle IDs (the order in which particles were added to the builder, as
+        used in scene files) to the particle indices of this model.
+
+        Args:
+            particle_id: an ID or an array of IDs
+
+        Returns:
+            The particle index (or indices) in the model's arrays.
+        """
+        if self.particle_inverse_permutation is None:
+            return particle_id
+        idx = self.particle_inverse_permutation[particle_id]
+        return int(idx) if np.ndim(idx) == 0 else idx
+
+    def update_active_springs(self) -> None:
+        """
+        Update :attr:`spring_active` after the ACTIVE flags in :attr:`particle_flags` changed.
+        """
+        if self.spring_count == 0:
+            self.spring_active = None
+            return
+        active = self.particle_flags & ParticleFlags.ACTIVE.value != 0
+        attached = active[self.spring_indices[:, 0]] | active[self.spring_indices[:, 1]]
+        self.spring_active = None if np.all(attached) else np.nonzero(attached)[0]
+
     def state(self) -> State:
-        s = State()
+        """
+        Create a state holding the initial particle positions and velocities, in the precision :attr:`dtype`.
+        """
+        s = State(self.particle_count, self.dtype)
         # particles
         if self.particle_count:
-            s.particle_q = self.particle_q.copy()
-            s.particle_qd = self.particle_qd.copy()
-            s.particle_f = np.zeros_like(self.particle_qd)
+            s.particle_q = self.particle_q
+            s.particle_qd = self.particle_qd
         return s
@@ -0,0 +1,68 @@
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Threads:
+    """The threading settings of the module: the number of threads and the pool (created on first use)."""
+
+    def __init__(self):
+        self.count = 1
+        self.pool: ThreadPoolExecutor | None = None
+
+
+_threads = _Threads()
+
+MIN_CHUNK_SIZE = 4096
+"""Minimal number of elements processed by one task; smaller workloads are not split."""
+
+
+def set_num_threads(n: int | None) -> None:
+    """
+    Set the number of threads used to evaluate forces.
+
+    Args:
+        n: the number of threads. If None, the number of CPUs is used. One disables multi-threading.
+    """
+    if n is None:
+        n = os.cpu_count() or 1
+    if n < 1:
+        raise RuntimeError(f"Number of threads ({n}) must be positive")
+    if n != _threads.count and _threads.pool is not None:
+        _threads.pool.shutdown()
+        _threads.pool = None
+    _threads.count = n
+
+
+def get_num_threads() -> int:
+    """The number of threads used to evaluate forces."""
+    return _threads.count
+
+
+def parallel_for(fn: Callable[[slice], None], count: int, min_chunk_size: int | None = None) -> None:
+    """
+    Call `fn` on contiguous chunks covering the range [0, count) using the thread pool,
+    and wait for all the calls to finish.
+
+    The work is only split if multiple threads are enabled and `count` is large enough.
+    `fn` is expected to spend most of its time in NumPy operations that release the GIL.
+
+    Args:
+        fn: the function to call on each chunk
+        count: the number of elements
+        min_chunk_size: the minimal number of elements per chunk (default :data:`MIN_CHUNK_SIZE`);
+            use a small value for expensive elements (e.g., a linear solve per element)
+    """
+    chunks = min(_threads.count, count // (MIN_CHUNK_SIZE if min_chunk_size is None else min_chunk_size))
+    if chunks <= 1:
+        fn(slice(0, count))
+        return
+    if _threads.pool is None:
+        _threads.pool = ThreadPoolExecutor(max_workers=_threads.count, thread_name_prefix="nemo")
+    bounds = [count * k // chunks for k in range(chunks + 1)]
+    _wait(_threads.pool.submit(fn, slice(bounds[k], bounds[k + 1])) for k in range(chunks))
+
+
+def _wait(futures: Iterable) -> None:
+    for f in list(futures):
+        f.result()
@@ -0,0 +1,165 @@
+import numpy as np
+
+from ..core.types import nparray
+from ..geometry import BVH, ParticleFlags
+from .model import Model
+from .state import State
+
+
+def closest_points_segments(p0: nparray, p1: nparray, q0: nparray, q1: nparray) -> tuple[nparray, nparray]:
+    """
+    Compute the closest points between pairs of segments (p0, p1) and (q0, q1).
+
+    Args:
+        p0, p1: nparray, shape (pair_count, 3): the end points of the first segments
+        q0, q1: nparray, shape (pair_count, 3): the end points of the second segments
+
+    Returns:
+        tuple[nparray, nparray]: the parameters (s, t) in [0, 1] of the closest points
+        p0 + s * (p1 - p0) and q0 + t * (q1 - q0), each of shape (pair_count,)
+    """
+    d1 = p1 - p0
+    d2 = q1 - q0
+    r = p0 - q0
+    a = np.einsum("ij,ij->i", d1, d1)
+    e = np.einsum("ij,ij->i", d2, d2)
+    f = np.einsum("ij,ij->i", d2, r)
+    c = np.einsum("ij,ij->i", d1, r)
+    b = np.einsum("ij,ij->i", d1, d2)
+    eps = 1e-14
+    denom = a * e - b * b
+    # closest point on the infinite lines (or s=0 for parallel segments), clamped to the first segment
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.where(denom > eps, denom, 1.0), 0.0, 1.0), 0.0)
+    s = np.where(a > eps, s, 0.0)
+    t = (b * s + f) / np.where(e > eps, e, 1.0)
+    # if t is outside of the second segment, clamp t and recompute s
+    t_clamped = np.clip(t, 0.0, 1.0)
+    s = np.where((t != t_clamped) & (a > eps), np.clip((b * t_clamped - c) / np.where(a > eps, a, 1.0), 0.0, 1.0), s)
+    t = np.where(e > eps, t_clamped, 0.0)
+    # degenerated second segment (a point)
+    s = np.where((e <= eps) & (a > eps), np.clip(-c / np.where(a > eps, a, 1.0), 0.0, 1.0), s)
+    return s, t
+
+
+class SelfCollision:
+    """Self-collision handling between the spring segments of a model (e.g., a cloth).
+
+    This is a post-processing stage applied after a solver step. It treats every spring as a
+    segment between its two particles and maintains a :class:`nemo.geometry.BVH` over the
+    segments' swept bounds, which is built once and refit at every step. For each pair of
+    nearby segments (not sharing a particle) it checks
+
+    - proximity: the segments are closer than :attr:`thickness` at the end of the step;
+    - crossing (a conservative continuous check for fast moving particles): the direction
+      between the closest points of the two segments flips during the step, meaning that
+      the segments passed through each other.
+
+    Colliding pairs receive inelastic impulses along the collision normal that restore the
+    separation :attr:`thickness` at the end of the step. The impulses of all pairs are computed
+    in one vectorized pass and averaged per particle. Fixed and sleeping particles (see
+    :class:`Sleeping`) have an infinite mass and receive no impulse.
+    """
+
+    def __init__(self, model: Model, thickness: float):
+        """
+        Args:
+            model: the simulated model
+            thickness: the minimal separation between spring segments
+        """
+        if thickness <= 0:
+            raise RuntimeError(f"Self-collision thickness ({thickness}) must be positive")
+        self.model = model
+        self.thickness = thickness
+        """Minimal separation between spring segments."""
+        self.collision_count = 0
+        """Number of colliding segment pairs found in the last call of :meth:`apply`."""
+
+        self._flags: nparray | None = None
+        self._inv_mass = np.zeros(model.particle_count)
+        self._update_flags()
+        self._bvh: BVH | None = None
+        if model.spring_count > 0:
+            self._bvh = BVH(*self._segment_bounds(model.particle_q, model.particle_q))
+
+    def _update_flags(self) -> None:
+        """Update the inverse masses after the particle flags changed (e.g., when particles fall asleep)."""
+        flags = self.model.particle_flags
+        if self._flags is not None and np.array_equal(flags, self._flags):
+            return
+        self._flags = flags.copy()
+        self._inv_mass[:] = np.where(flags & ParticleFlags.ACTIVE.value != 0, self.model.particle_inv_mass, 0.0)
+
+    def _segment_bounds(self, q0: nparray, q1: nparray) -> tuple[nparray, nparray]:
+        """Bounds of the segments swept from q0 to q1, inflated by the thickness."""
+        idx = self.model.spring_indices
+        pts = np.stack([q0[idx[:, 0]], q0[idx[:, 1]], q1[idx[:, 0]], q1[idx[:, 1]]])
+        return pts.min(axis=0) - self.thickness, pts.max(axis=0) + self.thickness
+
+    def apply(self, state_in: State, state_out: State, dt: float) -> None:
+        """
+        Resolve the self-collisions that occur while stepping from `state_in` to `state_out`.
+
+        The velocities and positions of the colliding particles in `state_out` are modified in place.
+
+        Args:
+            state_in: the state at the beginning of the step
+            state_out: the state at the end of the step (as computed by a solver)
+            dt: the timestep size
+        """
+        self.collision_count = 0
+        if self._bvh is None:
+            return
+        x0, x1 = state_in.particle_q, state_out.particle_q
+        self._bvh.refit(*self._segment_bounds(x0, x1))
+        sa, sb = self._bvh.query_self_pairs()
+        idx = self.model.spring_indices
+        a0, a1, b0, b1 = idx[sa, 0], idx[sa, 1], idx[sb, 0], idx[sb, 1]
+        # segments sharing a particle are always in contact
+        keep = (a0 != b0) & (a0 != b1) & (a1 != b0) & (a1 != b1)
+        a0, a1, b0, b1 = a0[keep], a1[keep], b0[keep], b1[keep]
+        if len(a0) == 0:
+            return
+        self._update_flags()
+
+        def gap(x):
+            s, t = closest_points_segments(x[a0], x[a1], x[b0], x[b1])
+            d = (x[a0] + s[:, None] * (x[a1] - x[a0])) - (x[b0] + t[:, None] * (x[b1] - x[b0]))
+            return s, t, d
+
+        _, _, d0 = gap(x0)
+        s, t, d1 = gap(x1)
+        crossed = np.einsum("ij,ij->i", d0, d1) < 0.0
+        dist1 = np.linalg.norm(d1, axis=1)
+        hit = crossed | (dist1 < self.thickness)
+        if not np.any(hit):
+            return
+        a0, a1, b0, b1, s, t = a0[hit], a1[hit], b0[hit], b1[hit], s[hit], t[hit]
+        d0, d1, crossed = d0[hit], d1[hit], crossed[hit]
+        self.collision_count = len(a0)
+
+        # collision normal (pointing from segment b to segment a): the direction before
+        # the step for crossed segments, the current direction otherwise
+        n = np.where(crossed[:, None], d0, d1)
+        nrm = np.linalg.norm(n, axis=1)
+        ok = nrm > 1e-12
+        n = n / np.where(ok, nrm, 1.0)[:, None]
+        # required change of the separation along the normal
+        sep = np.einsum("ij,ij->i", d1, n)
+        delta = np.where(ok, self.thickness - sep, 0.0)
+
+        # distribute the impulse onto the four particles with their barycentric weights
+        particles = np.stack([a0, a1, b0, b1], axis=1)
+        w = np.stack([1.0 - s, s, -(1.0 - t), -t], axis=1)
+        wim = w * self._inv_mass[particles]
+        denom = np.einsum("ij,ij->i", w, wim)
+        J = np.where(denom > 1e-12, delta / np.where(denom > 1e-12, denom, 1.0), 0.0)
+        dx = (wim * J[:, None])[:, :, None] * n[:, None, :]
+
+        corr = np.zeros_like(x1)
+        cnt = np.zeros(len(x1))
+        np.add.at(corr, particles.reshape(-1), dx.reshape(-1, 3))
+        np.add.at(cnt, particles.reshape(-1), (wim != 0).reshape(-1))
+        moved = cnt > 0
+        corr[moved] /= cnt[moved, None]
+        state_out.particle_q[moved] += corr[moved]
+        state_out.particle_qd[moved] += corr[moved] / dt
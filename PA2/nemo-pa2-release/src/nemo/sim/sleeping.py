@@ -0,0 +1,149 @@
+import numpy as np
+
+from ..core.types import nparray
+from ..geometry import ParticleFlags
+from .forces import find_particle_contacts
+from .model import Model
+from .state import State
+
+
+class Sleeping:
+    """Deactivation (sleeping) of islands of resting particles.
+
+    An island is a connected component of the particles coupled by springs and gravitational
+    pairs (see `Model.particle_component`); fixed particles belong to no island. This is a
+    post-processing stage applied after a solver step (like :class:`SelfCollision`).
+
+    An island whose particles all stay below :attr:`velocity_threshold` and
+    :attr:`force_threshold` for :attr:`window` consecutive steps falls asleep. Its velocities are
+    zeroed, and the ACTIVE flags of its particles are replaced by the SLEEPING flag. Solvers and
+    force evaluation then treat the island like fixed particles, and its springs are skipped (see
+    `Model.spring_active`). The net force on a particle is estimated from its velocity change
+    during the step, i.e., ``m * |v_out - v_in| / dt``.
+
+    A sleeping island wakes up when
+
+    - one of its particles is moved by something other than the solver (e.g., a script changing
+      the state),
+    - an awake particle comes into contact with one of its particles, or
+    - :meth:`wake` is called, e.g., before an external force is applied to its particles.
+    """
+
+    def __init__(self, model: Model, velocity_threshold: float, force_threshold: float, window: int):
+        """
+        Args:
+            model: the simulated model
+            velocity_threshold: the maximal speed of the particles of a resting island
+            force_threshold: the maximal net force on the particles of a resting island
+            window: the number of consecutive resting steps after which an island falls asleep
+        """
+        if window < 1:
+            raise RuntimeError(f"Sleep window ({window}) must be positive")
+        if velocity_threshold < 0 or force_threshold < 0:
+            raise RuntimeError(
+                f"Sleep thresholds must be non-negative: velocity={velocity_threshold}, force={force_threshold}"
+            )
+        self.model = model
+        self.velocity_threshold = velocity_threshold
+        """Maximal particle speed of a resting island."""
+        self.force_threshold = force_threshold
+        """Maximal net force on a particle of a resting island."""
+        self.window = window
+        """Number of consecutive resting steps after which an island falls asleep."""
+
+        # the islands are the components of the model without the fixed particles
+        flags = model.particle_flags
+        simulated = flags & (ParticleFlags.ACTIVE.value | ParticleFlags.SLEEPING.value) != 0
+        _, labels = np.unique(model.particle_component[simulated], return_inverse=True)
+        self.island = np.full(model.particle_count, -1, dtype=np.int64)
+        """Island of each particle, shape [particle_count], int; -1 for fixed particles."""
+        self.island[simulated] = labels
+        self.island_count = int(labels.max()) + 1 if len(labels) else 0
+        """Number of islands."""
+        self.asleep = np.zeros(self.island_count, dtype=bool)
+        """Whether each island is asleep, shape [island_count], bool."""
+        self.asleep[self.island[flags & ParticleFlags.SLEEPING.value != 0]] = True
+
+        self._member = simulated
+        self._calm_steps = np.zeros(self.island_count, dtype=np.int64)
+        self._rest_q = model.particle_q.copy()
+
+    @property
+    def sleeping_count(self) -> int:
+        """The number of sleeping particles."""
+        return int(np.count_nonzero(self.model.particle_flags & ParticleFlags.SLEEPING.value))
+
+    def _particles(self, islands: nparray) -> nparray:
+        """The particles belonging to the given islands (a boolean mask over the islands)."""
+        return self._member & islands[np.maximum(self.island, 0)]
+
+    def update(self, state_in: State, state_out: State, dt: float) -> None:
+        """
+        Wake up the perturbed sleeping islands and put the resting islands to sleep after a step
+        from `state_in` to `state_out`.
+
+        The velocities of the islands falling asleep are zeroed in `state_out`.
+
+        Args:
+            state_in: the state at the beginning of the step
+            state_out: the state at the end of the step (as computed by a solver)
+            dt: the timestep size
+        """
+        if self.island_count == 0:
+            return
+        if np.any(self.asleep):
+            self._wake_perturbed(state_out)
+
+        # islands with a particle that is still moving (or accelerating) are restless
+        awake = self._particles(~self.asleep)
+        speed = np.linalg.norm(state_out.particle_qd, axis=1)
+        force = self.model.particle_mass * np.linalg.norm(state_out.particle_qd - state_in.particle_qd, axis=1) / dt
+        moving = awake & ((speed > self.velocity_threshold) | (force > self.force_threshold))
+        restless = np.zeros(self.island_count, dtype=bool)
+        restless[self.island[moving]] = True
+        self._calm_steps = np.where(restless | self.asleep, 0, self._calm_steps + 1)
+
+        falling = ~self.asleep & (self._calm_steps >= self.window)
+        if np.any(falling):
+            p = self._particles(falling)
+            flags = self.model.particle_flags
+            flags[p] = (flags[p] & ~ParticleFlags.ACTIVE.value) | ParticleFlags.SLEEPING.value
+            state_out.particle_qd[p] = 0.0
+            self._rest_q[p] = state_out.particle_q[p]
+            self.asleep |= falling
+            self.model.update_active_springs()
+
+    def _wake_perturbed(self, state: State) -> None:
+        sleeping = self._particles(self.asleep)
+        moved = sleeping & (np.any(state.particle_q != self._rest_q, axis=1) | np.any(state.particle_qd != 0.0, axis=1))
+        waking = np.zeros(self.island_count, dtype=bool)
+        waking[self.island[moved]] = True
+        if self.model.particle_ke > 0:
+            # contacts between sleeping and awake particles
+            i, j = find_particle_contacts(self.model, state)
+            active = self.model.particle_flags & ParticleFlags.ACTIVE.value != 0
+            waking[self.island[i[sleeping[i] & active[j]]]] = True
+            waking[self.island[j[sleeping[j] & active[i]]]] = True
+        self._wake_islands(waking & self.asleep)
+
+    def _wake_islands(self, islands: nparray) -> None:
+        if not np.any(islands):
+            return
+        p = self._particles(islands)
+        flags = self.model.particle_flags
+        flags[p] = (flags[p] | ParticleFlags.ACTIVE.value) & ~ParticleFlags.SLEEPING.value
+        self.asleep &= ~islands
+        self._calm_steps[islands] = 0
+        self.model.update_active_springs()
+
+    def wake(self, particles) -> None:
+        """
+        Wake up the islands of the given particles (e.g., before applying external forces to them).
+
+        Args:
+            particles: a particle index or an array of particle indices
+        """
+        islands = self.island[np.atleast_1d(particles)]
+        waking = np.zeros(self.island_count, dtype=bool)
+        waking[islands[islands >= 0]] = True
+        self._wake_islands(waking & self.asleep)
@@ -1,26 +1,145 @@
+import numpy as np
+
 from ..core.types import nparray
 
 
 class State:
-    def __init__(self) -> None:
+    """The time-varying simulation data (particle positions, velocities and forces).
+
+    All the arrays of a state are views into a single contiguous :attr:`buffer` of shape
+    (3, particle_count, 3), one (particle_count, 3) slab per array (structure of arrays). So a
+    state is a single allocation, :meth:`copy_from` copies it with a single ``memcpy``, and
+    :meth:`swap` exchanges the data of two states in O(1). The arrays can be handed to the viewer
+    or to trajectory writers without copying.
+
+    Assigning to an array attribute (e.g., ``state.particle_q = q``) copies the values into the
+    buffer, so the views (and any references to them, e.g., held by the viewer) stay valid.
+    """
+
+    __slots__ = ("_particle_f", "_particle_q", "_particle_qd", "buffer")
+
+    def __init__(self, particle_count: int = 0, dtype=np.float64) -> None:
         """
-        Initialize an empty State object.
-        To ensure that the attributes are properly allocated create the State object via :meth:`newton.Model.state`
-        instead.
+        Initialize a State object with zero positions, velocities and forces.
+        To ensure that the attributes are properly initialized create the State object via
+        :meth:`nemo.sim.Model.state` instead.
+
+        Args:
+            particle_count: the number of particles
+            dtype: the floating-point type of the arrays (see :attr:`nemo.sim.Model.dtype`)
         """
+        self.buffer = np.zeros((3, particle_count, 3), dtype=dtype)
+        """The buffer holding all the arrays of the state, shape (3, particle_count, 3)."""
+        self._set_views()
+
+    def _set_views(self) -> None:
+        self._particle_q, self._particle_qd, self._particle_f = self.buffer
+
+    @property
+    def particle_q(self) -> nparray:
+        """3D positions of particles, shape (particle_count, 3)."""
+        return self._particle_q
+
+    @particle_q.setter
+    def particle_q(self, value: nparray) -> None:
+        self._particle_q[...] = value
 
-        self.particle_q: nparray | None = None
-        """3D positions of particles, shape (particle_count, 3)"""
-        self.particle_qd: nparray | None = None
+    @property
+    def particle_qd(self) -> nparray:
         """3D velocities of particles, shape (particle_count, 3)."""
-        self.particle_f: nparray | None = None
+        return self._particle_qd
+
+    @particle_qd.setter
+    def particle_qd(self, value: nparray) -> None:
+        self._particle_qd[...] = value
+
+    @property
+    def particle_f(self) -> nparray:
         """3D forces on particles, shape (particle_count, 3)."""
+        return self._particle_f
+
+    @particle_f.setter
+    def particle_f(self, value: nparray) -> None:
+        self._particle_f[...] = value
+
+    @property
+    def particle_count(self) -> int:
+        """The number of particles."""
+        return self.buffer.shape[1]
 
     def clear_forces(self) -> None:
         """
         Clear all force arrays (for particles and bodies) in the state object.
 
-        Sets all entries of :attr:`particle_f` and :attr:`body_f` to zero, if present.
+        Sets all entries of :attr:`particle_f` to zero.
+        """
+        self._particle_f.fill(0)
+
+    def copy_from(self, other: "State") -> None:
+        """
+        Copy all the data of another state (of the same size and precision) into this state.
+        """
+        if other.buffer.shape != self.buffer.shape or other.buffer.dtype != self.buffer.dtype:
+            raise RuntimeError(
+                f"Can't copy a state of shape {other.buffer.shape} ({other.buffer.dtype}) "
+                f"into a state of shape {self.buffer.shape} ({self.buffer.dtype})"
+            )
+        np.copyto(self.buffer, other.buffer)
+
+    def copy(self) -> "State":
+        """
+        Return a new state holding a copy of the data of this state.
+        """
+        s = State.__new__(State)
+        s.buffer = self.buffer.copy()
+        s._set_views()
+        return s
+
+    def swap(self, other: "State") -> None:
+        """
+        Exchange the data of this state with another state in O(1), without copying.
+
+        References to the State objects stay valid, but references to their arrays follow the data.
+        """
+        self.buffer, other.buffer = other.buffer, self.buffer
+        self._set_views()
+        other._set_views()
+
+
+class StatePool:
+    """A pool of reusable states of one model (see :attr:`nemo.sim.Model.state_pool`).
+
+    Solvers take their temporary states from the pool and give them back at the end of a step,
+    so that stepping allocates no state after the first step.
+    """
+
+    def __init__(self, particle_count: int, dtype=np.float64) -> None:
+        """
+        Args:
+            particle_count: the number of particles of the states
+            dtype: the floating-point type of the states
+        """
+        self.particle_count = particle_count
+        self.dtype = dtype
+        self.allocated = 0
+        """Number of states allocated by the pool so far."""
+        self._free: list[State] = []
+
+    def acquire(self) -> State:
+        """
+        Take a state from the pool, allocating one if the pool is empty.
+
+        The contents of the returned state are undefined; the caller initializes them.
+        """
+        if self._free:
+            return self._free.pop()
+        self.allocated += 1
+        return State(self.particle_count, self.dtype)
+
+    def release(self, state: State) -> None:
+        """
+        Give a state acquired by :meth:`acquire` back to the pool. The state must not be used afterwards.
         """
-        if self.particle_f is not None:
-            self.particle_f.fill(0)
+        if state.buffer.shape != (3, self.particle_count, 3) or state.buffer.dtype != self.dtype:
+            raise RuntimeError("The released state doesn't belong to this pool")
+        self._free.append(state)
@@ -1,15 +1,61 @@
-from .explicit_euler import ExplicitEulerSolver
-from .implicit_euler import ImplicitEulerSolver
-from .linearized_implicit import LinearizedImplicitSolver
-from .midpoint import MidpointSolver
-from .solver import SolverBase
-from .symplectic_euler import SymplecticEulerSolver
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .explicit_euler import ExplicitEulerSolver
+    from .exponential import ExponentialSolver
+    from .implicit_euler import ImplicitEulerSolver
+    from .linearized_implicit import LinearizedImplicitSolver
+    from .midpoint import MidpointSolver
+    from .multirate import MultirateSolver
+    from .projective_dynamics import ProjectiveDynamicsSolver
+    from .rk4 import RK4Solver
+    from .solver import SolverBase
+    from .symplectic_euler import SymplecticEulerSolver
+    from .velocity_verlet import VelocityVerletSolver
+    from .xpbd import XPBDSolver
+
+# The solvers are imported on first access (see __getattr__), so that a scene only imports
+# the modules of the solver it uses.
+_SOLVER_MODULES = {
+    "ExplicitEulerSolver": ".explicit_euler",
+    "ExponentialSolver": ".exponential",
+    "ImplicitEulerSolver": ".implicit_euler",
+    "LinearizedImplicitSolver": ".linearized_implicit",
+    "MidpointSolver": ".midpoint",
+    "MultirateSolver": ".multirate",
+    "ProjectiveDynamicsSolver": ".projective_dynamics",
+    "RK4Solver": ".rk4",
+    "SolverBase": ".solver",
+    "SymplecticEulerSolver": ".symplectic_euler",
+    "VelocityVerletSolver": ".velocity_verlet",
+    "XPBDSolver": ".xpbd",
+}
 
 __all__ = [
     "ExplicitEulerSolver",
+    "ExponentialSolver",
     "ImplicitEulerSolver",
     "LinearizedImplicitSolver",
     "MidpointSolver",
+    "MultirateSolver",
+    "ProjectiveDynamicsSolver",
+    "RK4Solver",
     "SolverBase",
     "SymplecticEulerSolver",
+    "VelocityVerletSolver",
+    "XPBDSolver",
 ]
+
+
+def __getattr__(name: str):
+    if name not in _SOLVER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SOLVER_MODULES[name], __name__), name)
+    # cache the class in the package, so that __getattr__ is only called once per solver
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
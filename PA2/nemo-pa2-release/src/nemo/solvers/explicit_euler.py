@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..core.types import override
 from ..geometry import ParticleFlags
 from ..sim.forces import eval_all_forces
@@ -9,7 +11,7 @@ from .solver import SolverBase
 class ExplicitEulerSolver(SolverBase):
     """Explicit Euler time integrator.
 
-    For now, this solver doesn't handle contacts.
+    Contacts are handled as penalty forces (see :func:`nemo.sim.forces.eval_contact_forces`).
     """
 
     def __init__(self, model: Model, dt: float):
@@ -37,20 +39,15 @@ class ExplicitEulerSolver(SolverBase):
         eval_all_forces(self.model, state_in)
 
         # Implement your explicit euler algorithm here.
-        # At the high-level, it will be a for loop through all particles:
-        #  for i in range(self.model.particle_count):
-        #    ... advance the position (in particle_q) and velocity (in particle_qd) of particle i
+        # All particles are advanced at once; the arithmetic stays in the precision of the model (see `Model.dtype`).
         #
         # The updated particle positions and velocities are stored in `state_out.particle_q` and `state_out.particle_qd`
         #
         # HINT: the inverse of mass is already computed and stored in self.model.particle_inv_mass
-        for ii in range(self.model.particle_count):
-            if self.model.particle_flags[ii] & ParticleFlags.ACTIVE.value != 0:
-                state_out.particle_q[ii] = state_in.particle_q[ii] + state_in.particle_qd[ii] * dt
-                state_out.particle_qd[ii] = (
-                    state_in.particle_qd[ii]
-                    + (state_in.particle_f[ii] * self.model.particle_inv_mass[ii] + self.model.gravity) * dt
-                )
-            else:
-                state_out.particle_q[ii] = state_in.particle_q[ii]
-                state_out.particle_qd[ii] = state_in.particle_qd[ii]
+        active = np.nonzero(self.model.particle_flags & ParticleFlags.ACTIVE.value != 0)[0]
+        np.copyto(state_out.particle_q, state_in.particle_q)
+        np.copyto(state_out.particle_qd, state_in.particle_qd)
+        state_out.particle_q[active] += state_in.particle_qd[active] * dt
+        state_out.particle_qd[active] += (
+            state_in.particle_f[active] * self.model.particle_inv_mass[active, None] + self.model.gravity
+        ) * dt
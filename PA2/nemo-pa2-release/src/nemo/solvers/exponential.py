@@ -0,0 +1,205 @@
+from collections.abc import Callable
+
+import numpy as np
+
+from ..core.linalg import BlockBandedMatrix, expm_multiply
+from ..core.types import nparray, override
+from ..geometry import ParticleFlags
+from ..sim.forces import eval_all_force_pos_jacobians, eval_all_force_vel_jacobians, eval_all_forces
+from ..sim.model import Model
+from ..sim.state import State
+from .implicit_system import coupling_bandwidth
+from .solver import SolverBase, eval_accelerations
+
+
+class ExponentialSolver(SolverBase):
+    """Exponential Rosenbrock-Euler time integrator.
+
+    The motion is written as a first-order system y' = f(y) of y = (q, q̇), with
+    f(y) = (q̇, M⁻¹·F(q, q̇) + g), and each step linearizes it at the beginning of the step:
+
+        yⁿ⁺¹ = yⁿ + h·φ₁(h·J)·f(yⁿ),   J = ∂f/∂y = [[0, I], [M⁻¹·∂F/∂q, M⁻¹·∂F/∂q̇]],
+
+    where φ₁(z) = (eᶻ - 1)/z. The linearized motion is integrated exactly, so linear springs (and
+    small oscillations of any springs) are solved without numerical damping or dispersion, at any
+    timestep, while the (linearized) implicit Euler integrators damp them. The product with φ₁ is
+    computed as a product with the exponential of the augmented matrix [[h·J, h·f], [0, 0]] by
+    :func:`nemo.core.linalg.expm_multiply`, in a Krylov subspace of at most :attr:`krylov_dim`
+    vectors, so J is only needed through its products with vectors:
+
+    - ``"dense"`` and ``"banded"``: the force jacobians are assembled at the beginning of the step
+      (by :func:`nemo.sim.forces.eval_all_force_pos_jacobians` and
+      :func:`nemo.sim.forces.eval_all_force_vel_jacobians`) into dense arrays or
+      :class:`nemo.core.linalg.BlockBandedMatrix`, like the linear system of
+      :class:`LinearizedImplicitSolver`;
+    - ``"matrix_free"``: the products are approximated by finite differences of the forces, like
+      :class:`JacobianFreeOperator`, so no jacobians are needed;
+    - ``"auto"``: banded if the bandwidth is small compared to the number of particles, otherwise dense.
+
+    The Krylov subspace grows with h·‖J‖. If the error estimate of the product doesn't drop below
+    :attr:`tol` within :attr:`krylov_dim` vectors, the step is split into 2, 4, ... substeps (up to
+    :attr:`max_substeps`), each linearized at its own beginning. Fixed (and sleeping) particles keep
+    their velocities.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        dt: float,
+        jacobian: str = "auto",
+        krylov_dim: int = 30,
+        tol: float = 1e-8,
+        max_substeps: int = 64,
+    ):
+        """
+        Args:
+            model: the simulated model
+            dt: the default timestep size
+            jacobian: "dense", "banded", "matrix_free" or "auto"
+            krylov_dim: the maximal dimension of the Krylov subspace
+            tol: the relative tolerance of the matrix-exponential products
+            max_substeps: the maximal number of substeps per step
+        """
+        super().__init__(model=model, dt=dt)
+        self.bandwidth = coupling_bandwidth(model)
+        """Bandwidth of the force jacobians in particles, None if unbounded."""
+        N = model.particle_count
+        if jacobian == "auto":
+            if self.bandwidth is not None and N > 32 and 8 * self.bandwidth < N:
+                jacobian = "banded"
+            else:
+                jacobian = "dense"
+        if jacobian == "banded" and self.bandwidth is None:
+            raise RuntimeError("The banded jacobians can't be used with particle-particle contacts")
+        if jacobian not in ("dense", "banded", "matrix_free"):
+            raise RuntimeError(f"Unknown jacobian type: [{jacobian}]")
+        if krylov_dim < 1 or max_substeps < 1:
+            raise RuntimeError(f"Krylov dimension ({krylov_dim}) and substeps ({max_substeps}) must be positive")
+        self.jacobian = jacobian
+        """How the jacobians are applied: "dense", "banded" or "matrix_free"."""
+        self.krylov_dim = krylov_dim
+        """Maximal dimension of the Krylov subspace."""
+        self.tol = tol
+        """Relative tolerance of the matrix-exponential products."""
+        self.max_substeps = max_substeps
+        """Maximal number of substeps per step."""
+        self.substeps = 1
+        """Number of substeps of the last step."""
+        self.krylov_iterations = 0
+        """Number of products with the jacobian in the last step."""
+
+    def _jacobian_product(self, state: State, active: nparray) -> Callable[[nparray], nparray]:
+        """
+        The product x -> J @ x with the jacobian of f at the given state, for x of shape (6 * particle_count,).
+
+        Args:
+            state: the state at which J is taken, holding the forces at that state (for finite differences)
+            active: nparray, shape (particle_count,), bool: the active particles
+        """
+        model = self.model
+        N = model.particle_count
+        inv_mass = np.repeat(np.where(active, model.particle_inv_mass, 0.0), 3)
+
+        if self.jacobian == "matrix_free":
+            q = state.particle_q.astype(np.float64)
+            qd = state.particle_qd.astype(np.float64)
+            f0 = state.particle_f.astype(np.float64).reshape(-1)
+            # the step size balances the truncation error against the round-off of the model precision
+            sqrt_eps = np.sqrt(np.finfo(model.dtype).eps) * (1.0 + np.linalg.norm(q) + np.linalg.norm(qd))
+
+            def force_product(x: nparray) -> nparray:
+                norm = np.linalg.norm(x)
+                if norm == 0:
+                    return np.zeros(3 * N)
+                eps = sqrt_eps / norm
+                dx = eps * x.reshape(2, N, 3)
+                pool = model.state_pool
+                tmp = pool.acquire()
+                tmp.particle_q = q + dx[0]
+                tmp.particle_qd = qd + dx[1]
+                tmp.clear_forces()
+                eval_all_forces(model, tmp)
+                df = (tmp.particle_f.reshape(-1) - f0) / eps
+                pool.release(tmp)
+                return df
+
+        else:
+            if self.jacobian == "banded":
+                Kq, Kv = BlockBandedMatrix(N, self.bandwidth), BlockBandedMatrix(N, self.bandwidth)
+            else:
+                Kq, Kv = np.zeros((3 * N, 3 * N)), np.zeros((3 * N, 3 * N))
+            eval_all_force_pos_jacobians(model, state, Kq)
+            eval_all_force_vel_jacobians(model, state, Kv)
+            if self.jacobian == "banded":
+                Kq, Kv = Kq.matvec, Kv.matvec
+            else:
+                Kq, Kv = Kq.dot, Kv.dot
+
+            def force_product(x: nparray) -> nparray:
+                return Kq(x[: 3 * N]) + Kv(x[3 * N :])
+
+        def product(x: nparray) -> nparray:
+            self.krylov_iterations += 1
+            return np.concatenate([x[3 * N :], inv_mass * force_product(x)])
+
+        return product
+
+    def _advance(self, state: State, h: float, active: nparray, acc: nparray) -> bool:
+        """
+        Advance the (temporary) state by one substep of size h in place.
+
+        Returns:
+            bool: whether the matrix-exponential product converged
+        """
+        N = self.model.particle_count
+        eval_accelerations(self.model, state, active, acc)
+        f0 = np.concatenate([state.particle_qd.reshape(-1), acc.reshape(-1)]).astype(np.float64)
+        jacobian_product = self._jacobian_product(state, active)
+
+        def augmented_product(z: nparray) -> nparray:
+            # [[h·J, h·f], [0, 0]] @ z
+            out = np.zeros_like(z)
+            out[:-1] = h * (jacobian_product(z[:-1]) + z[-1] * f0)
+            return out
+
+        e = np.zeros(6 * N + 1)
+        e[-1] = 1.0
+        x, error = expm_multiply(augmented_product, e, tol=self.tol, maxiter=self.krylov_dim)
+        # exp([[h·J, h·f], [0, 0]])·e = (h·φ₁(h·J)·f, 1)
+        dy = x[:-1].reshape(2, N, 3)
+        state.particle_q += dy[0]
+        dy[1][~active] = 0.0
+        state.particle_qd += dy[1]
+        return error <= self.tol * np.linalg.norm(x)
+
+    @override
+    def step(self, state_in: State, state_out: State, dt: float | None = None):
+        """
+        Simulate the model for a given time step using the exponential Rosenbrock-Euler integrator.
+        """
+        if dt is None:
+            dt = self.dt
+        self.ts += dt
+        model = self.model
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+        acc = np.zeros((model.particle_count, 3))
+        self.krylov_iterations = 0
+
+        tmp_state = model.state_pool.acquire()
+        substeps = 1
+        while True:
+            tmp_state.copy_from(state_in)
+            # restart with twice as many substeps as soon as one of them doesn't converge
+            can_split = 2 * substeps <= self.max_substeps
+            converged = True
+            for _ in range(substeps):
+                converged = self._advance(tmp_state, dt / substeps, active, acc)
+                if not converged and can_split:
+                    break
+            if converged or not can_split:
+                break
+            substeps *= 2
+        self.substeps = substeps
+        state_out.particle_q = tmp_state.particle_q
+        state_out.particle_qd = tmp_state.particle_qd
+        model.state_pool.release(tmp_state)
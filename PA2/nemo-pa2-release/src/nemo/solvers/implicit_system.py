@@ -0,0 +1,250 @@
+import numpy as np
+
+from ..core.linalg import BlockBandedMatrix, BlockDiagonalMatrix, conjugate_gradient, gmres
+from ..core.types import nparray
+from ..geometry import ParticleFlags
+from ..sim.forces import eval_all_force_pos_jacobians, eval_all_force_vel_jacobians, eval_all_forces
+from ..sim.graph import bandwidth
+from ..sim.model import Model
+from ..sim.parallel import parallel_for
+from ..sim.state import State
+
+
+def coupling_bandwidth(model: Model) -> int | None:
+    """
+    The bandwidth (in particles) of the force jacobians of the given model, i.e., the largest
+    index distance between two particles coupled by a force.
+
+    Returns:
+        int | None: the bandwidth, or None if it can't be bounded (particle-particle contacts
+        may couple any two particles).
+    """
+    if model.particle_ke > 0:
+        return None
+    return max(bandwidth(model.spring_indices), bandwidth(model.gravitational_pairs))
+
+
+class JacobianFreeOperator:
+    """The system matrix A = M - h²·∂F/∂q - h·∂F/∂q̇ at a state, applied to vectors without assembling it.
+
+    The implicit integrators evaluate the forces at q = qⁿ + h·v, so the force jacobians only
+    enter A through the directional derivative of F(qⁿ + h·v, v) along v, which is approximated
+    by a finite difference:
+
+        A x ≈ M x - h·(F(q + h·ε·x, q̇ + ε·x) - F(q, q̇)) / ε.
+
+    Each product costs one evaluation of :func:`nemo.sim.forces.eval_all_forces`, so any force
+    can be integrated implicitly without deriving its jacobians. The rows and columns of the fixed
+    particles are identity rows.
+    """
+
+    def __init__(self, model: Model, state: State, dt: float, mass_diag: nparray, fixed_dofs: nparray):
+        """
+        Args:
+            model: the simulated model
+            state: the state (q, q̇) at which the jacobians are taken
+            dt: the timestep size h
+            mass_diag: the diagonal of the mass matrix M, shape (3 * particle_count,)
+            fixed_dofs: the degrees of freedom of the fixed particles
+        """
+        self.model = model
+        self.dt = dt
+        self.mass_diag = mass_diag
+        self.fixed_dofs = fixed_dofs
+        self.q = state.particle_q.astype(np.float64)
+        self.qd = state.particle_qd.astype(np.float64)
+        # the step size balances the truncation error against the round-off of the model precision
+        self.sqrt_eps = np.sqrt(np.finfo(model.dtype).eps) * (1.0 + np.linalg.norm(self.qd))
+        self.f0 = self._forces(self.q, self.qd)
+        """The forces F(q, q̇) (without gravity), shape (3 * particle_count,)."""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (len(self.mass_diag), len(self.mass_diag))
+
+    def _forces(self, q: nparray, qd: nparray) -> nparray:
+        pool = self.model.state_pool
+        state = pool.acquire()
+        state.particle_q = q
+        state.particle_qd = qd
+        state.clear_forces()
+        eval_all_forces(self.model, state)
+        f = state.particle_f.astype(np.float64).reshape(-1)
+        pool.release(state)
+        return f
+
+    def matvec(self, x: nparray) -> nparray:
+        """Compute the matrix-vector product A @ x for x of shape (3 * particle_count,)."""
+        dx = np.array(x, dtype=np.float64)
+        dx[self.fixed_dofs] = 0.0
+        norm = np.linalg.norm(dx)
+        if norm == 0:
+            return np.array(x, dtype=np.float64)
+        eps = self.sqrt_eps / norm
+        dv = eps * dx.reshape(-1, 3)
+        df = (self._forces(self.q + self.dt * dv, self.qd + dv) - self.f0) / eps
+        y = self.mass_diag * dx - self.dt * df
+        y[self.fixed_dofs] = x[self.fixed_dofs]
+        return y
+
+
+class ImplicitSystem:
+    """The linear system of the implicit Euler integrators.
+
+    In every (Newton) iteration, the implicit integrators solve A δv = b with
+
+        A = M - h²·∂F/∂q - h·∂F/∂q̇,
+
+    where the rows and columns of fixed particles are replaced by identity rows. This class
+    assembles A and solves the system with one of the following linear solvers:
+
+    - ``"dense"``: A is a dense (3N, 3N) array, solved by LU decomposition in O(N³);
+    - ``"banded"``: A is a :class:`nemo.core.linalg.BlockBandedMatrix`, solved in O(N·b²) for
+      a bandwidth of b particles. This is efficient for chains and ropes, and for cloth after
+      a bandwidth-reducing reordering (see :meth:`nemo.sim.ModelBuilder.finalize`);
+    - ``"components"``: A is a :class:`nemo.core.linalg.BlockDiagonalMatrix` with one dense block per
+      connected component of the model (see :attr:`nemo.sim.Model.particle_component`), solved in
+      O(Σ nᵢ³) for components of nᵢ particles. Components of equal sizes (e.g., identical ropes) are
+      solved in batches, split over the threads set by :func:`nemo.sim.set_num_threads`;
+    - ``"gmres"`` and ``"cg"``: A is a :class:`JacobianFreeOperator`, which approximates its
+      products by finite differences of the forces, and the system is solved by a Krylov method
+      (:func:`nemo.core.linalg.gmres` or :func:`nemo.core.linalg.conjugate_gradient`) up to the
+      relative tolerance :attr:`krylov_tol`. No matrix is assembled and no force jacobians are
+      needed, so this scales to large models and to forces without jacobians. Conjugate gradients
+      require a symmetric positive definite A, which holds for springs without damping (the damping
+      of a spring along its axis makes ∂F/∂q nonsymmetric) and may fail for stretched springs or
+      contacts. If they break down, the system is solved by GMRES, which has no such restriction;
+    - ``"auto"``: banded if the bandwidth is small compared to the number of particles, otherwise
+      components if the model has multiple components, otherwise dense.
+
+    The banded and components solvers can't be used with particle-particle contacts, which may
+    couple any two particles.
+    """
+
+    def __init__(self, model: Model, linear_solver: str = "auto"):
+        self.model = model
+        self.masked_mass = np.zeros(model.particle_count)
+        """Particle masses, zero for fixed particles (e.g., to compute gravity forces)."""
+        self.mass_diag = np.zeros(3 * model.particle_count)
+        """Diagonal of the mass matrix M, shape [3 * particle_count]."""
+        self.fixed: nparray | None = None
+        """Indices of the fixed particles."""
+        self.fixed_dofs: nparray | None = None
+        """Degrees of freedom of the fixed particles."""
+        self._flags: nparray | None = None
+        self.update_flags()
+
+        self.bandwidth = coupling_bandwidth(model)
+        """Bandwidth of the system in particles, None if unbounded."""
+        N = model.particle_count
+        if linear_solver == "auto":
+            if self.bandwidth is not None and N > 32 and 8 * self.bandwidth < N:
+                linear_solver = "banded"
+            elif self.bandwidth is not None and model.component_count > 1:
+                linear_solver = "components"
+            else:
+                linear_solver = "dense"
+        if linear_solver in ("banded", "components") and self.bandwidth is None:
+            raise RuntimeError(f"The {linear_solver} linear solver can't be used with particle-particle contacts")
+        if linear_solver not in ("dense", "banded", "components", "gmres", "cg"):
+            raise RuntimeError(f"Unknown linear solver: [{linear_solver}]")
+        self.linear_solver = linear_solver
+        """The linear solver in use, "dense", "banded", "components", "gmres" or "cg"."""
+        self.krylov_tol = 1e-6
+        """Relative residual tolerance of the Krylov solvers."""
+        self.krylov_maxiter = 200
+        """Maximal number of iterations (products with A) of the Krylov solvers."""
+        self.krylov_iterations = 0
+        """Number of Krylov iterations of the last solve."""
+
+    @property
+    def jacobian_free(self) -> bool:
+        """Whether the system matrix is applied by finite differences instead of being assembled."""
+        return self.linear_solver in ("gmres", "cg")
+
+    def update_flags(self) -> None:
+        """
+        Update the masses and the fixed particles after the particle flags of the model changed
+        (e.g., when particles fall asleep). This is cheap if the flags are unchanged.
+
+        The arrays :attr:`masked_mass` and :attr:`mass_diag` are updated in place.
+        """
+        flags = self.model.particle_flags
+        if self._flags is not None and np.array_equal(flags, self._flags):
+            return
+        self._flags = flags.copy()
+        mask = flags & ParticleFlags.ACTIVE.value != 0
+        self.masked_mass[:] = np.where(mask, self.model.particle_mass, 0.0)
+        self.mass_diag[:] = np.repeat(np.where(mask, self.model.particle_mass, 1.0), 3)
+        self.fixed = np.nonzero(~mask)[0]
+        self.fixed_dofs = (3 * self.fixed[:, None] + np.arange(3)).reshape(-1)
+
+    def assemble(
+        self, state: State, dt: float
+    ) -> nparray | BlockBandedMatrix | BlockDiagonalMatrix | JacobianFreeOperator:
+        """
+        Assemble the system matrix A = M - h²·∂F/∂q - h·∂F/∂q̇ at the given state.
+
+        For the Krylov solvers, the matrix isn't assembled: the returned operator evaluates the
+        forces at the given state, and at a perturbed state for every product.
+        """
+        N = self.model.particle_count
+        if self.jacobian_free:
+            return JacobianFreeOperator(self.model, state, dt, self.mass_diag, self.fixed_dofs)
+        if self.linear_solver == "banded":
+            A = BlockBandedMatrix(N, self.bandwidth)
+            A.add_diagonal(self.mass_diag)
+        elif self.linear_solver == "components":
+            A = BlockDiagonalMatrix(self.model.particle_component, pinned=self.fixed)
+            A.add_diagonal(self.mass_diag)
+        else:
+            A = np.diag(self.mass_diag)
+        eval_all_force_pos_jacobians(self.model, state, A, scale=-(dt**2))
+        eval_all_force_vel_jacobians(self.model, state, A, scale=-dt)
+        return A
+
+    def solve(
+        self,
+        A: nparray | BlockBandedMatrix | BlockDiagonalMatrix | JacobianFreeOperator,
+        b: nparray,
+        x0: nparray | None = None,
+    ) -> nparray:
+        """
+        Solve A x = b, where the fixed particles are constrained to x = 0.
+
+        Args:
+            A: the system matrix returned by :meth:`assemble` (modified in place)
+            b: nparray, shape (3 * particle_count,): the right-hand side (modified in place)
+            x0: nparray, shape (3 * particle_count,): an initial guess for the Krylov solvers
+                (ignored by the direct solvers)
+
+        Returns:
+            nparray, shape (3 * particle_count,): the solution
+        """
+        b[self.fixed_dofs] = 0.0
+        if isinstance(A, JacobianFreeOperator):
+            if x0 is not None:
+                x0 = np.array(x0, dtype=np.float64)
+                x0[self.fixed_dofs] = 0.0
+            if self.linear_solver == "cg":
+                try:
+                    x, self.krylov_iterations = conjugate_gradient(
+                        A.matvec, b, x0, tol=self.krylov_tol, maxiter=self.krylov_maxiter
+                    )
+                    return x
+                except RuntimeError:
+                    # A isn't positive definite (e.g., damped springs): fall back to GMRES
+                    pass
+            x, self.krylov_iterations = gmres(A.matvec, b, x0, tol=self.krylov_tol, maxiter=self.krylov_maxiter)
+            return x
+        if isinstance(A, BlockBandedMatrix):
+            A.fix_blocks(self.fixed)
+            return A.solve(b)
+        if isinstance(A, BlockDiagonalMatrix):
+            A.fix_blocks(self.fixed)
+            # the components are independent: solve them in parallel (one solve per component)
+            return A.solve(b, parallel=lambda fn, count: parallel_for(fn, count, min_chunk_size=1))
+        A[self.fixed_dofs, :] = 0.0
+        A[:, self.fixed_dofs] = 0.0
+        A[self.fixed_dofs, self.fixed_dofs] = 1.0
+        return np.linalg.solve(A, b)
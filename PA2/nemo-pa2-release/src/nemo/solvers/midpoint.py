@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..core.types import override
 from ..geometry import ParticleFlags
 from ..sim.forces import eval_all_forces
@@ -9,7 +11,7 @@ from .solver import SolverBase
 class MidpointSolver(SolverBase):
     """Midpoint time integrator.
 
-    For now, this solver doesn't handle contacts.
+    Contacts are handled as penalty forces (see :func:`nemo.sim.forces.eval_contact_forces`).
     """
 
     def __init__(self, model: Model, dt: float):
@@ -35,9 +37,7 @@ class MidpointSolver(SolverBase):
         self.ts += dt
 
         # Implement your midpoint integrator algorithm here.
-        # At the high-level, it will be a for loop through all particles:
-        #  for i in range(self.model.particle_count):
-        #    ... advance the position (in particle_q) and velocity (in particle_qd) of particle i
+        # All particles are advanced at once; the arithmetic stays in the precision of the model (see `Model.dtype`).
         #
         # The updated particle positions and velocities are stored in `state_out.particle_q` and `state_out.particle_qd`
         #
@@ -46,25 +46,17 @@ class MidpointSolver(SolverBase):
         eval_all_forces(self.model, state_in)
 
         h = dt * 0.5  # half a step
+        inv_mass = self.model.particle_inv_mass[:, None]
+        active = np.nonzero(self.model.particle_flags & ParticleFlags.ACTIVE.value != 0)[0]
         # advance for a half of stepsize
-        for ii in range(self.model.particle_count):
-            if self.model.particle_flags[ii] & ParticleFlags.ACTIVE.value != 0:
-                state_out.particle_q[ii] = state_in.particle_q[ii] + state_in.particle_qd[ii] * h
-                state_out.particle_qd[ii] = (
-                    state_in.particle_qd[ii]
-                    + (state_in.particle_f[ii] * self.model.particle_inv_mass[ii] + self.model.gravity) * h
-                )
-            else:
-                state_out.particle_q[ii] = state_in.particle_q[ii]
-                state_out.particle_qd[ii] = state_in.particle_qd[ii]
+        state_out.copy_from(state_in)
+        state_out.particle_q[active] += state_in.particle_qd[active] * h
+        state_out.particle_qd[active] += (state_in.particle_f[active] * inv_mass[active] + self.model.gravity) * h
 
         state_out.clear_forces()
         # force are stored in state_out.particle_f
         eval_all_forces(self.model, state_out)
-        for ii in range(self.model.particle_count):
-            if self.model.particle_flags[ii] & ParticleFlags.ACTIVE.value != 0:
-                state_out.particle_q[ii] = state_in.particle_q[ii] + state_out.particle_qd[ii] * dt
-                state_out.particle_qd[ii] = (
-                    state_in.particle_qd[ii]
-                    + (state_out.particle_f[ii] * self.model.particle_inv_mass[ii] + self.model.gravity) * dt
-                )
+        state_out.particle_q[active] = state_in.particle_q[active] + state_out.particle_qd[active] * dt
+        state_out.particle_qd[active] = (
+            state_in.particle_qd[active] + (state_out.particle_f[active] * inv_mass[active] + self.model.gravity) * dt
+        )
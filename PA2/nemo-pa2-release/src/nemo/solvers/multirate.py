@@ -0,0 +1,241 @@
+from typing import Any
+
+import numpy as np
+
+from ..core.types import nparray, override
+from ..geometry import ParticleFlags
+from ..sim.builder import ModelBuilder
+from ..sim.forces import eval_contact_forces, eval_drag_forces, eval_gravitational_forces, eval_spring_forces
+from ..sim.model import Model
+from ..sim.state import State
+from .solver import SolverBase, eval_accelerations
+
+
+def spring_frequencies(model: Model) -> nparray:
+    """
+    The squared angular frequencies ω² = k·(1/mᵢ + 1/mⱼ) of the springs, each taken on its own
+    (fixed particles have an infinite mass), shape (spring_count,).
+    """
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    inv_mass = np.where(active, model.particle_inv_mass, 0.0)
+    si = model.spring_indices
+    return model.spring_stiffness * (inv_mass[si[:, 0]] + inv_mass[si[:, 1]])
+
+
+def spring_stable_timestep(model: Model, springs: nparray) -> float:
+    """
+    A bound of the largest stable timestep 2/ω_max of the velocity Verlet integration of the given
+    springs (at rest and without damping), where ω_max² ≤ max 2·Σₛ kₛ/mᵢ over the particles i
+    (Gershgorin). Returns infinity if there are no (stiff) springs.
+    """
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    inv_mass = np.where(active, model.particle_inv_mass, 0.0)
+    si, ke = model.spring_indices[springs], model.spring_stiffness[springs]
+    ksum = np.bincount(si[:, 0], weights=ke, minlength=model.particle_count)
+    ksum += np.bincount(si[:, 1], weights=ke, minlength=model.particle_count)
+    omega2 = (2.0 * ksum * inv_mass).max(initial=0.0)
+    return 2.0 / np.sqrt(omega2) if omega2 > 0 else np.inf
+
+
+class MultirateSolver(SolverBase):
+    """Multirate velocity Verlet time integrator (impulse method, or r-RESPA) for stiff and soft springs.
+
+    The springs are split into a stiff (fast) and a soft (slow) subset. By default, the slow
+    subset consists of the softest springs whose velocity Verlet integration is stable at the
+    timestep (see :func:`spring_stable_timestep`, scaled by :attr:`safety`); alternatively, all the springs
+    stiffer than a given threshold are fast. Each step then
+
+    1. kicks the velocities by half a step with the slow forces: the slow springs, gravity,
+       gravitational pairs, drag and contacts;
+    2. integrates the fast springs on their particles only, with :attr:`substeps` velocity Verlet
+       substeps. The particles that no fast spring touches just drift by a full step;
+    3. kicks the velocities by another half step with the slow forces, which are kept for the
+       first kick of the next step (as in :class:`VelocityVerletSolver`).
+
+    So the slow forces are evaluated once per step, and only the fast springs at the fine rate,
+    whereas a uniform integrator evaluates all the forces at the fine rate dictated by the
+    stiffest spring. The fast springs are simulated on a compact model of their particles
+    (:attr:`fast_model`), rebuilt when the particle flags change.
+
+    The integrator is second order and symplectic for position-dependent forces. Contacts are
+    evaluated at the coarse rate, so stiff contacts still limit the timestep.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        dt: float,
+        substeps: int | None = None,
+        stiffness_threshold: float | None = None,
+        safety: float = 0.5,
+    ):
+        """
+        Args:
+            model: the simulated model
+            dt: the default timestep size
+            substeps: the number of fast substeps per step (by default, enough for the stability of the fast springs)
+            stiffness_threshold: springs stiffer than this are fast (by default, by their stable timesteps)
+            safety: the fraction of the stable timesteps used by the partition and the substeps
+        """
+        super().__init__(model=model, dt=dt)
+        if substeps is not None and substeps < 1:
+            raise RuntimeError(f"Number of substeps ({substeps}) must be positive")
+        if not 0 < safety <= 1:
+            raise RuntimeError(f"Safety factor ({safety}) must be in (0, 1]")
+        self.stiffness_threshold = stiffness_threshold
+        """Stiffness above which the springs are fast, None to partition them by their stable timesteps."""
+        self.safety = safety
+        """Fraction of the stable timesteps used by the partition and the substeps."""
+        self._substeps = substeps
+        self.substeps = 1
+        """Number of fast substeps per step."""
+        self.fast_springs: nparray = np.zeros(0, dtype=np.int64)
+        """Indices of the fast springs."""
+        self.slow_springs: nparray = np.arange(model.spring_count)
+        """Indices of the slow springs."""
+        self.fast_particles: nparray = np.zeros(0, dtype=np.int64)
+        """Indices of the particles of the fast springs."""
+        self.fast_model: Model | None = None
+        """The model of the fast springs and their particles (None if there are no fast springs)."""
+        self._flags: nparray | None = None
+        self._dt: float | None = None
+
+        N, dtype = model.particle_count, model.dtype
+        self._acc = np.zeros((N, 3), dtype=dtype)
+        # the state at which the slow accelerations self._acc were evaluated (see VelocityVerletSolver)
+        self._acc_q = np.zeros((N, 3), dtype=dtype)
+        self._acc_qd = np.zeros((N, 3), dtype=dtype)
+        self._acc_valid = False
+
+    def _partition(self, dt: float) -> None:
+        """Split the springs into the fast and slow subsets for the timestep dt and the current particle flags."""
+        model = self.model
+        self._flags = model.particle_flags.copy()
+        self._dt = dt
+        self._acc_valid = False
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+        si = model.spring_indices
+        attached = np.nonzero(active[si[:, 0]] | active[si[:, 1]])[0]
+        if self.stiffness_threshold is not None:
+            fast = model.spring_stiffness[attached] > self.stiffness_threshold
+        else:
+            # the largest set of the softest springs that is stable at the timestep (bisection on its size)
+            order = np.argsort(spring_frequencies(model)[attached], kind="stable")
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self.safety * spring_stable_timestep(model, attached[order[:mid]]) >= dt:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            fast = np.ones(len(attached), dtype=bool)
+            fast[order[:lo]] = False
+        self.fast_springs = attached[fast]
+        self.slow_springs = attached[~fast]
+
+        if len(self.fast_springs) == 0:
+            self.fast_particles = np.zeros(0, dtype=np.int64)
+            self.fast_model = None
+            self.substeps = 1
+            return
+        if self._substeps is not None:
+            self.substeps = self._substeps
+        else:
+            fast_dt = self.safety * spring_stable_timestep(model, self.fast_springs)
+            self.substeps = max(int(np.ceil(dt / fast_dt)), 1)
+
+        # a compact model of the fast springs, without gravity and with the flags of the particles
+        self.fast_particles, local = np.unique(si[self.fast_springs], return_inverse=True)
+        fp = self.fast_particles
+        builder = ModelBuilder(up_axis=model.up_axis, gravity=0.0)
+        builder.add_particles(
+            model.particle_q[fp], model.particle_qd[fp], model.particle_mass[fp], flags=model.particle_flags[fp]
+        )
+        builder.add_springs(
+            local.reshape(-1, 2),
+            model.spring_stiffness[self.fast_springs],
+            model.spring_damping[self.fast_springs],
+            model.spring_rest_length[self.fast_springs],
+        )
+        self.fast_model = builder.finalize(dtype=model.dtype)
+
+    def _eval_slow_forces(self, model: Model, state: State) -> None:
+        """Evaluate all the forces but the fast springs into `state.particle_f`."""
+        eval_spring_forces(model, state, self.slow_springs)
+        eval_gravitational_forces(model, state)
+        eval_drag_forces(model, state)
+        eval_contact_forces(model, state)
+
+    @property
+    def spring_evaluations(self) -> int:
+        """Number of spring force evaluations per step (one per spring and force evaluation)."""
+        return len(self.slow_springs) + (self.substeps + 1) * len(self.fast_springs)
+
+    @override
+    def step(self, state_in: State, state_out: State, dt: float | None = None):
+        """
+        Simulate the model for a given time step using the multirate integrator.
+
+        Args:
+            state_in (State): The input state.
+            state_out (State): The output state.
+            dt (float): The time step (typically in seconds).
+
+        NOTE:
+            When dt is None, this step call will use the default timestep size
+            stored in self.dt. Otherwise, the given dt will be used.
+        """
+        # increase simulated time
+        if dt is None:
+            dt = self.dt
+        self.ts += dt
+
+        model = self.model
+        if self._dt != dt or not np.array_equal(model.particle_flags, self._flags):
+            self._partition(dt)
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+        acc = self._acc
+        valid = (
+            self._acc_valid
+            and np.array_equal(state_in.particle_q, self._acc_q)
+            and np.array_equal(state_in.particle_qd, self._acc_qd)
+        )
+        if not valid:
+            eval_accelerations(model, state_in, active, acc, self._eval_slow_forces)
+
+        # slow kick and drift of the particles without fast springs
+        np.multiply(acc, 0.5 * dt, out=state_out.particle_qd)
+        state_out.particle_qd += state_in.particle_qd
+        np.multiply(state_out.particle_qd, dt, out=state_out.particle_q)
+        state_out.particle_q[~active] = 0.0
+        state_out.particle_q += state_in.particle_q
+
+        # fast substeps (velocity Verlet) on the particles of the fast springs
+        if self.fast_model is not None:
+            fp, fast_model = self.fast_particles, self.fast_model
+            fast_active = active[fp]
+            h = dt / self.substeps
+            fast = fast_model.state_pool.acquire()
+            fast.particle_q = state_in.particle_q[fp]
+            fast.particle_qd = state_out.particle_qd[fp]
+            fast_acc = eval_accelerations(fast_model, fast, fast_active, np.empty_like(fast.particle_q))
+            for _ in range(self.substeps):
+                fast.particle_qd += 0.5 * h * fast_acc
+                fast.particle_q[fast_active] += h * fast.particle_qd[fast_active]
+                eval_accelerations(fast_model, fast, fast_active, fast_acc)
+                fast.particle_qd += 0.5 * h * fast_acc
+            state_out.particle_q[fp] = fast.particle_q
+            state_out.particle_qd[fp] = fast.particle_qd
+            fast_model.state_pool.release(fast)
+
+        # slow kick at the end of the step; the slow forces are stored in state_out.particle_f
+        eval_accelerations(model, state_out, active, acc, self._eval_slow_forces)
+        state_out.particle_qd += 0.5 * dt * acc
+        np.copyto(self._acc_q, state_out.particle_q)
+        np.copyto(self._acc_qd, state_out.particle_qd)
+        self._acc_valid = True
+
+    @override
+    def restore_checkpoint_data(self, data: dict[str, Any]) -> None:
+        super().restore_checkpoint_data(data)
+        self._acc_valid = False
@@ -0,0 +1,153 @@
+import numpy as np
+
+from ..core.linalg import BlockTridiagonalFactorization, banded_to_block_tridiagonal
+from ..core.types import nparray, override
+from ..geometry import ParticleFlags
+from ..sim.forces import eval_contact_forces, eval_drag_forces, eval_gravitational_forces
+from ..sim.graph import bandwidth
+from ..sim.model import Model
+from ..sim.state import State
+from .solver import SolverBase
+
+
+def _pair_scatter_index(i: nparray, j: nparray) -> nparray:
+    """The flat indices of the coordinates of the particles i and then j, for :func:`_scatter_pairs`."""
+    return (3 * np.concatenate([i, j])[:, None] + np.arange(3)).reshape(-1)
+
+
+def _scatter_pairs(count: int, index: nparray, v: nparray) -> nparray:
+    """Sum the per-pair vectors v into the rows i and -v into the rows j of a (count, 3) array."""
+    return np.bincount(index, weights=np.concatenate([v, -v]).reshape(-1), minlength=3 * count).reshape(count, 3)
+
+
+class ProjectiveDynamicsSolver(SolverBase):
+    """Projective Dynamics time integrator for mass-spring systems.
+
+    Each step minimizes the implicit Euler energy
+
+        1/(2h²)·‖q - y‖²_M + Σₛ kₛ/2·‖qᵢ - qⱼ - pₛ‖²,   y = qⁿ + h·q̇ⁿ + h²·M⁻¹·f_ext,
+
+    by alternating a local step, which projects every spring onto its rest length
+    (pₛ = lₛ·(qᵢ - qⱼ)/‖qᵢ - qⱼ‖, vectorized over all springs), and a global step, which solves
+    a linear system whose matrix M/h² + Σₛ kₛ·AₛᵀAₛ doesn't change. The matrix is the same for the
+    x, y and z coordinates, and it is factorized once (see
+    :class:`nemo.core.linalg.BlockTridiagonalFactorization`), so every iteration only costs a
+    back substitution. The factorization is banded: a bandwidth-reducing particle order (see
+    :meth:`nemo.sim.ModelBuilder.finalize`) keeps it small for cloth.
+
+    Spring damping is treated implicitly as well, acting on the full relative velocity of the two
+    particles (not only along the spring), which keeps the matrix constant. Fixed (and sleeping)
+    particles are pinned; the matrix is refactorized when the particle flags or the timestep change.
+    All the other forces (gravity, gravitational pairs, drag and contacts) are explicit.
+
+    Like the implicit integrators, Projective Dynamics is stable for stiff springs at large
+    timesteps, at a much lower cost per step; with few iterations, stiff springs appear softer.
+    """
+
+    def __init__(self, model: Model, dt: float, iterations: int = 10):
+        """
+        Args:
+            model: the simulated model
+            dt: the default timestep size
+            iterations: the number of local/global iterations per step
+        """
+        super().__init__(model=model, dt=dt)
+        if iterations < 1:
+            raise RuntimeError(f"Number of iterations ({iterations}) must be positive")
+        self.iterations = iterations
+        """Number of local/global iterations per step."""
+        self.bandwidth = max(bandwidth(model.spring_indices), 1)
+        """Bandwidth (in particles) of the global matrix."""
+        self.factorization: BlockTridiagonalFactorization | None = None
+        """The factorized global matrix, computed at the first step."""
+        self._flags: nparray | None = None
+        self._dt: float | None = None
+
+    def _factorize(self, dt: float) -> None:
+        """Build and factorize the global matrix for the timestep dt and the current particle flags."""
+        model = self.model
+        N = model.particle_count
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+        si = model.spring_indices.astype(np.int64)
+        i, j = si[:, 0], si[:, 1]
+        # Laplacian of the springs, weighted by the stiffness and the (implicit) damping
+        w = model.spring_stiffness + model.spring_damping / dt
+        rows = np.concatenate([i, j, i, j])
+        cols = np.concatenate([i, j, j, i])
+        vals = np.concatenate([w, w, -w, -w])
+        # pinned particles have identity rows; their columns move to the right-hand side
+        keep = active[rows]
+        inside = keep & active[cols]
+        pinned = keep & ~active[cols]
+        self._pinned_entries = (rows[pinned], cols[pinned], vals[pinned])
+
+        diag = np.where(active, model.particle_mass / dt**2, 1.0)
+        D, L, U = banded_to_block_tridiagonal(
+            np.concatenate([np.arange(N), rows[inside]]),
+            np.concatenate([np.arange(N), cols[inside]]),
+            np.concatenate([diag, vals[inside]]),
+            N,
+            min(self.bandwidth, N),
+        )
+        self.factorization = BlockTridiagonalFactorization(D, L, U)
+        self._flags = model.particle_flags.copy()
+        self._dt = dt
+
+    def _solve(self, rhs: nparray) -> nparray:
+        """Solve the global system for the (particle_count, 3) right-hand side."""
+        F = self.factorization
+        b = np.zeros((F.n * F.m, 3))
+        b[: len(rhs)] = rhs
+        return F.solve(b.reshape(F.n, F.m, 3)).reshape(-1, 3)[: len(rhs)]
+
+    @override
+    def step(self, state_in: State, state_out: State, dt: float | None = None):
+        """
+        Simulate the model for a given time step using Projective Dynamics.
+        """
+        if dt is None:
+            dt = self.dt
+        self.ts += dt
+        model = self.model
+        if self._dt != dt or not np.array_equal(model.particle_flags, self._flags):
+            self._factorize(dt)
+        N = model.particle_count
+        active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+
+        # the explicit forces: everything but the springs
+        eval_gravitational_forces(model, state_in)
+        eval_drag_forces(model, state_in)
+        eval_contact_forces(model, state_in)
+
+        # inertial prediction y = qⁿ + h·q̇ⁿ + h²·M⁻¹·f_ext (pinned particles stay in place)
+        q0 = state_in.particle_q.astype(np.float64)
+        accel = state_in.particle_f * model.particle_inv_mass[:, None] + model.gravity
+        y = np.where(active[:, None], q0 + dt * state_in.particle_qd + dt**2 * accel, q0)
+
+        # the constant part of the right-hand side: M/h²·y, the damping of the velocities relative
+        # to qⁿ, and the couplings to the pinned particles
+        idx = model.spring_active if model.spring_active is not None else slice(None)
+        si = model.spring_indices[idx].astype(np.int64)
+        i, j = si[:, 0], si[:, 1]
+        ke, l0 = model.spring_stiffness[idx], model.spring_rest_length[idx]
+        kd = model.spring_damping[idx] / dt
+        index = _pair_scatter_index(i, j)
+        c = (model.particle_mass / dt**2)[:, None] * y
+        c += _scatter_pairs(N, index, kd[:, None] * (q0[i] - q0[j]))
+        rows, cols, vals = self._pinned_entries
+        np.subtract.at(c, rows, vals[:, None] * q0[cols])
+        c[~active] = q0[~active]
+
+        q = y
+        for _ in range(self.iterations):
+            # local step: project the springs onto their rest lengths
+            d = q[i] - q[j]
+            nrm = np.linalg.norm(d, axis=1)
+            p = d * (l0 / np.where(nrm > 1e-10, nrm, 1.0))[:, None]
+            rhs = c + _scatter_pairs(N, index, ke[:, None] * p)
+            rhs[~active] = q0[~active]
+            # global step
+            q = self._solve(rhs)
+
+        state_out.particle_q = q
+        state_out.particle_qd = np.where(active[:, None], (q - q0) / dt, state_in.particle_qd)
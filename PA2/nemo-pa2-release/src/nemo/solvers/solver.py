@@ -1,3 +1,10 @@
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from ..core.types import nparray
+from ..sim.forces import eval_all_forces
 from ..sim.model import Model
 from ..sim.state import State
 
@@ -28,5 +35,61 @@ class SolverBase:
         NOTE:
             When dt is None, this step call will use the default timestep size
             stored in self.dt. Otherwise, the given dt will be used.
+
+            Solvers write the results into the arrays of `state_out` in place (a `State` keeps
+            its arrays for its whole lifetime), and take their temporary states from
+            `model.state_pool`, releasing them before returning. So stepping allocates no state
+            after the first step, and references to the state arrays (e.g., held by the viewer)
+            stay valid.
         """
         raise NotImplementedError()
+
+    def checkpoint_data(self) -> dict[str, Any]:
+        """
+        Return the solver state that needs to be saved in a checkpoint.
+
+        Subclasses that keep additional persistent state across timesteps should extend
+        the returned dictionary. Values must be scalars or numpy arrays. Caches that can be
+        recomputed from the model (e.g., matrix factorizations) should not be included.
+        """
+        return {"ts": self.ts}
+
+    def restore_checkpoint_data(self, data: dict[str, Any]) -> None:
+        """
+        Restore the solver state from the data returned by :meth:`checkpoint_data`.
+
+        Subclasses that keep caches derived from the simulation state should invalidate
+        them here so that they are recomputed on the next step.
+        """
+        self.ts = float(data["ts"])
+
+
+def eval_accelerations(
+    model: Model,
+    state: State,
+    active: nparray,
+    out: nparray,
+    eval_forces: Callable[[Model, State], None] | None = None,
+) -> nparray:
+    """
+    Evaluate the accelerations M⁻¹·F + g of the particles at the given state into `out`.
+
+    The forces are accumulated into `state.particle_f`, which is cleared first. The accelerations
+    of the inactive particles are zero.
+
+    Args:
+        model: the simulated model
+        state: the state at which the forces are evaluated
+        active: nparray, shape (particle_count,), bool: the active particles
+        out: nparray, shape (particle_count, 3): the output array
+        eval_forces: the function evaluating the forces F (:func:`nemo.sim.forces.eval_all_forces` by default)
+
+    Returns:
+        nparray: `out`
+    """
+    state.clear_forces()
+    (eval_all_forces if eval_forces is None else eval_forces)(model, state)
+    np.multiply(state.particle_f, model.particle_inv_mass[:, None], out=out)
+    out += model.gravity
+    out[~active] = 0.0
+    return out
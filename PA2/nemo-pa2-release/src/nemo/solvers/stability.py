@@ -0,0 +1,210 @@
+from collections.abc import Callable
+
+import numpy as np
+
+from ..core.types import nparray
+from ..geometry import ParticleFlags
+from ..sim.forces import eval_all_forces
+from ..sim.model import Model
+from ..sim.state import State
+from . import _SOLVER_MODULES
+from .solver import SolverBase
+
+
+def _power_iteration(apply: Callable[[nparray], nparray], n: int, iterations: int, tol: float) -> float:
+    """The largest eigenvalue magnitude of a symmetric operator, by power iteration from a random vector."""
+    x = np.random.default_rng(0).normal(size=n)
+    x /= np.linalg.norm(x)
+    lam = 0.0
+    for _ in range(iterations):
+        y = apply(x)
+        # ‖A x‖ for a unit vector x increases towards |λ_max|
+        lam, lam_prev = np.linalg.norm(y), lam
+        if lam == 0:
+            break
+        x = y / lam
+        if abs(lam - lam_prev) <= tol * lam:
+            break
+    return float(lam)
+
+
+def estimate_frequencies(
+    model: Model, state: State | None = None, iterations: int = 100, tol: float = 1e-3
+) -> tuple[float, float]:
+    """
+    Estimate the largest angular frequency and the largest damping rate of the model at a state.
+
+    These are the square root of the largest eigenvalue of M⁻¹·K and the largest eigenvalue of
+    M⁻¹·D, where K = -∂F/∂q and D = -∂F/∂q̇ are the stiffness and damping operators of all the
+    forces (springs, gravitational pairs, drag and contacts) and M the mass matrix of the active
+    particles. The eigenvalues are computed by power iteration on M^(-1/2)·K·M^(-1/2) and
+    M^(-1/2)·D·M^(-1/2), whose products are approximated by finite differences of
+    :func:`nemo.sim.forces.eval_all_forces`, so each iteration costs one force evaluation. Power
+    iteration approaches the largest eigenvalue from below.
+
+    Args:
+        model: the simulated model
+        state: the state at which the forces are linearized (the initial state of the model by default)
+        iterations: the maximal number of power iterations per operator
+        tol: the relative tolerance of the eigenvalue estimates
+
+    Returns:
+        tuple[float, float]: the largest angular frequency omega_max and the largest damping rate gamma_max
+    """
+    if state is None:
+        state = model.state()
+    active = model.particle_flags & ParticleFlags.ACTIVE.value != 0
+    w = np.sqrt(np.where(active, model.particle_inv_mass, 0.0))[:, None]
+    q0 = state.particle_q.astype(np.float64)
+    qd0 = state.particle_qd.astype(np.float64)
+
+    pool = model.state_pool
+    tmp = pool.acquire()
+
+    def forces(q: nparray, qd: nparray) -> nparray:
+        tmp.particle_q = q
+        tmp.particle_qd = qd
+        tmp.clear_forces()
+        eval_all_forces(model, tmp)
+        return tmp.particle_f.astype(np.float64)
+
+    f0 = forces(q0, qd0)
+    sqrt_eps = np.sqrt(np.finfo(model.dtype).eps)
+    eps_q = sqrt_eps * max(1.0, np.abs(q0).max(initial=0.0))
+    eps_qd = sqrt_eps * max(1.0, np.abs(qd0).max(initial=0.0))
+
+    def stiffness(x: nparray) -> nparray:
+        dq = w * x.reshape(-1, 3)
+        return (-(w / eps_q) * (forces(q0 + eps_q * dq, qd0) - f0)).reshape(-1)
+
+    def damping(x: nparray) -> nparray:
+        dqd = w * x.reshape(-1, 3)
+        return (-(w / eps_qd) * (forces(q0, qd0 + eps_qd * dqd) - f0)).reshape(-1)
+
+    n = 3 * model.particle_count
+    omega = np.sqrt(_power_iteration(stiffness, n, iterations, tol))
+    gamma = _power_iteration(damping, n, iterations, tol)
+    pool.release(tmp)
+    return float(omega), gamma
+
+
+def _amplification_matrices(h: float, omega: float, gamma: float) -> dict[str, nparray]:
+    """
+    The amplification matrices of one step of the explicit integrators for the test equation
+    ẍ = -omega²·x - gamma·ẋ, i.e., (x, ẋ)ⁿ⁺¹ = G·(x, ẋ)ⁿ.
+    """
+    hA = h * np.array([[0.0, 1.0], [-(omega**2), -gamma]])
+    taylor = [np.eye(2)]
+    for k in range(1, 5):
+        taylor.append(taylor[-1] @ hA / k)
+    drift = np.array([[1.0, h], [0.0, 1.0]])
+    kick = np.array([[1.0, 0.0], [-h * omega**2, 1.0 - h * gamma]])
+    half_kick = np.array([[1.0, 0.0], [-0.5 * h * omega**2, 1.0 - 0.5 * h * gamma]])
+    return {
+        "ExplicitEulerSolver": taylor[0] + taylor[1],
+        "MidpointSolver": taylor[0] + taylor[1] + taylor[2],
+        "RK4Solver": sum(taylor),
+        "SymplecticEulerSolver": drift @ kick,
+        "VelocityVerletSolver": half_kick @ drift @ half_kick,
+    }
+
+
+CONDITIONALLY_STABLE_SOLVERS = (
+    "ExplicitEulerSolver",
+    "MidpointSolver",
+    "RK4Solver",
+    "SymplecticEulerSolver",
+    "VelocityVerletSolver",
+)
+"""Names of the solvers of :mod:`nemo.solvers` whose stability depends on the timestep, see :func:`stable_timestep`."""
+
+
+def _conditionally_stable_base(solver_type: type[SolverBase]) -> str | None:
+    """
+    The name of the conditionally stable solver that `solver_type` is or derives from, None if there is none.
+
+    The classes are compared by their qualified names, so that no solver module is imported (see :mod:`nemo.solvers`).
+    """
+    for cls in solver_type.__mro__:
+        name = cls.__qualname__
+        if name in CONDITIONALLY_STABLE_SOLVERS and cls.__module__ == f"{__package__}{_SOLVER_MODULES[name]}":
+            return name
+    return None
+
+
+def is_conditionally_stable(solver_type: type[SolverBase]) -> bool:
+    """Whether the stability of a solver depends on the timestep (see :data:`CONDITIONALLY_STABLE_SOLVERS`)."""
+    return _conditionally_stable_base(solver_type) is not None
+
+
+MAX_GROWTH = 1e-3
+"""Maximal growth rate of the amplitude of a stable integration, per radian of the fastest oscillation."""
+
+
+def stable_timestep(solver_type: type[SolverBase], omega: float, gamma: float) -> float:
+    """
+    The largest stable timestep of a solver for the test equation ẍ = -omega²·x - gamma·ẋ.
+
+    The timestep is found by bisection on the spectral radius rho of the amplification matrix of
+    one step. A timestep h is stable if the amplitude grows by at most :data:`MAX_GROWTH` per
+    radian, i.e., log(rho) ≤ MAX_GROWTH·h·omega (with omega replaced by gamma for overdamped
+    motion): the symplectic integrators and RK4 don't amplify oscillations below their stability
+    limit, but without damping, explicit Euler (strongly) and the midpoint method (weakly) amplify
+    them at any timestep.
+
+    Args:
+        solver_type: the solver class
+        omega: the angular frequency
+        gamma: the damping rate
+
+    Returns:
+        float: the stable timestep, infinity for the solvers that are stable for any timestep
+        (the implicit, Projective Dynamics and XPBD solvers) or that choose their substeps (the multirate solver)
+    """
+    name = _conditionally_stable_base(solver_type)
+    if name is None or (omega == 0 and gamma == 0):
+        return np.inf
+
+    scale = 1.0 / max(omega, gamma)
+
+    def stable(h: float) -> bool:
+        G = _amplification_matrices(h, omega, gamma)[name]
+        return np.log(np.abs(np.linalg.eigvals(G)).max()) <= MAX_GROWTH * h / scale + 1e-12
+
+    # scan for the first unstable timestep (on a log scale), then bisect
+    lo = 0.0
+    for k in range(-80, 81):
+        h = scale * 2.0 ** (k / 8)
+        if not stable(h):
+            break
+        lo = h
+    else:
+        return np.inf
+    hi = h
+    for _ in range(50):
+        mid = 0.5 * (lo + hi)
+        lo, hi = (mid, hi) if stable(mid) else (lo, mid)
+    return lo
+
+
+def estimate_stable_timestep(model: Model, solver_type: type[SolverBase], state: State | None = None) -> float:
+    """
+    Estimate the largest stable timestep of a solver for the given model, from the frequency and the
+    damping rate of :func:`estimate_frequencies` (see :func:`stable_timestep`).
+
+    The stiffest mode is not assumed to be the most damped one: the timestep must be stable for the
+    oscillations of frequency omega_max with any damping rate up to gamma_max (sampled), and for
+    the damping rate gamma_max alone. The springs are damped along their axis only, so stretched
+    springs (e.g., of a sagging cloth) also oscillate transversally without damping, at frequencies
+    up to the axial ones (the transverse stiffness ke·(1 - l₀/l) of a spring is below its axial
+    stiffness ke). These undamped oscillations limit the timestep of explicit Euler and the
+    midpoint method, which amplify them, far below the limit of the damped stiffest mode.
+
+    The estimate holds for the linearization at the given state (the initial state by default);
+    new contacts may require smaller timesteps.
+    """
+    if not is_conditionally_stable(solver_type):
+        return np.inf
+    omega, gamma = estimate_frequencies(model, state)
+    timesteps = [stable_timestep(solver_type, omega, g) for g in np.linspace(0.0, gamma, 9)]
+    return min(*timesteps, stable_timestep(solver_type, 0.0, gamma))
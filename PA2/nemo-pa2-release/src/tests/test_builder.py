@@ -3,6 +3,7 @@ import pytest
 
 from nemo.core import Axis
 from nemo.sim import ModelBuilder
+from nemo.sim.graph import bandwidth
 
 
 def test_builder_particles():
@@ -88,3 +89,166 @@ def test_builder_springs():
     assert m.spring_rest_length[0] == 1.0
     assert m.spring_rest_length[1] == 0.0
     assert m.spring_rest_length[3] == 1.2
+
+
+def test_builder_spring_colors():
+    builder = ModelBuilder()
+    n = 12
+    for i in range(n):
+        for j in range(n):
+            builder.add_particle(pos=(i, j, 0), vel=(0, 0, 0), mass=1.0)
+    for i in range(n):
+        for j in range(n):
+            k = i * n + j
+            if j < n - 1:
+                builder.add_spring(k, k + 1, 1.0)
+            if i < n - 1:
+                builder.add_spring(k, k + n, 1.0)
+            if i < n - 1 and j < n - 1:
+                builder.add_spring(k, k + n + 1, 1.0)
+    m = builder.finalize()
+    assert sum(len(g) for g in m.spring_color_groups) == m.spring_count
+    for c, group in enumerate(m.spring_color_groups):
+        assert np.all(m.spring_colors[group] == c)
+        # springs of the same color touch disjoint particles
+        particles = m.spring_indices[group].reshape(-1)
+        assert len(np.unique(particles)) == len(particles)
+    # the maximal particle degree is 6
+    assert len(m.spring_color_groups) <= 8
+
+
+def test_builder_reorder():
+    rng = np.random.default_rng(0)
+    n = 50
+    order = rng.permutation(n)
+    builder = ModelBuilder()
+    # a chain whose particles are added in random order
+    for k in range(n):
+        builder.add_particle(pos=(order[k], 0, 0), vel=(0, 0, 0), mass=1.0 + k)
+    rank = np.argsort(order)
+    for k in range(n - 1):
+        builder.add_spring(int(rank[k]), int(rank[k + 1]), 10.0)
+    builder.add_gravitational(int(rank[0]), int(rank[-1]), 1.0)
+
+    m0 = builder.finalize()
+    m = builder.finalize(reorder="rcm")
+    # the gravitational pair closes the chain into a ring, whose minimal bandwidth is 2
+    assert bandwidth(m.spring_indices) <= 2
+    assert bandwidth(m0.spring_indices) > 2
+    ids = np.arange(n)
+    idx = m.particle_index(ids)
+    assert np.array_equal(m.particle_permutation[idx], ids)
+    assert np.array_equal(m.particle_mass[idx], m0.particle_mass)
+    assert np.array_equal(m.particle_q[idx], m0.particle_q)
+    assert np.array_equal(idx[m0.gravitational_pairs], m.gravitational_pairs)
+
+    m = builder.finalize(reorder="morton")
+    assert np.array_equal(m.particle_q[m.particle_index(ids)], m0.particle_q)
+    with pytest.raises(RuntimeError):
+        builder.finalize(reorder="unknown")
+
+
+def test_builder_arrays():
+    rng = np.random.default_rng(0)
+    n = 20
+    pos = rng.random((n, 3))
+    vel = rng.random((n, 3))
+    mass = 1.0 + rng.random(n)
+    flags = np.ones(n, dtype=np.int32)
+    flags[3] = 0
+    springs = np.stack([np.arange(n - 1), np.arange(1, n)], axis=1)
+
+    b0 = ModelBuilder()
+    for k in range(n):
+        b0.add_particle(pos=pos[k], vel=vel[k], mass=mass[k], flags=int(flags[k]))
+    for i, j in springs:
+        b0.add_spring(int(i), int(j), 10.0, kd=0.5)
+    b0.add_spring(0, 2, 5.0, rest_length=0.3)
+    m0 = b0.finalize()
+
+    b1 = ModelBuilder()
+    b1.add_particles(pos[:5], vel[:5], mass[:5], flags=flags[:5])
+    b1.add_particles(pos[5:], vel[5:], mass[5:], flags=flags[5:])
+    b1.add_springs(springs, 10.0, kd=0.5)
+    b1.add_springs([(0, 2)], [5.0], rest_length=0.3)
+    m1 = b1.finalize()
+
+    for name in ("particle_q", "particle_qd", "particle_mass", "particle_flags", "particle_radius"):
+        assert np.array_equal(getattr(m0, name), getattr(m1, name))
+    for name in ("spring_indices", "spring_stiffness", "spring_damping", "spring_rest_length"):
+        assert np.array_equal(getattr(m0, name), getattr(m1, name))
+    assert np.all(m1.particle_qd[3] == 0.0)
+    assert m1.spring_rest_length[-1] == 0.3
+
+    # the builder can be finalized again
+    assert np.array_equal(b1.finalize().spring_rest_length, m1.spring_rest_length)
+
+    with pytest.raises(RuntimeError):
+        b1.add_particles(np.zeros((2, 2)), np.zeros((2, 2)), 1.0)
+    with pytest.raises(RuntimeError):
+        b1.add_particles(np.zeros((2, 3)), np.zeros((2, 3)), [1.0, 1.0, 1.0])
+    b1.add_springs([(0, n + 2)], 1.0)
+    with pytest.raises(RuntimeError):
+        b1.finalize()
+
+
+def test_builder_procedural():
+    builder = ModelBuilder()
+    builder.add_particle(pos=(0, 0, 0), vel=(0, 0, 0), mass=1.0)
+    rows, cols, h = 4, 5, 0.1
+    first = builder.add_cloth_grid(
+        (0, 0, 1), rows, cols, h, mass=0.1, ke=10.0, shear_ke=5.0, bend_ke=1.0, fixed_cols=[0, -1]
+    )
+    assert first == 1
+    m = builder.finalize()
+    assert m.particle_count == 1 + rows * cols
+    assert np.allclose(m.particle_q[first + 2 * cols + 3], (2 * h, 3 * h, 1))
+    fixed = (m.particle_flags[first:] == 0).reshape(rows, cols)
+    assert np.all(fixed[:, [0, -1]]) and not np.any(fixed[:, 1:-1])
+    structural = rows * (cols - 1) + (rows - 1) * cols
+    shear = 2 * (rows - 1) * (cols - 1)
+    bend = rows * (cols - 2) + (rows - 2) * cols
+    assert m.spring_count == structural + shear + bend
+    assert np.all(m.spring_indices >= first)
+    lengths = np.sort(np.unique(np.round(m.spring_rest_length / h, 6)))
+    assert np.allclose(lengths, [1.0, np.sqrt(2.0), 2.0])
+
+    builder = ModelBuilder()
+    builder.add_rope((0, 0, 0), (1, 0, 0), 11, mass=0.1, ke=10.0, fixed=[0])
+    builder.add_lattice((0, 0, 0), (2, 3, 4), 0.1, mass=0.1, ke=10.0)
+    m = builder.finalize()
+    assert m.particle_count == 11 + 24
+    assert m.particle_flags[0] == 0 and np.all(m.particle_flags[1:] != 0)
+    assert np.allclose(m.spring_rest_length, 0.1)
+    assert m.spring_count == 10 + (1 * 3 * 4 + 2 * 2 * 4 + 2 * 3 * 3)
+
+
+def test_builder_instances():
+    rope = ModelBuilder()
+    rope.add_rope((0, 0, 0), (1, 0, 0), 5, mass=0.1, ke=10.0, fixed=[0])
+    rope.add_gravitational(0, 4, 1.0)
+    n = rope.particle_count
+
+    builder = ModelBuilder()
+    builder.add_particle(pos=(0, 0, 0), vel=(0, 0, 0), mass=1.0)
+    count = 3
+    offsets = np.stack([np.zeros(count), np.arange(count), np.zeros(count)], axis=1)
+    rot = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    first = builder.add_builder(rope, pos=offsets, rot=rot)
+    assert first == 1
+    second = builder.add_model(rope.finalize(), pos=(0, 0, 5))
+    assert second == 1 + count * n
+    m = builder.finalize()
+
+    assert m.particle_count == 1 + (count + 1) * n
+    assert m.spring_count == (count + 1) * (n - 1)
+    assert m.gravitational_count == count + 1
+    # the rotated ropes point along y
+    q = m.particle_q[first : first + count * n].reshape(count, n, 3)
+    assert np.allclose(q[:, -1] - q[:, 0], (0.0, 1.0, 0.0))
+    assert np.allclose(q[:, 0], offsets)
+    assert np.allclose(m.particle_q[second + n - 1], (1.0, 0.0, 5.0))
+    assert np.all(m.particle_flags[first : first + count * n : n] == 0)
+    assert np.allclose(m.spring_rest_length, 0.25)
+    assert np.array_equal(m.gravitational_pairs[:, 1] - m.gravitational_pairs[:, 0], [n - 1] * (count + 1))
+    assert m.gravitational_pairs[1, 0] == first + n
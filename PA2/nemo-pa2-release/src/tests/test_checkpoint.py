@@ -0,0 +1,58 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from nemo.sim import ModelBuilder, load_checkpoint, save_checkpoint
+from nemo.solvers import ExplicitEulerSolver, ImplicitEulerSolver, LinearizedImplicitSolver
+
+
+def _build(stiffness=10.0):
+    builder = ModelBuilder()
+    builder.add_particle(pos=(0, 0, 1), vel=(0, 0, 0), mass=1.0, flags=0)
+    builder.add_particle(pos=(0, 0, 0), vel=(0.1, 0, 0), mass=1.0)
+    builder.add_spring(0, 1, stiffness, 0.1)
+    return builder.finalize()
+
+
+@pytest.mark.parametrize(
+    "solver_type", [LinearizedImplicitSolver, partial(ImplicitEulerSolver, predictor="extrapolate")]
+)
+def test_checkpoint_roundtrip(tmp_path, solver_type):
+    model = _build()
+    solver = solver_type(model, 0.01)
+    s0, s1 = model.state(), model.state()
+    for _ in range(5):
+        s0.clear_forces()
+        solver.step(s0, s1)
+        s0, s1 = s1, s0
+    path = tmp_path / "sim.npz"
+    save_checkpoint(path, model, s0, solver)
+    assert list(tmp_path.iterdir()) == [path]
+
+    # continue the original run
+    s1.clear_forces()
+    solver.step(s0, s1)
+
+    # resume from the checkpoint
+    solver2 = solver_type(model, 0.01)
+    r0, r1 = model.state(), model.state()
+    load_checkpoint(path, model, r0, solver2)
+    assert solver2.ts == pytest.approx(0.05)
+    r1.clear_forces()
+    solver2.step(r0, r1)
+    assert np.array_equal(r1.particle_q, s1.particle_q)
+    assert np.array_equal(r1.particle_qd, s1.particle_qd)
+
+
+def test_checkpoint_mismatch(tmp_path):
+    model = _build()
+    solver = LinearizedImplicitSolver(model, 0.01)
+    path = tmp_path / "sim.npz"
+    save_checkpoint(path, model, model.state(), solver)
+
+    other = _build(stiffness=20.0)
+    with pytest.raises(RuntimeError):
+        load_checkpoint(path, other, other.state(), LinearizedImplicitSolver(other, 0.01))
+    with pytest.raises(RuntimeError):
+        load_checkpoint(path, model, model.state(), ExplicitEulerSolver(model, 0.01))
@@ -0,0 +1,136 @@
+import numpy as np
+
+from nemo.geometry import HashGrid
+from nemo.sim import ModelBuilder
+from nemo.sim.forces import (
+    eval_contact_forces,
+    eval_ground_contact_force_pos_jacobians,
+    eval_ground_contact_force_vel_jacobians,
+    eval_particle_contact_force_jacobians,
+    find_particle_contacts,
+)
+
+
+def _brute_force_pairs(points, dist):
+    d = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)
+    i, j = np.nonzero(np.triu(d < dist, k=1))
+    return set(zip(i.tolist(), j.tolist(), strict=True))
+
+
+def test_hash_grid_pairs():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1.0, 1.0, size=(500, 3))
+    grid = HashGrid()
+    grid.build(points, cell_size=0.2)
+    i, j = grid.query_pairs()
+    pairs = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist(), strict=True)}
+    # every pair is reported only once
+    assert len(pairs) == len(i)
+    assert _brute_force_pairs(points, 0.2) <= pairs
+    # the grid and its pairs are reused for the same points, and rebuilt when they move
+    grid.build(points.copy())
+    assert grid.query_pairs()[0] is i
+    points[0] += 0.5
+    grid.build(points)
+    i, j = grid.query_pairs()
+    pairs = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist(), strict=True)}
+    assert _brute_force_pairs(points, 0.2) <= pairs
+
+
+def test_particle_contacts():
+    rng = np.random.default_rng(1)
+    builder = ModelBuilder()
+    pos = rng.uniform(0.0, 1.0, size=(200, 3))
+    builder.add_particles(list(pos), [(0, 0, 0)] * 200, [1.0] * 200, radius=[0.05] * 200)
+    builder.add_spring(0, 1, 1.0)
+    builder.particle_ke = 100.0
+    model = builder.finalize()
+    state = model.state()
+    i, j = find_particle_contacts(model, state)
+    found = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist(), strict=True)}
+    expected = _brute_force_pairs(pos, 0.1) - {(0, 1)}
+    assert found == expected
+
+
+def _fd_jacobian(model, state, attr, EPS=1e-6):
+    n = model.particle_count * 3
+    J = np.zeros((n, n))
+    x = getattr(state, attr).reshape(-1)
+    for c in range(n):
+        t = x[c]
+        x[c] = t + EPS
+        state.clear_forces()
+        eval_contact_forces(model, state)
+        f_p = state.particle_f.reshape(-1).copy()
+        x[c] = t - EPS
+        state.clear_forces()
+        eval_contact_forces(model, state)
+        f_m = state.particle_f.reshape(-1).copy()
+        x[c] = t
+        J[:, c] = (f_p - f_m) / (2 * EPS)
+    return J
+
+
+def test_contact_jacobians():
+    builder = ModelBuilder()
+    builder.add_particle(pos=(0.0, 0.0, 0.05), vel=(0.1, 0.2, -0.3), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(0.12, 0.05, 0.08), vel=(-0.2, 0.0, 0.1), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(0.1, 0.1, 0.25), vel=(0, 0, 0), mass=1.0, radius=0.1, flags=0)
+    builder.add_ground_plane(ke=50.0, kd=0.5)
+    builder.particle_ke = 200.0
+    builder.particle_kd = 0.7
+    model = builder.finalize()
+    state = model.state()
+    n = model.particle_count * 3
+    S = 0.3
+
+    A = np.zeros((n, n))
+    eval_ground_contact_force_pos_jacobians(model, state, A, S)
+    eval_particle_contact_force_jacobians(model, state, A, None, scale_pos=S)
+    assert np.allclose(_fd_jacobian(model, state, "particle_q") * S, A, atol=1e-5)
+
+    A = np.zeros((n, n))
+    eval_ground_contact_force_vel_jacobians(model, state, A, S)
+    eval_particle_contact_force_jacobians(model, state, None, A, scale_vel=S)
+    assert np.allclose(_fd_jacobian(model, state, "particle_qd") * S, A, atol=1e-5)
+
+
+def test_ground_contact_clamp():
+    # a penetrating particle leaving the ground fast enough is not pulled back by the damping
+    builder = ModelBuilder()
+    builder.add_particle(pos=(0.0, 0.0, 0.05), vel=(0.0, 0.0, 5.0), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(0.5, 0.0, 0.05), vel=(0.0, 0.0, 0.5), mass=1.0, radius=0.1)
+    builder.add_ground_plane(ke=50.0, kd=1.0)
+    model = builder.finalize()
+    state = model.state()
+    eval_contact_forces(model, state)
+    assert np.allclose(state.particle_f[0], 0.0)
+    assert np.allclose(state.particle_f[1], (0.0, 0.0, 50.0 * 0.05 - 0.5))
+
+    A, B = np.zeros((6, 6)), np.zeros((6, 6))
+    eval_ground_contact_force_pos_jacobians(model, state, A)
+    eval_ground_contact_force_vel_jacobians(model, state, B)
+    assert np.allclose(A[:3, :3], 0.0) and np.allclose(B[:3, :3], 0.0)
+    assert A[5, 5] == -50.0 and B[5, 5] == -1.0
+
+
+def test_particle_contact_clamp():
+    # overlapping particles separating fast enough are not pulled back together by the damping
+    builder = ModelBuilder(gravity=0.0)
+    builder.add_particle(pos=(0.0, 0.0, 1.0), vel=(-5.0, 0.0, 0.0), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(0.15, 0.0, 1.0), vel=(5.0, 0.0, 0.0), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(1.0, 0.0, 1.0), vel=(0.0, 0.0, 0.0), mass=1.0, radius=0.1)
+    builder.add_particle(pos=(1.15, 0.0, 1.0), vel=(0.1, 0.0, 0.0), mass=1.0, radius=0.1)
+    builder.particle_ke = 1000.0
+    builder.particle_kd = 10.0
+    model = builder.finalize()
+    state = model.state()
+    eval_contact_forces(model, state)
+    assert np.allclose(state.particle_f[:2], 0.0)
+    fn = 1000.0 * 0.05 - 10.0 * 0.1
+    assert np.allclose(state.particle_f[2:], [(-fn, 0.0, 0.0), (fn, 0.0, 0.0)])
+
+    A, B = np.zeros((12, 12)), np.zeros((12, 12))
+    eval_particle_contact_force_jacobians(model, state, A, B)
+    assert np.allclose(A[:6, :6], 0.0) and np.allclose(B[:6, :6], 0.0)
+    assert A[6, 6] == -1000.0 and B[6, 6] == -10.0
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from nemo.sim import DIAGNOSTICS, DiagnosticsRecorder, ModelBuilder, eval_diagnostics
+from nemo.solvers import VelocityVerletSolver
+
+
+def _diagnostics(model, state):
+    return dict(zip(DIAGNOSTICS, eval_diagnostics(model, state), strict=True))
+
+
+def test_energies():
+    builder = ModelBuilder()
+    builder.add_particle((0, 0, 2), (0, 0, 0), mass=1.0, flags=0)
+    builder.add_particle((1.5, 0, 2), (0, 2, 0), mass=0.5)
+    builder.add_particle((0, 0, 0.05), (1, 0, 0), mass=2.0, radius=0.1)
+    builder.add_spring(0, 1, 100.0, 0.0, rest_length=1.0)
+    builder.add_gravitational(1, 2, 3.0)
+    builder.add_ground_plane(1000.0)
+    model = builder.finalize()
+    d = _diagnostics(model, model.state())
+    # the fixed particle has neither kinetic nor potential energy
+    assert d["kinetic_energy"] == pytest.approx(0.5 * 0.5 * 4 + 0.5 * 2.0 * 1)
+    assert d["spring_energy"] == pytest.approx(0.5 * 100.0 * 0.5**2)
+    assert d["gravity_energy"] == pytest.approx(9.81 * (0.5 * 2 + 2.0 * 0.05))
+    assert d["gravitational_energy"] == pytest.approx(-3.0 * 0.5 * 2.0 / np.hypot(1.5, 1.95))
+    assert d["contact_energy"] == pytest.approx(0.5 * 1000.0 * 0.05**2)
+    assert d["total_energy"] == pytest.approx(sum(d[name] for name in DIAGNOSTICS[:5]))
+    assert np.allclose([d["momentum_x"], d["momentum_y"], d["momentum_z"]], [2.0, 1.0, 0.0])
+    L = 0.5 * np.cross((1.5, 0, 2), (0, 2, 0)) + 2.0 * np.cross((0, 0, 0.05), (1, 0, 0))
+    assert np.allclose([d["angular_momentum_x"], d["angular_momentum_y"], d["angular_momentum_z"]], L)
+
+
+def test_conservation():
+    # a free, undamped and spinning spring network without gravity conserves its energy and momenta
+    builder = ModelBuilder(gravity=0.0)
+    builder.add_rope((0, 0, 1), (1, 0, 1), count=5, mass=0.1, ke=50.0, kd=0.0)
+    model = builder.finalize()
+    state = model.state()
+    state.particle_qd[:, 1] = np.linspace(-1, 1, 5)
+    state.particle_qd[:, 0] = 0.3
+    solver = VelocityVerletSolver(model, 1e-3)
+    recorder = DiagnosticsRecorder(model)
+    s0, s1 = state, model.state()
+    for _ in range(2000):
+        recorder.record(solver.ts, s0)
+        s0.clear_forces()
+        solver.step(s0, s1)
+        s0, s1 = s1, s0
+    assert recorder.values.shape == (2000, len(DIAGNOSTICS))
+    assert np.ptp(recorder.series("spring_energy")) > 0.005
+    energy = recorder.series("total_energy")
+    assert np.abs(energy - energy[0]).max() < 1e-3 * energy[0]
+    momenta = recorder.values[:, DIAGNOSTICS.index("momentum_x") :]
+    assert np.allclose(momenta, momenta[0], atol=1e-10)
+
+
+def test_recorder(tmp_path):
+    builder = ModelBuilder()
+    builder.add_particle((0, 0, 1), (0, 0, 0), mass=1.0)
+    model = builder.finalize()
+    state = model.state()
+    path = tmp_path / "diagnostics.csv"
+    recorder = DiagnosticsRecorder(model, path=path, every=2, window=3)
+    for k in range(10):
+        state.particle_q[0, 2] = k
+        recorder.record(0.1 * k, state)
+    recorder.close()
+    # the samples 0, 2, ..., 8, of which the last three are kept in memory
+    assert np.allclose(recorder.times, [0.4, 0.6, 0.8])
+    assert np.allclose(recorder.series("gravity_energy"), 9.81 * np.array([4, 6, 8]))
+    data = np.loadtxt(path, delimiter=",", skiprows=1)
+    assert path.read_text().startswith("time," + ",".join(DIAGNOSTICS))
+    assert data.shape == (5, 1 + len(DIAGNOSTICS))
+    assert np.allclose(data[:, 0], [0.0, 0.2, 0.4, 0.6, 0.8])
+    with pytest.raises(RuntimeError):
+        recorder.series("potential_energy")
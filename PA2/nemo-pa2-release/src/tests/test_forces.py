@@ -1,7 +1,16 @@
 import numpy as np
+import pytest
 
-from nemo.sim import ModelBuilder
-from nemo.sim.forces import eval_gravitational_forces
+from nemo.sim import ModelBuilder, parallel
+from nemo.sim.forces import eval_all_forces, eval_gravitational_forces, eval_spring_forces
+from nemo.solvers import (
+    ExplicitEulerSolver,
+    ImplicitEulerSolver,
+    LinearizedImplicitSolver,
+    MidpointSolver,
+    RK4Solver,
+    VelocityVerletSolver,
+)
 
 
 def test_gravitational_forces():
@@ -14,3 +23,88 @@ def test_gravitational_forces():
     eval_gravitational_forces(model, state)
     assert np.all(state.particle_f[0] == np.array([1.0, 0.0, 0.0]))
     assert np.all(state.particle_f[1] == np.array([-1.0, 0.0, 0.0]))
+
+
+def test_spring_forces_parallel(monkeypatch):
+    rng = np.random.default_rng(0)
+    builder = ModelBuilder()
+    n = 2000
+    builder.add_particles(
+        list(rng.uniform(size=(n, 3))), list(rng.uniform(size=(n, 3))), [1.0] * n, flags=[1] * (n - 5) + [0] * 5
+    )
+    for _ in range(3 * n):
+        i, j = rng.integers(n, size=2)
+        builder.add_spring(int(i), int(j), rng.uniform(1, 10), rng.uniform(0, 1), rng.uniform(0, 1))
+    model = builder.finalize()
+    state = model.state()
+    eval_spring_forces(model, state)
+    f_serial = state.particle_f.copy()
+
+    # the forces of a partition of the springs add up to the forces of all the springs
+    subset = rng.permutation(model.spring_count)[: model.spring_count // 3]
+    rest = np.setdiff1d(np.arange(model.spring_count), subset)
+    state.clear_forces()
+    eval_spring_forces(model, state, subset)
+    f_subset = state.particle_f.copy()
+    eval_spring_forces(model, state, rest)
+    assert np.allclose(state.particle_f, f_serial)
+
+    monkeypatch.setattr(parallel, "MIN_CHUNK_SIZE", 16)
+    parallel.set_num_threads(4)
+    try:
+        state.clear_forces()
+        eval_spring_forces(model, state)
+        f_parallel = state.particle_f.copy()
+        state.clear_forces()
+        eval_spring_forces(model, state, subset)
+    finally:
+        parallel.set_num_threads(1)
+    assert np.allclose(f_parallel, f_serial)
+    assert np.allclose(state.particle_f, f_subset)
+
+
+def _cloth(dtype):
+    builder = ModelBuilder()
+    builder.add_cloth_grid((0, 0, 1), 8, 8, 0.1, mass=0.01, ke=100.0, kd=0.01, shear_ke=20.0, fixed_rows=(0,))
+    builder.add_ground_plane(1000.0, 1.0, height=0.5)
+    return builder.finalize(dtype=dtype)
+
+
+def test_float32_forces():
+    m64, m32 = _cloth(np.float64), _cloth(np.float32)
+    assert m32.dtype == np.float32
+    assert all(getattr(m32, name).dtype == np.float32 for name in m32.FLOAT_ARRAYS)
+    s64, s32 = m64.state(), m32.state()
+    s64.particle_qd[:] = s32.particle_qd[:] = np.random.default_rng(0).normal(size=(m64.particle_count, 3))
+    eval_all_forces(m64, s64)
+    eval_all_forces(m32, s32)
+    assert s32.particle_f.dtype == np.float32
+    assert np.allclose(s32.particle_f, s64.particle_f, rtol=1e-4, atol=1e-4)
+    with pytest.raises(RuntimeError):
+        _cloth(np.int32)
+
+
+@pytest.mark.parametrize(
+    "solver_type",
+    [
+        ExplicitEulerSolver,
+        MidpointSolver,
+        RK4Solver,
+        VelocityVerletSolver,
+        LinearizedImplicitSolver,
+        ImplicitEulerSolver,
+    ],
+)
+def test_float32_solvers(solver_type):
+    results = []
+    for dtype in (np.float64, np.float32):
+        model = _cloth(dtype)
+        solver = solver_type(model, 1e-3)
+        s0, s1 = model.state(), model.state()
+        for _ in range(50):
+            s0.clear_forces()
+            solver.step(s0, s1)
+            s0, s1 = s1, s0
+        assert s0.particle_q.dtype == s0.particle_qd.dtype == dtype
+        results.append(s0.particle_q)
+    assert np.allclose(results[0], results[1], atol=1e-5)
@@ -0,0 +1,69 @@
+import numpy as np
+
+from nemo.geometry import BVH, ParticleFlags
+from nemo.sim import ModelBuilder, SelfCollision
+
+
+def _overlapping_pairs(lower, upper):
+    overlap = np.all((lower[:, None] <= upper[None]) & (lower[None] <= upper[:, None]), axis=2)
+    i, j = np.nonzero(np.triu(overlap, k=1))
+    return set(zip(i.tolist(), j.tolist(), strict=True))
+
+
+def test_bvh_refit_query():
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0.0, 1.0, size=(300, 3))
+    bvh = BVH(centers - 0.03, centers + 0.03)
+    # move the primitives, so that the (fixed) topology no longer matches the positions
+    centers = rng.uniform(0.0, 1.0, size=(300, 3))
+    bvh.refit(centers - 0.04, centers + 0.04)
+    a, b = bvh.query_self_pairs()
+    pairs = {(min(x, y), max(x, y)) for x, y in zip(a.tolist(), b.tolist(), strict=True)}
+    assert len(pairs) == len(a)
+    assert pairs == _overlapping_pairs(centers - 0.04, centers + 0.04)
+
+
+def _crossing_segments(z1):
+    builder = ModelBuilder()
+    # segment along x at height 0, and a segment along y moving down from height 0.1 to z1
+    builder.add_particle(pos=(-1, 0, 0), vel=(0, 0, 0), mass=1.0)
+    builder.add_particle(pos=(1, 0, 0), vel=(0, 0, 0), mass=1.0)
+    builder.add_particle(pos=(0, -1, 0.1), vel=(0, 0, 0), mass=1.0)
+    builder.add_particle(pos=(0, 1, 0.1), vel=(0, 0, 0), mass=1.0)
+    builder.add_spring(0, 1, 1.0)
+    builder.add_spring(2, 3, 1.0)
+    model = builder.finalize()
+    state_in, state_out = model.state(), model.state()
+    state_out.particle_q[2:, 2] = z1
+    state_out.particle_qd[2:, 2] = (z1 - 0.1) / 0.01
+    return model, state_in, state_out
+
+
+def test_self_collision_proximity():
+    model, state_in, state_out = _crossing_segments(0.005)
+    sc = SelfCollision(model, thickness=0.02)
+    sc.apply(state_in, state_out, 0.01)
+    assert sc.collision_count == 1
+    assert state_out.particle_q[2, 2] - state_out.particle_q[0, 2] >= 0.02 - 1e-12
+
+
+def test_self_collision_crossing():
+    # the fast segment passes through the other one during a single step
+    model, state_in, state_out = _crossing_segments(-0.3)
+    sc = SelfCollision(model, thickness=0.02)
+    sc.apply(state_in, state_out, 0.01)
+    assert sc.collision_count == 1
+    assert state_out.particle_q[2, 2] - state_out.particle_q[0, 2] >= 0.02 - 1e-12
+    assert np.all(state_out.particle_qd[:2, 2] < 0.0)
+
+
+def test_self_collision_sleeping():
+    # particles falling asleep after the construction receive no impulse
+    model, state_in, state_out = _crossing_segments(0.005)
+    sc = SelfCollision(model, thickness=0.02)
+    model.particle_flags[:2] = ParticleFlags.SLEEPING.value
+    expected = state_out.particle_q.copy()
+    sc.apply(state_in, state_out, 0.01)
+    assert sc.collision_count == 1
+    assert np.all(state_out.particle_q[:2] == expected[:2])
+    assert state_out.particle_q[2, 2] - state_out.particle_q[0, 2] >= 0.02 - 1e-12
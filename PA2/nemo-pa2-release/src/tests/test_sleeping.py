@@ -0,0 +1,73 @@
+import numpy as np
+
+from nemo.geometry import ParticleFlags
+from nemo.sim import ModelBuilder, Sleeping, model_hash
+from nemo.sim.graph import connected_components
+from nemo.solvers import LinearizedImplicitSolver
+
+
+def test_connected_components():
+    rng = np.random.default_rng(0)
+    n = 200
+    # three shuffled chains and isolated vertices
+    perm = rng.permutation(n)
+    chains = [perm[0:50], perm[50:120], perm[120:180]]
+    edges = np.concatenate([np.stack([c[:-1], c[1:]], axis=1) for c in chains])
+    count, component = connected_components(rng.permutation(edges), n)
+    assert count == 3 + 20
+    for c in chains:
+        assert len(np.unique(component[c])) == 1
+    assert len(np.unique(component[[c[0] for c in chains]])) == 3
+    # components are numbered in the order of their smallest vertex
+    first = [np.nonzero(component == k)[0][0] for k in range(count)]
+    assert first == sorted(first)
+
+
+def _damped_ropes():
+    builder = ModelBuilder()
+    for y in (0.0, 1.0):
+        builder.add_rope((0, y, 1), (1, y, 1), 6, mass=0.1, ke=200.0, kd=2.0, fixed=[0])
+    m = builder.finalize()
+    m.particle_drag[:] = 0.5
+    return m
+
+
+def _run(m, solver, sleeping, s0, s1, steps):
+    for _ in range(steps):
+        solver.step(s0, s1)
+        sleeping.update(s0, s1, solver.dt)
+        s0, s1 = s1, s0
+    return s0, s1
+
+
+def test_sleeping():
+    m = _damped_ropes()
+    h = model_hash(m)
+    solver = LinearizedImplicitSolver(m, 0.01)
+    sleeping = Sleeping(m, velocity_threshold=1e-3, force_threshold=1e-2, window=20)
+    # the fixed anchors don't belong to any island
+    assert sleeping.island_count == 2
+    assert np.all(sleeping.island[[0, 6]] == -1)
+
+    s0, s1 = _run(m, solver, sleeping, m.state(), m.state(), 1000)
+    assert sleeping.sleeping_count == 10
+    assert np.all(sleeping.asleep)
+    assert np.all(m.particle_flags[sleeping.island >= 0] == ParticleFlags.SLEEPING.value)
+    assert len(m.spring_active) == 0
+    assert model_hash(m) == h
+
+    # sleeping islands don't move
+    q = s0.particle_q.copy()
+    s0, s1 = _run(m, solver, sleeping, s0, s1, 10)
+    assert np.array_equal(s0.particle_q, q)
+
+    # a perturbed island wakes up, the other one keeps sleeping
+    s0.particle_qd[3] = (0.0, 0.0, 1.0)
+    s0, s1 = _run(m, solver, sleeping, s0, s1, 1)
+    assert sleeping.asleep.tolist() == [False, True]
+    assert np.all(m.particle_flags[1:6] == ParticleFlags.ACTIVE.value)
+    assert np.array_equal(np.sort(m.spring_active), np.arange(5))
+
+    sleeping.wake(8)
+    assert not np.any(sleeping.asleep)
+    assert m.spring_active is None
@@ -0,0 +1,457 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+import nemo
+from nemo import solvers
+from nemo.core.linalg import (
+    BlockBandedMatrix,
+    BlockDiagonalMatrix,
+    BlockTridiagonalFactorization,
+    banded_to_block_tridiagonal,
+    conjugate_gradient,
+    expm,
+    expm_multiply,
+    gmres,
+)
+from nemo.sim import DIAGNOSTICS, ModelBuilder, eval_diagnostics
+from nemo.solvers import (
+    ExplicitEulerSolver,
+    ExponentialSolver,
+    ImplicitEulerSolver,
+    LinearizedImplicitSolver,
+    MidpointSolver,
+    MultirateSolver,
+    ProjectiveDynamicsSolver,
+    RK4Solver,
+    VelocityVerletSolver,
+    XPBDSolver,
+)
+from nemo.solvers import solver as solver_module
+from nemo.solvers.stability import (
+    estimate_frequencies,
+    estimate_stable_timestep,
+    is_conditionally_stable,
+    stable_timestep,
+)
+
+
+def _rope(n, reorder=None):
+    rng = np.random.default_rng(0)
+    builder = ModelBuilder()
+    order = rng.permutation(n)
+    rank = np.argsort(order)
+    for k in range(n):
+        builder.add_particle(pos=(0.1 * order[k], 0, 1), vel=(0, 0, 0), mass=0.1, flags=int(order[k] not in (0, n - 1)))
+    for k in range(n - 1):
+        builder.add_spring(int(rank[k]), int(rank[k + 1]), 100.0, 0.1, rest_length=0.09)
+    return builder.finalize(reorder=reorder)
+
+
+def _simulate(solver, steps=20):
+    s0, s1 = solver.model.state(), solver.model.state()
+    for _ in range(steps):
+        s0.clear_forces()
+        solver.step(s0, s1)
+        s0, s1 = s1, s0
+    return s0
+
+
+def test_block_banded_solve():
+    rng = np.random.default_rng(1)
+    n, bw = 37, 3
+    A = BlockBandedMatrix(n, bw)
+    rows, cols = np.nonzero(np.abs(np.arange(n)[:, None] - np.arange(n)[None, :]) <= bw)
+    A.add_blocks(rows, cols, rng.normal(size=(len(rows), 3, 3)))
+    A.add_diagonal(np.full(3 * n, 20.0))
+    A.fix_blocks(np.array([0, 5]))
+    b = rng.normal(size=3 * n)
+    x = A.solve(b)
+    assert np.allclose(A.to_dense() @ x, b)
+    assert np.allclose(A.matvec(x), b)
+
+
+@pytest.mark.parametrize("solver_type", [LinearizedImplicitSolver, ImplicitEulerSolver])
+def test_banded_solver(solver_type):
+    dense = _rope(60)
+    banded = _rope(60, reorder="rcm")
+    s_dense = _simulate(solver_type(dense, 0.01, linear_solver="dense"))
+    solver = solver_type(banded, 0.01)
+    assert solver.system.linear_solver == "banded"
+    s_banded = _simulate(solver)
+    idx = banded.particle_index(np.arange(60))
+    assert np.allclose(s_banded.particle_q[idx], s_dense.particle_q)
+    assert np.allclose(s_banded.particle_qd[idx], s_dense.particle_qd)
+
+
+def test_block_diagonal_solve():
+    rng = np.random.default_rng(2)
+    group = rng.integers(0, 5, size=23)
+    A = BlockDiagonalMatrix(group)
+    rows, cols = np.nonzero(group[:, None] == group[None, :])
+    A.add_blocks(rows, cols, rng.normal(size=(len(rows), 3, 3)))
+    A.add_diagonal(np.full(3 * len(group), 20.0))
+    A.fix_blocks(np.array([1, 7]))
+    b = rng.normal(size=3 * len(group))
+    x = A.solve(b)
+    assert np.allclose(A.to_dense() @ x, b)
+    assert np.allclose(A.matvec(x), b)
+    with pytest.raises(RuntimeError):
+        A.add_blocks(np.array([0]), np.array([np.nonzero(group != group[0])[0][0]]), np.eye(3)[None])
+
+
+@pytest.mark.parametrize("solver_type", [LinearizedImplicitSolver, ImplicitEulerSolver])
+def test_components_solver(solver_type):
+    def ropes():
+        builder = ModelBuilder()
+        for k in range(4):
+            builder.add_rope((0, k, 2), (1 + 0.1 * k, k, 2), count=6 + k, mass=0.1, ke=100.0, kd=0.1, fixed=(0,))
+        return builder.finalize()
+
+    model = ropes()
+    assert model.component_count == 4 + 4  # ropes plus their fixed anchors
+    s_dense = _simulate(solver_type(ropes(), 0.01, linear_solver="dense"))
+    solver = solver_type(model, 0.01)
+    assert solver.system.linear_solver == "components"
+    s_comp = _simulate(solver)
+    assert np.allclose(s_comp.particle_q, s_dense.particle_q)
+    assert np.allclose(s_comp.particle_qd, s_dense.particle_qd)
+
+
+@pytest.mark.parametrize("size", [30, 700])
+def test_block_tridiagonal_factorization(size):
+    rng = np.random.default_rng(3)
+    bw = 4
+    rows, cols = np.nonzero(np.abs(np.arange(size)[:, None] - np.arange(size)[None, :]) <= bw)
+    values = rng.normal(size=len(rows)) + 10.0 * (rows == cols)
+    D, L, U = banded_to_block_tridiagonal(rows, cols, values, size, bw)
+    F = BlockTridiagonalFactorization(D, L, U)
+    A = np.zeros((size, size))
+    A[rows, cols] = values
+    b = np.zeros((len(D) * bw, 2))
+    b[:size] = rng.normal(size=(size, 2))
+    x = F.solve(b.reshape(len(D), bw, 2)).reshape(-1, 2)
+    assert np.allclose(A @ x[:size], b[:size])
+    with pytest.raises(RuntimeError):
+        banded_to_block_tridiagonal(np.array([0]), np.array([bw + 1]), np.ones(1), size, bw)
+
+
+def _hanging_rope():
+    builder = ModelBuilder()
+    builder.add_rope((0, 0, 1), (1, 0, 1), count=20, mass=0.05, ke=200.0, kd=0.5, drag=0.3, fixed=[0, -1])
+    return builder.finalize()
+
+
+def test_projective_dynamics():
+    # a damped hanging rope comes to rest at the same equilibrium as with implicit Euler
+    reference = _simulate(ImplicitEulerSolver(_hanging_rope(), 0.01), steps=500)
+    state = _simulate(ProjectiveDynamicsSolver(_hanging_rope(), 0.01, iterations=20), steps=500)
+    assert np.abs(state.particle_qd).max() < 1e-3
+    assert np.allclose(state.particle_q, reference.particle_q, atol=1e-6)
+    assert np.all(state.particle_q[[0, -1]] == reference.particle_q[[0, -1]])
+
+
+@pytest.mark.parametrize("method, iterations", [("gauss_seidel", 4), ("jacobi", 10)])
+def test_xpbd(method, iterations):
+    reference = _simulate(ImplicitEulerSolver(_hanging_rope(), 0.01), steps=500)
+    state = _simulate(XPBDSolver(_hanging_rope(), 0.01, iterations=iterations, method=method), steps=500)
+    assert np.abs(state.particle_qd).max() < 1e-5
+    assert np.allclose(state.particle_q, reference.particle_q, atol=1e-3)
+    assert np.all(state.particle_q[[0, -1]] == reference.particle_q[[0, -1]])
+    with pytest.raises(RuntimeError):
+        XPBDSolver(_hanging_rope(), 0.01, method="newton")
+
+
+def test_krylov_solvers():
+    rng = np.random.default_rng(3)
+    n = 60
+    B = rng.normal(size=(n, n))
+    A = B @ B.T + n * np.eye(n)
+    b = rng.normal(size=n)
+    x, iterations = gmres(lambda v: A @ v, b, tol=1e-10, restart=10)
+    assert np.allclose(A @ x, b, atol=1e-8) and iterations > 10
+    x, _ = conjugate_gradient(lambda v: A @ v, b, tol=1e-10)
+    assert np.allclose(A @ x, b, atol=1e-8)
+    # a warm start at the solution needs no iteration
+    assert gmres(lambda v: A @ v, b, x0=x, tol=1e-6)[1] == 0
+    # GMRES doesn't need symmetry
+    A += np.triu(rng.normal(size=(n, n)))
+    x, _ = gmres(lambda v: A @ v, b, tol=1e-10, maxiter=n)
+    assert np.allclose(A @ x, b, atol=1e-8)
+    # conjugate gradients stop rather than diverge for an indefinite matrix
+    with pytest.raises(RuntimeError):
+        conjugate_gradient(lambda v: np.diag(np.arange(-5.0, 5.0)) @ v, np.ones(10))
+
+
+@pytest.mark.parametrize("linear_solver", ["gmres", "cg"])
+@pytest.mark.parametrize("solver_type", [ImplicitEulerSolver, LinearizedImplicitSolver])
+def test_jacobian_free_solver(solver_type, linear_solver):
+    reference = _simulate(solver_type(_hanging_rope(), 0.01, "dense"), steps=50)
+    solver = solver_type(_hanging_rope(), 0.01, linear_solver)
+    state = _simulate(solver, steps=50)
+    assert solver.system.krylov_iterations > 0
+    assert np.allclose(state.particle_q, reference.particle_q, atol=1e-7)
+    assert np.allclose(state.particle_qd, reference.particle_qd, atol=1e-5)
+
+
+def test_cg_fallback():
+    # compressed springs are unstable transversally, so the system matrix of a large timestep is
+    # indefinite: conjugate gradients break down and the system is solved by GMRES
+    def compressed_chain():
+        builder = ModelBuilder(gravity=0.0)
+        builder.add_particle(pos=(0, 0, 0), vel=(0, 0.3, 0.1), mass=1.0)
+        builder.add_particle(pos=(0.5, 0, 0), vel=(0.2, -0.3, 0), mass=1.0)
+        builder.add_particle(pos=(0.5, 0.5, 0.1), vel=(0.1, 0.1, -0.2), mass=1.0)
+        builder.add_spring(0, 1, 1000.0, 0.0, rest_length=1.0)
+        builder.add_spring(1, 2, 1000.0, 0.0, rest_length=1.0)
+        return builder.finalize()
+
+    reference = _simulate(LinearizedImplicitSolver(compressed_chain(), 0.5, "dense"), steps=1)
+    solver = LinearizedImplicitSolver(compressed_chain(), 0.5, "cg")
+    state = _simulate(solver, steps=1)
+    assert solver.system.krylov_iterations > 0
+    assert np.allclose(state.particle_q, reference.particle_q, atol=1e-6)
+
+
+def test_newton_predictors():
+    reference = _simulate(ImplicitEulerSolver(_hanging_rope(), 0.01), steps=200)
+    stats = {}
+    for predictor in ImplicitEulerSolver.PREDICTORS:
+        solver = ImplicitEulerSolver(_hanging_rope(), 0.01, predictor=predictor)
+        state = _simulate(solver, steps=200)
+        assert np.allclose(state.particle_q, reference.particle_q, atol=1e-6)
+        stats[predictor] = solver.statistics()
+        assert stats[predictor]["steps"] == 200 and stats[predictor]["unconverged_steps"] == 0
+        assert sum(solver.iteration_counts.values()) == 200
+    assert stats["velocity"]["single_iteration"] == 0.0
+    assert stats["extrapolate"]["mean_iterations"] < stats["velocity"]["mean_iterations"]
+    # the linearized prediction is the first Newton iteration from the velocity
+    assert stats["linearized"]["single_iteration"] > 0.5
+    assert stats["linearized"]["mean_linear_solves"] == stats["velocity"]["mean_linear_solves"]
+    solver.reset_statistics()
+    assert solver.statistics()["steps"] == 0
+    with pytest.raises(RuntimeError):
+        ImplicitEulerSolver(_hanging_rope(), 0.01, predictor="cubic")
+
+
+def _orbit():
+    # a particle on a circular orbit of radius 1 and period 2π around a fixed heavy particle
+    builder = ModelBuilder(gravity=0.0)
+    builder.add_particle(pos=(0, 0, 0), vel=(0, 0, 0), mass=10.0, flags=0)
+    builder.add_particle(pos=(1, 0, 0), vel=(0, 1, 0), mass=1.0)
+    builder.add_gravitational(0, 1, 0.1)
+    return builder.finalize()
+
+
+def _orbit_errors(solver_type, steps):
+    """The position and energy errors after ten orbits."""
+    state = _simulate(solver_type(_orbit(), 20 * np.pi / steps), steps=steps)
+    q, v = state.particle_q[1], state.particle_qd[1]
+    energy = 0.5 * v @ v - 1.0 / np.linalg.norm(q)
+    return np.linalg.norm(q - (1, 0, 0)), abs(energy + 0.5)
+
+
+@pytest.mark.parametrize("solver_type, order", [(MidpointSolver, 2), (RK4Solver, 4), (VelocityVerletSolver, 2)])
+def test_orbit_convergence(solver_type, order):
+    coarse, _ = _orbit_errors(solver_type, 600)
+    fine, _ = _orbit_errors(solver_type, 1200)
+    assert coarse / fine > 0.8 * 2**order
+
+
+def test_orbit_energy():
+    # at a large timestep, explicit Euler spirals out while velocity Verlet conserves the energy
+    assert _orbit_errors(ExplicitEulerSolver, 600)[1] > 0.1
+    assert _orbit_errors(VelocityVerletSolver, 600)[1] < 1e-6
+    assert _orbit_errors(RK4Solver, 600)[1] < 1e-4
+    assert _orbit_errors(VelocityVerletSolver, 600)[0] < 0.5 and _orbit_errors(RK4Solver, 600)[0] < 1e-2
+
+
+def test_velocity_verlet_forces(monkeypatch):
+    # a step costs one force evaluation, unless the state was changed between the steps
+    calls = []
+    eval_all_forces = solver_module.eval_all_forces
+
+    def counting_eval_all_forces(model, state):
+        calls.append(state)
+        eval_all_forces(model, state)
+
+    monkeypatch.setattr(solver_module, "eval_all_forces", counting_eval_all_forces)
+    solver = VelocityVerletSolver(_orbit(), 0.01)
+    state = _simulate(solver, steps=10)
+    assert len(calls) == 11
+    state.particle_q[1, 0] += 0.1
+    state.clear_forces()
+    solver.step(state, solver.model.state())
+    assert len(calls) == 13
+
+
+def _stiff_soft_cloth():
+    # stiff springs along the rows, soft springs along the columns and the diagonals
+    builder = ModelBuilder()
+    builder.add_cloth_grid(
+        (0, 0, 2),
+        20,
+        20,
+        0.01,
+        mass=0.001,
+        ke=3500.0,
+        kd=0.01,
+        cross_ke=300.0,
+        cross_kd=0.01,
+        shear_ke=20.0,
+        fixed_rows=[0],
+    )
+    return builder.finalize()
+
+
+def test_multirate():
+    model = _stiff_soft_cloth()
+    reference = _simulate(VelocityVerletSolver(_stiff_soft_cloth(), 1e-4), steps=160)
+    solver = MultirateSolver(model, 8e-4)
+    state = _simulate(solver, steps=20)
+    assert np.allclose(state.particle_q, reference.particle_q, atol=1e-5)
+    # the stiff springs are substepped, the soft ones are not
+    assert solver.substeps > 1
+    assert np.all(model.spring_stiffness[solver.fast_springs] == 3500.0)
+    assert np.all(model.spring_stiffness[solver.slow_springs] < 3500.0)
+    # the springs between fixed particles are never evaluated
+    assert np.array_equal(np.sort(np.concatenate([solver.fast_springs, solver.slow_springs])), model.spring_active)
+    # fewer spring evaluations than a uniform integration at the rate of the stiff springs
+    assert solver.spring_evaluations < solver.substeps * model.spring_count
+
+    # partition by stiffness; without fast springs, this is velocity Verlet
+    solver = MultirateSolver(_stiff_soft_cloth(), 8e-4, substeps=4, stiffness_threshold=100.0)
+    assert len(solver.fast_springs) == 0 and solver.substeps == 1
+    _simulate(solver, steps=1)
+    assert solver.substeps == 4 and np.all(model.spring_stiffness[solver.fast_springs] > 100.0)
+    solver = MultirateSolver(_orbit(), 0.01)
+    state = _simulate(solver, steps=100)
+    assert solver.fast_model is None
+    assert np.allclose(state.particle_q, _simulate(VelocityVerletSolver(_orbit(), 0.01), steps=100).particle_q)
+
+
+def test_stable_timestep():
+    # a damped oscillator of frequency 5 and damping rate 0.5
+    builder = ModelBuilder(gravity=0.0)
+    builder.add_particle(pos=(0, 0, 0), vel=(0, 0, 0), mass=1.0, flags=0)
+    builder.add_particle(pos=(1, 0, 0), vel=(0, 0, 0), mass=2.0)
+    builder.add_spring(0, 1, 50.0, 1.0)
+    omega, gamma = estimate_frequencies(builder.finalize())
+    assert omega == pytest.approx(5.0) and gamma == pytest.approx(0.5)
+
+    assert stable_timestep(VelocityVerletSolver, 5.0, 0.0) == pytest.approx(0.4)
+    assert stable_timestep(RK4Solver, 5.0, 0.0) == pytest.approx(2 * np.sqrt(2) / 5, rel=1e-3)
+    # explicit Euler only damps oscillations that are damped enough
+    assert stable_timestep(ExplicitEulerSolver, 5.0, 0.0) < 1e-3
+    assert stable_timestep(ExplicitEulerSolver, 5.0, 0.5) == pytest.approx(0.5 / 25, rel=0.05)
+    assert stable_timestep(ImplicitEulerSolver, 5.0, 0.5) == np.inf
+    assert stable_timestep(VelocityVerletSolver, 0.0, 0.0) == np.inf
+
+    class SubstepSolver(VelocityVerletSolver):
+        pass
+
+    assert stable_timestep(SubstepSolver, 5.0, 0.0) == pytest.approx(0.4)
+    assert is_conditionally_stable(SubstepSolver) and not is_conditionally_stable(ImplicitEulerSolver)
+
+
+@pytest.mark.parametrize(
+    "solver_type, unstable", [(MidpointSolver, 8.0), (RK4Solver, 1.5), (VelocityVerletSolver, 1.5)]
+)
+def test_estimated_timestep(solver_type, unstable):
+    # a swinging cloth stays bounded slightly below the estimated stable timestep, and blows up above it
+    # (the estimate bounds the slow growth of undamped oscillations of the midpoint method)
+    stable_dt = estimate_stable_timestep(_stiff_soft_cloth(), solver_type)
+    for factor, bounded in ((0.9, True), (unstable, False)):
+        with np.errstate(all="ignore"):
+            state = _simulate(solver_type(_stiff_soft_cloth(), factor * stable_dt), steps=300)
+        assert (np.abs(state.particle_q).max() < 10) == bounded
+
+
+def test_auto_timestep_sagging_cloth(tmp_path, monkeypatch):
+    # explicit Euler on the sagging cloth of scene06 with `timestep: auto`: the stretched springs
+    # oscillate transversally without damping, which explicit Euler amplifies
+    root = Path(nemo.__file__).parents[2]
+    monkeypatch.syspath_prepend(str(root))
+    # the assignments are found from the repository root, which is only on the path from here on
+    from assignments.pa2 import load_scene  # noqa: PLC0415
+
+    config = yaml.safe_load((root / "scenes" / "pa2" / "scene06.yml").read_text())
+    config["solver"] = {"type": "explicit_euler", "timestep": "auto"}
+    path = tmp_path / "scene.yml"
+    path.write_text(yaml.safe_dump(config))
+    model, solver, _ = load_scene(str(path))
+    assert solver.dt < 1e-5
+    energy = [eval_diagnostics(model, model.state())[DIAGNOSTICS.index("total_energy")]]
+    s0, s1 = model.state(), model.state()
+    while solver.ts < 0.05:
+        s0.clear_forces()
+        solver.step(s0, s1)
+        s0, s1 = s1, s0
+    energy.append(eval_diagnostics(model, s0)[DIAGNOSTICS.index("total_energy")])
+    # the damped cloth loses energy, it gains some if explicit Euler is unstable
+    assert np.all(np.isfinite(s0.particle_q)) and energy[1] < energy[0]
+
+
+def test_expm():
+    rng = np.random.default_rng(4)
+    B = rng.normal(size=(8, 8))
+    w, V = np.linalg.eigh(B + B.T)
+    assert np.allclose(expm(B + B.T), V @ np.diag(np.exp(w)) @ V.T, rtol=1e-12)
+    # a rotation by 3 radians
+    assert np.allclose(expm(np.array([[0.0, 3.0], [-3.0, 0.0]])), [[np.cos(3), np.sin(3)], [-np.sin(3), np.cos(3)]])
+    A = 0.1 * rng.normal(size=(200, 200))
+    b = rng.normal(size=200)
+    x, error = expm_multiply(lambda v: A @ v, b, tol=1e-10, maxiter=40)
+    assert error < 1e-8 and np.allclose(x, expm(A) @ b, atol=1e-9)
+
+
+@pytest.mark.parametrize("jacobian", ["dense", "banded", "matrix_free"])
+def test_exponential_solver(jacobian):
+    # a damped hanging rope swings with large steps: the exponential integrator follows the
+    # (fine RK4) reference much more closely than the linearized implicit Euler integrator
+    reference = _simulate(RK4Solver(_hanging_rope(), 1e-4), steps=5000)
+    implicit = _simulate(LinearizedImplicitSolver(_hanging_rope(), 0.02), steps=25)
+    solver = ExponentialSolver(_hanging_rope(), 0.02, jacobian=jacobian)
+    state = _simulate(solver, steps=25)
+    assert solver.substeps == 1 and solver.krylov_iterations <= solver.krylov_dim
+    error = np.abs(state.particle_q - reference.particle_q).max()
+    assert 20 * error < np.abs(implicit.particle_q - reference.particle_q).max()
+    assert np.all(state.particle_q[[0, -1]] == reference.particle_q[[0, -1]])
+    # a small Krylov subspace splits the steps
+    solver = ExponentialSolver(_hanging_rope(), 0.02, jacobian=jacobian, krylov_dim=5)
+    state = _simulate(solver, steps=25)
+    assert solver.substeps > 1
+    assert np.abs(state.particle_q - reference.particle_q).max() < 2 * error
+
+
+def test_lazy_solvers():
+    # importing the package imports no solver; a solver imports its own modules only
+    code = (
+        "import sys, nemo.solvers; before = sorted(m for m in sys.modules if m.startswith('nemo.solvers.')); "
+        "from nemo.solvers import XPBDSolver; "
+        "print(before, 'nemo.solvers.implicit_euler' in sys.modules, 'nemo.solvers.xpbd' in sys.modules)"
+    )
+    env = dict(os.environ, PYTHONPATH=str(Path(nemo.__file__).parent.parent))
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["[]", "False", "True"]
+    # neither does the assignment, whose scene only imports the module of its solver
+    root = Path(nemo.__file__).parents[2]
+    code = (
+        "import sys, assignments.pa2; before = {m for m in sys.modules if m.startswith('nemo.solvers.')}; "
+        "assignments.pa2.load_scene('scenes/pa2/scene00.yml'); "
+        "after = {m for m in sys.modules if m.startswith('nemo.solvers.')}; "
+        "print(*sorted(before), '/', *sorted(after - before), file=sys.stderr)"
+    )
+    env["PYTHONPATH"] += os.pathsep + str(root)
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True)
+    # (the scene loader prints to stdout)
+    assert out.stderr.split() == ["nemo.solvers.solver", "nemo.solvers.stability", "/", "nemo.solvers.symplectic_euler"]
+    assert solvers.XPBDSolver is XPBDSolver
+    assert set(solvers.__all__) <= set(dir(solvers))
+    with pytest.raises(AttributeError):
+        solvers.NewtonSolver  # noqa: B018
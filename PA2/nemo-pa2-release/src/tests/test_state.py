@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from nemo.sim import ModelBuilder, State
+from nemo.solvers import ImplicitEulerSolver, LinearizedImplicitSolver, MidpointSolver
+
+
+def test_state_buffer():
+    builder = ModelBuilder()
+    builder.add_rope((0, 0, 1), (1, 0, 1), count=5, mass=0.1, ke=10.0)
+    model = builder.finalize(dtype=np.float32)
+    s0 = model.state()
+    assert s0.buffer.shape == (3, 5, 3) and s0.buffer.dtype == np.float32
+    assert np.shares_memory(s0.particle_q, s0.buffer) and np.shares_memory(s0.particle_f, s0.buffer)
+    assert np.array_equal(s0.particle_q, model.particle_q)
+
+    # assigning copies into the buffer, so the views stay valid
+    q = s0.particle_q
+    s0.particle_qd = np.ones((5, 3))
+    s0.particle_q = s0.particle_q + 1.0
+    assert q is s0.particle_q and np.array_equal(q, model.particle_q + 1.0)
+    assert np.all(s0.buffer[1] == 1.0)
+    with pytest.raises(AttributeError):
+        s0.velocity = 1.0
+
+    s1 = model.state()
+    s1.copy_from(s0)
+    assert np.array_equal(s1.buffer, s0.buffer) and not np.shares_memory(s1.buffer, s0.buffer)
+    s2 = s0.copy()
+    assert np.array_equal(s2.buffer, s0.buffer) and not np.shares_memory(s2.buffer, s0.buffer)
+
+    s1.clear_forces()
+    s1.particle_f[0] = 7.0
+    buffers = s0.buffer, s1.buffer
+    s0.swap(s1)
+    assert s0.buffer is buffers[1] and s1.buffer is buffers[0]
+    assert np.all(s0.particle_f[0] == 7.0) and np.shares_memory(s0.particle_f, buffers[1])
+    with pytest.raises(RuntimeError):
+        State(4).copy_from(s0)
+
+
+def test_state_pool():
+    builder = ModelBuilder()
+    builder.add_rope((0, 0, 1), (1, 0, 1), count=8, mass=0.1, ke=100.0, kd=0.1, fixed=(0,))
+    model = builder.finalize()
+    pool = model.state_pool
+    a = pool.acquire()
+    pool.release(a)
+    assert pool.acquire() is a and pool.allocated == 1
+    pool.release(a)
+    with pytest.raises(RuntimeError):
+        pool.release(State(3))
+
+    # the solvers write in place and reuse the pooled temporary state
+    s0, s1 = model.state(), model.state()
+    buffers = {id(s0.buffer), id(s1.buffer)}
+    for solver_type in (LinearizedImplicitSolver, ImplicitEulerSolver, MidpointSolver):
+        solver = solver_type(model, 0.01)
+        for _ in range(10):
+            s0.clear_forces()
+            solver.step(s0, s1)
+            s0, s1 = s1, s0
+    assert {id(s0.buffer), id(s1.buffer)} == buffers
+    assert pool.allocated == 1
+    assert np.all(np.isfinite(s0.buffer))